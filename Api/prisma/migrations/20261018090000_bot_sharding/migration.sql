@@ -0,0 +1,18 @@
+-- CreateTable
+CREATE TABLE `BotWorker` (
+    `id` VARCHAR(191) NOT NULL,
+    `startedAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    `heartbeatAt` DATETIME(3) NOT NULL,
+
+    PRIMARY KEY (`id`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+
+-- CreateTable
+CREATE TABLE `SearchLease` (
+    `searchKey` VARCHAR(191) NOT NULL,
+    `workerId` VARCHAR(191) NOT NULL,
+    `expiresAt` DATETIME(3) NOT NULL,
+
+    INDEX `SearchLease_workerId_idx`(`workerId`),
+    PRIMARY KEY (`searchKey`)
+) DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE `SearchItem` ADD COLUMN `domain` VARCHAR(191) NOT NULL DEFAULT 'fr';
@@ -0,0 +1,4 @@
+-- AlterTable
+ALTER TABLE `SearchItem` ADD COLUMN `priority` INTEGER NOT NULL DEFAULT 1,
+    ADD COLUMN `minInterval` INTEGER NULL,
+    ADD COLUMN `maxInterval` INTEGER NULL;
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE `SearchItem` ADD COLUMN `minDiscount` INTEGER NULL;
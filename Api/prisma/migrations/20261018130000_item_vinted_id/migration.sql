@@ -0,0 +1,21 @@
+-- AlterTable
+ALTER TABLE `Item` ADD COLUMN `vintedId` BIGINT NULL;
+
+-- Backfill : identifiant Vinted extrait des URL .../items/<id>-<slug>
+UPDATE `Item`
+SET `vintedId` = CAST(REGEXP_SUBSTR(SUBSTRING_INDEX(`url`, '/items/', -1), '^[0-9]+') AS UNSIGNED)
+WHERE `url` REGEXP '/items/[0-9]+';
+
+-- Une ligne par annonce et par recherche : une annonce satisfaisant plusieurs recherches
+-- est rattachée à chacune d'elles
+-- CreateIndex
+CREATE UNIQUE INDEX `Item_vintedId_searchItemId_key` ON `Item`(`vintedId`, `searchItemId`);
+
+-- CreateIndex
+CREATE INDEX `Item_searchItemId_createdAt_idx` ON `Item`(`searchItemId`, `createdAt`);
+
+-- CreateIndex
+CREATE INDEX `Item_createdAt_idx` ON `Item`(`createdAt`);
+
+-- DropIndex
+DROP INDEX `Item_url_key` ON `Item`;
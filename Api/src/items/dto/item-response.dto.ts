@@ -0,0 +1,8 @@
+import { Item } from "@prisma/client"
+
+// Item.vintedId est un BIGINT, que JSON.stringify ne sait pas sérialiser : il est renvoyé en chaîne
+export type ItemResponse<T extends Item = Item> = Omit<T, "vintedId"> & { vintedId: string | null }
+
+export function toItemResponse<T extends Item>(item: T): ItemResponse<T> {
+  return { ...item, vintedId: item.vintedId === null ? null : item.vintedId.toString() }
+}
@@ -0,0 +1,80 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from "@nestjs/common";
+import { ConfigService } from "@nestjs/config";
+import { PrismaService } from "src/prisma/prisma.service";
+
+const DAY_MS = 24 * 3600 * 1000;
+
+/**
+ * Purge périodique des items plus anciens que ITEM_RETENTION_DAYS, désactivée par défaut
+ * (non défini ou 0 : tout garder).
+ * La suppression se fait par petits lots sur l'index createdAt, avec une pause entre
+ * deux lots, pour ne jamais verrouiller longtemps la table pendant que le Bot écrit.
+ */
+@Injectable()
+export class ItemsRetentionService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(ItemsRetentionService.name);
+  private timer?: NodeJS.Timeout;
+  private running = false;
+  private stopped = false;
+
+  private readonly retentionDays: number;
+  private readonly batchSize: number;
+  private readonly intervalMs: number;
+  private readonly pauseMs: number;
+
+  constructor(
+    private prisma: PrismaService,
+    configService: ConfigService
+  ) {
+    this.retentionDays = Number(configService.get("ITEM_RETENTION_DAYS") ?? 0);
+    this.batchSize = Number(configService.get("ITEM_RETENTION_BATCH") ?? 1000);
+    this.intervalMs = Number(configService.get("ITEM_RETENTION_INTERVAL_MINUTES") ?? 60) * 60 * 1000;
+    this.pauseMs = Number(configService.get("ITEM_RETENTION_PAUSE_MS") ?? 200);
+  }
+
+  onModuleInit() {
+    if (this.retentionDays <= 0) {
+      this.logger.log("Rétention des items désactivée");
+      return;
+    }
+    this.timer = setInterval(() => void this.purge(), this.intervalMs);
+    void this.purge();
+  }
+
+  onModuleDestroy() {
+    this.stopped = true;
+    if (this.timer) {
+      clearInterval(this.timer);
+    }
+  }
+
+  /** Supprime les items expirés lot par lot ; retourne le nombre de lignes supprimées */
+  async purge(): Promise<number> {
+    if (this.running) {
+      return 0;
+    }
+    this.running = true;
+    const cutoff = new Date(Date.now() - this.retentionDays * DAY_MS);
+    let total = 0;
+    try {
+      while (!this.stopped) {
+        const deleted = await this.prisma.$executeRaw`
+          DELETE FROM Item WHERE createdAt < ${cutoff} ORDER BY createdAt LIMIT ${this.batchSize}
+        `;
+        total += deleted;
+        if (deleted < this.batchSize) {
+          break;
+        }
+        await new Promise((resolve) => setTimeout(resolve, this.pauseMs));
+      }
+      if (total > 0) {
+        this.logger.log(`${total} items de plus de ${this.retentionDays} jours supprimés`);
+      }
+    } catch (error) {
+      this.logger.error(`Purge des items interrompue après ${total} suppressions : ${error}`);
+    } finally {
+      this.running = false;
+    }
+    return total;
+  }
+}
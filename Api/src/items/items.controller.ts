@@ -14,8 +14,15 @@ import {
   ApiOperation,
   ApiResponse,
   ApiBearerAuth,
+  ApiQuery,
 } from "@nestjs/swagger";
 
+const CURSOR_QUERY = {
+  name: "cursor",
+  required: false,
+  description: "Id of the last item received: returns the next page by key (createdAt order only), ignoring page",
+};
+
 @ApiTags("items")
 @ApiBearerAuth()
 @UseGuards(JwtAuthGuard)
@@ -25,20 +32,23 @@ export class ItemsController {
 
   @ApiOperation({ summary: "Get all items for current user" })
   @ApiResponse({ status: 200, description: "Return all items" })
+  @ApiQuery(CURSOR_QUERY)
   @Get()
   findAll(
     @Request() req,
     @Query("limit") limit: number = 12,
     @Query("page") page: number = 1,
     @Query("orderBy") orderBy: string = "createdAt",
-    @Query("order") order: "asc" | "desc" = "desc"
+    @Query("order") order: "asc" | "desc" = "desc",
+    @Query("cursor") cursor?: string
   ) {
-    return this.itemsService.findAll(req.user.id, limit, page, orderBy, order);
+    return this.itemsService.findAll(req.user.id, limit, page, orderBy, order, cursor);
   }
 
   @ApiOperation({ summary: "Get items by search item id" })
   @ApiResponse({ status: 200, description: "Return items by search item id" })
   @ApiResponse({ status: 404, description: "Search item not found" })
+  @ApiQuery(CURSOR_QUERY)
   @Get("search/:searchItemId")
   findBySearchItem(
     @Param("searchItemId") searchItemId: string,
@@ -46,7 +56,8 @@ export class ItemsController {
     @Query("limit") limit: number = 12,
     @Query("page") page: number = 1,
     @Query("orderBy") orderBy: string = "createdAt",
-    @Query("order") order: "asc" | "desc" = "desc"
+    @Query("order") order: "asc" | "desc" = "desc",
+    @Query("cursor") cursor?: string
   ) {
     return this.itemsService.findBySearchItem(
       searchItemId,
@@ -54,7 +65,8 @@ export class ItemsController {
       limit,
       page,
       orderBy,
-      order
+      order,
+      cursor
     );
   }
 
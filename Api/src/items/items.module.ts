@@ -1,9 +1,10 @@
 import { Module } from "@nestjs/common";
 import { ItemsService } from "./items.service";
 import { ItemsController } from "./items.controller";
+import { ItemsRetentionService } from "./items-retention.service";
 
 @Module({
-  providers: [ItemsService],
+  providers: [ItemsService, ItemsRetentionService],
   controllers: [ItemsController],
   exports: [ItemsService],
 })
@@ -1,13 +1,36 @@
 import { Injectable, NotFoundException } from "@nestjs/common";
 import { CreateItemDto } from "./dto/create-item.dto";
+import { toItemResponse } from "./dto/item-response.dto";
 import { PrismaService } from "src/prisma/prisma.service";
 
+// Colonnes de tri acceptées ; seul createdAt (indexé) permet la pagination par curseur
+const SORTABLE_COLUMNS = ["createdAt", "updatedAt", "price", "name"];
+const MAX_PAGE_SIZE = 100;
+
 @Injectable()
 export class ItemsService {
   constructor(private prisma: PrismaService) {}
 
-  async findAll(userId: string, limit: number, page: number, orderBy: string, order: "asc" | "desc") {
-    return this.prisma.item.findMany({
+  /**
+   * Tri et pagination d'une liste d'items. Avec `cursor` (id du dernier item reçu) et un tri
+   * par date, la page suivante est lue par clé (createdAt, id) au lieu d'un OFFSET qui
+   * parcourt toutes les lignes précédentes.
+   */
+  private paginate(limit: number, page: number, orderBy: string, order: "asc" | "desc", cursor?: string) {
+    const take = Math.min(Math.max(Number(limit) || 12, 1), MAX_PAGE_SIZE);
+    const column = SORTABLE_COLUMNS.includes(orderBy) ? orderBy : "createdAt";
+    const direction = order === "asc" ? "asc" : "desc";
+    // L'id départage les items de même valeur : l'ordre est stable d'une page à l'autre
+    const sort = [{ [column]: direction }, { id: direction }];
+
+    if (cursor && column === "createdAt") {
+      return { take, skip: 1, cursor: { id: cursor }, orderBy: sort };
+    }
+    return { take, skip: (Math.max(Number(page) || 1, 1) - 1) * take, orderBy: sort };
+  }
+
+  async findAll(userId: string, limit: number, page: number, orderBy: string, order: "asc" | "desc", cursor?: string) {
+    const items = await this.prisma.item.findMany({
       where: {
         searchItem: {
           userId,
@@ -16,15 +39,20 @@ export class ItemsService {
       include: {
         searchItem: true,
       },
-      take: limit,
-      skip: (page - 1) * limit,
-      orderBy: {
-        [orderBy]: order,
-      },
+      ...this.paginate(limit, page, orderBy, order, cursor),
     });
+    return items.map(toItemResponse);
   }
 
-  async findBySearchItem(searchItemId: string, userId: string, limit: number, page: number, orderBy: string, order: "asc" | "desc") {
+  async findBySearchItem(
+    searchItemId: string,
+    userId: string,
+    limit: number,
+    page: number,
+    orderBy: string,
+    order: "asc" | "desc",
+    cursor?: string
+  ) {
     // Vérifier si le searchItem appartient à l'utilisateur
     const searchItem = await this.prisma.searchItem.findFirst({
       where: {
@@ -39,16 +67,13 @@ export class ItemsService {
       );
     }
 
-    return this.prisma.item.findMany({
+    const items = await this.prisma.item.findMany({
       where: {
         searchItemId,
       },
-      take: limit,
-      skip: (page - 1) * limit,
-      orderBy: {
-        [orderBy]: order,
-      },
+      ...this.paginate(limit, page, orderBy, order, cursor),
     });
+    return items.map(toItemResponse);
   }
 
   async findOne(id: string, userId: string) {
@@ -68,15 +93,16 @@ export class ItemsService {
       throw new NotFoundException(`Item with ID ${id} not found`);
     }
 
-    return item;
+    return toItemResponse(item);
   }
 
   async remove(id: string, userId: string) {
     await this.findOne(id, userId);
 
-    return this.prisma.item.delete({
+    const item = await this.prisma.item.delete({
       where: { id },
     });
+    return toItemResponse(item);
   }
 
   async numberOfItems(userId: string) {
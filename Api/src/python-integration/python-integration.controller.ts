@@ -1,4 +1,13 @@
-import { Controller, Get, Post, Body, UseGuards } from "@nestjs/common";
+import {
+  Controller,
+  Get,
+  Post,
+  Body,
+  UseGuards,
+  Sse,
+  MessageEvent,
+} from "@nestjs/common";
+import { Observable } from "rxjs";
 import { PythonIntegrationService } from "./python-integration.service";
 import { CreateItemDto } from "../items/dto/create-item.dto";
 import {
@@ -24,4 +33,16 @@ export class PythonIntegrationController {
   getSearchItems() {
     return this.pythonIntegrationService.getSearchItems();
   }
+
+  @ApiOperation({
+    summary: "Stream search item changes (Server-Sent Events) for Python script",
+  })
+  @ApiResponse({
+    status: 200,
+    description: "created / updated / deleted events, ping every 15 s",
+  })
+  @Sse("search-items/events")
+  searchItemEvents(): Observable<MessageEvent> {
+    return this.pythonIntegrationService.searchItemEvents();
+  }
 }
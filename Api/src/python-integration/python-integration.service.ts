@@ -1,9 +1,13 @@
-import { Injectable, Logger } from "@nestjs/common";
+import { Injectable, Logger, MessageEvent } from "@nestjs/common";
+import { Observable, interval, map, merge } from "rxjs";
 import { ItemsService } from "../items/items.service";
 import { SearchItemsService } from "../search-items/search-items.service";
 import { PrismaService } from "../prisma/prisma.service";
 import { CreateItemDto } from "../items/dto/create-item.dto";
 
+// Un commentaire régulier garde la connexion ouverte derrière les proxies
+const HEARTBEAT_MS = 15000;
+
 @Injectable()
 export class PythonIntegrationService {
   private readonly logger = new Logger(PythonIntegrationService.name);
@@ -22,4 +26,14 @@ export class PythonIntegrationService {
       tags: item.tags ? item.tags.split(",") : [],
     }));
   }
+
+  searchItemEvents(): Observable<MessageEvent> {
+    const changes = this.searchItemsService.changes.pipe(
+      map((event) => ({ type: event.type, data: event }) as MessageEvent)
+    );
+    const heartbeat = interval(HEARTBEAT_MS).pipe(
+      map(() => ({ type: "ping", data: {} }) as MessageEvent)
+    );
+    return merge(changes, heartbeat);
+  }
 }
@@ -4,10 +4,14 @@ import {
   IsNumber,
   IsArray,
   IsString,
+  IsIn,
+  IsInt,
   Min,
+  Max,
 } from "class-validator";
 import { ApiProperty } from "@nestjs/swagger";
 import { Transform, Type } from "class-transformer";
+import { VINTED_DOMAINS } from "../vinted-domains";
 
 export class CreateSearchItemDto {
   @ApiProperty({
@@ -33,8 +37,10 @@ export class CreateSearchItemDto {
   minPrice?: number;
 
   @ApiProperty({
-    example: ["nike", "adidas", "vintage"],
-    description: "Tags for the search",
+    example: ["air max", "-enfant", "brand:Nike", "size:42", "condition:neuf"],
+    description:
+      "Tags filtering the results: plain keywords (any must appear in title or brand), " +
+      "-keyword to exclude, brand:, size: and condition: to restrict those fields",
   })
   @IsArray()
   @IsString({ each: true })
@@ -63,4 +69,62 @@ export class CreateSearchItemDto {
   @IsNotEmpty()
   @IsString()
   searchText: string;
+
+  @ApiProperty({
+    example: "fr",
+    description: "Vinted domain to search (fr, de, it, es, co.uk, ...)",
+    required: false,
+    default: "fr",
+  })
+  @IsOptional()
+  @IsString()
+  @IsIn(VINTED_DOMAINS)
+  domain?: string;
+
+  @ApiProperty({
+    example: 2,
+    description: "Priority tier: 0 low, 1 normal, 2 high (sets the default polling bounds)",
+    required: false,
+    default: 1,
+  })
+  @IsOptional()
+  @IsInt()
+  @Min(0)
+  @Max(2)
+  @Type(() => Number)
+  priority?: number;
+
+  @ApiProperty({
+    example: 30,
+    description: "Shortest polling interval in seconds (overrides the tier bound)",
+    required: false,
+  })
+  @IsOptional()
+  @IsInt()
+  @Min(10)
+  @Type(() => Number)
+  minInterval?: number;
+
+  @ApiProperty({
+    example: 600,
+    description: "Longest polling interval in seconds (overrides the tier bound)",
+    required: false,
+  })
+  @IsOptional()
+  @IsInt()
+  @Min(10)
+  @Type(() => Number)
+  maxInterval?: number;
+
+  @ApiProperty({
+    example: 25,
+    description: "Only notify listings at least this many percent below the search's usual price (listings without enough price history are always notified)",
+    required: false,
+  })
+  @IsOptional()
+  @IsInt()
+  @Min(0)
+  @Max(100)
+  @Type(() => Number)
+  minDiscount?: number;
 }
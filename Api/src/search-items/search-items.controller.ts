@@ -12,6 +12,7 @@ import {
 import { SearchItemsService } from "./search-items.service";
 import { CreateSearchItemDto } from "./dto/create-search-item.dto";
 import { UpdateSearchItemDto } from "./dto/update-search-item.dto";
+import { VINTED_DOMAIN_CURRENCIES } from "./vinted-domains";
 import { JwtAuthGuard } from "../auth/guards/jwt-auth.guard";
 import {
   ApiTags,
@@ -44,6 +45,16 @@ export class SearchItemsController {
     return this.searchItemsService.findAll(req.user.id);
   }
 
+  @ApiOperation({ summary: "List the supported Vinted domains and their currency" })
+  @ApiResponse({ status: 200, description: "Return the supported Vinted domains" })
+  @Get("domains")
+  findDomains() {
+    return Object.entries(VINTED_DOMAIN_CURRENCIES).map(([domain, currency]) => ({
+      domain,
+      currency,
+    }));
+  }
+
   @ApiOperation({ summary: "Get search item by id" })
   @ApiResponse({ status: 200, description: "Return search item by id" })
   @ApiResponse({ status: 404, description: "Search item not found" })
@@ -2,26 +2,52 @@ import { Injectable, NotFoundException } from "@nestjs/common";
 import { CreateSearchItemDto } from "./dto/create-search-item.dto";
 import { UpdateSearchItemDto } from "./dto/update-search-item.dto";
 import { PrismaService } from "src/prisma/prisma.service";
+import { toItemResponse } from "src/items/dto/item-response.dto";
+import { Observable, Subject } from "rxjs";
+
+export interface SearchItemEvent {
+  type: "created" | "updated" | "deleted";
+  id: string;
+  updatedAt: Date;
+}
 
 @Injectable()
 export class SearchItemsService {
+  // Flux des modifications, relayé au Bot par PythonIntegrationController
+  private readonly events = new Subject<SearchItemEvent>();
+
   constructor(private prisma: PrismaService) {}
 
+  get changes(): Observable<SearchItemEvent> {
+    return this.events.asObservable();
+  }
+
+  private emit(type: SearchItemEvent["type"], item: { id: string; updatedAt: Date }) {
+    this.events.next({ type, id: item.id, updatedAt: item.updatedAt });
+  }
+
   async create(createSearchItemDto: CreateSearchItemDto, userId: string) {
     // Convertir le tableau de tags en chaîne délimitée par des virgules
     const tagsString = Array.isArray(createSearchItemDto.tags)
       ? createSearchItemDto.tags.join(",")
       : createSearchItemDto.tags;
 
-    return this.prisma.searchItem.create({
+    const searchItem = await this.prisma.searchItem.create({
       data: {
         maxPrice: createSearchItemDto.maxPrice,
         minPrice: createSearchItemDto.minPrice,
         tags: tagsString,
         searchText: createSearchItemDto.searchText,
+        domain: createSearchItemDto.domain,
+        priority: createSearchItemDto.priority,
+        minInterval: createSearchItemDto.minInterval,
+        maxInterval: createSearchItemDto.maxInterval,
+        minDiscount: createSearchItemDto.minDiscount,
         userId,
       },
     });
+    this.emit("created", searchItem);
+    return searchItem;
   }
 
   async findAll(userId: string) {
@@ -36,6 +62,7 @@ export class SearchItemsService {
     return searchItems.map((item) => ({
       ...item,
       tags: item.tags ? item.tags.split(",") : [],
+      items: item.items.map(toItemResponse),
     }));
   }
 
@@ -58,6 +85,7 @@ export class SearchItemsService {
     return {
       ...searchItem,
       tags: searchItem.tags ? searchItem.tags.split(",") : [],
+      items: searchItem.items.map(toItemResponse),
     };
   }
 
@@ -80,6 +108,7 @@ export class SearchItemsService {
       where: { id },
       data: dataToUpdate,
     });
+    this.emit("updated", updatedItem);
 
     // Convertir la chaîne de tags en tableau pour le résultat
     return {
@@ -91,8 +120,10 @@ export class SearchItemsService {
   async remove(id: string, userId: string) {
     await this.findOne(id, userId);
 
-    return this.prisma.searchItem.delete({
+    const deletedItem = await this.prisma.searchItem.delete({
       where: { id },
     });
+    this.emit("deleted", deletedItem);
+    return deletedItem;
   }
 }
@@ -0,0 +1,19 @@
+// Domaines Vinted pris en charge par le bot et leur devise (voir Bot/core/config.py).
+// Source unique côté Api et Front : le Front les lit via GET /search-items/domains.
+export const VINTED_DOMAIN_CURRENCIES: Record<string, string> = {
+  fr: "EUR",
+  be: "EUR",
+  de: "EUR",
+  at: "EUR",
+  es: "EUR",
+  it: "EUR",
+  nl: "EUR",
+  lu: "EUR",
+  pt: "EUR",
+  lt: "EUR",
+  pl: "PLN",
+  cz: "CZK",
+  "co.uk": "GBP",
+};
+
+export const VINTED_DOMAINS = Object.keys(VINTED_DOMAIN_CURRENCIES);
@@ -0,0 +1,65 @@
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, List
+from aiohttp import web
+
+ITEM_ID_PATTERN = re.compile(r"/items/(\d+)")
+
+
+class FakeDiscord:
+    """
+    Stand-in local des webhooks Discord : limite glissante par webhook avec 429,
+    Retry-After et en-têtes X-RateLimit-*, et horodatage de chaque annonce reçue.
+    """
+
+    def __init__(self, limit: int = 5, window: float = 2.0):
+        self.limit = limit
+        self.window = window
+        self.hits: Dict[str, Deque[float]] = {}
+        self.received: Dict[int, float] = {}  # id Vinted -> réception (monotonic)
+        self.messages = 0
+        self.rate_limited = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/webhooks/{hook_id}", self._webhook)
+        return app
+
+    async def _webhook(self, request: web.Request) -> web.Response:
+        now = time.monotonic()
+        hits = self.hits.setdefault(request.match_info["hook_id"], deque())
+        while hits and now - hits[0] > self.window:
+            hits.popleft()
+
+        if len(hits) >= self.limit:
+            self.rate_limited += 1
+            retry_after = self.window - (now - hits[0])
+            return web.json_response(
+                {"message": "You are being rate limited.", "retry_after": retry_after},
+                status=429,
+                headers={"Retry-After": f"{retry_after:.3f}", "X-RateLimit-Remaining": "0"}
+            )
+
+        hits.append(now)
+        self.messages += 1
+        payload = await request.json()
+        for embed in payload.get("embeds", []):
+            match = ITEM_ID_PATTERN.search(embed.get("url", ""))
+            if match:
+                self.received.setdefault(int(match.group(1)), now)
+
+        reset_after = self.window - (now - hits[0])
+        return web.Response(status=204, headers={
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.limit - len(hits)),
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}"
+        })
+
+    def latencies(self, created: Dict[int, float]) -> List[float]:
+        """Délais publication -> notification des annonces publiées pendant le test"""
+        return [
+            received - created[item_id]
+            for item_id, received in self.received.items()
+            if created.get(item_id) is not None
+        ]
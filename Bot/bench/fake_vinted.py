@@ -0,0 +1,154 @@
+import asyncio
+import itertools
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from aiohttp import web
+
+
+class QueryListings:
+    """Annonces d'un texte de recherche, les plus récentes en premier"""
+
+    def __init__(self, churn: float, backlog: int, next_id, rng: random.Random):
+        self.churn = churn
+        self.next_id = next_id
+        self.rng = rng
+        self.items: Deque[Dict] = deque(maxlen=1000)
+        self.updated = time.monotonic()
+        self.pending = 0.0
+        for _ in range(backlog):
+            self.items.appendleft(self._listing(created=None))
+
+    def _listing(self, created: Optional[float]) -> Dict:
+        return {"id": next(self.next_id), "price": round(self.rng.uniform(1, 200), 1), "created": created}
+
+    def advance(self) -> int:
+        """Publie les annonces apparues depuis le dernier appel ; retourne leur nombre"""
+        now = time.monotonic()
+        self.pending += (now - self.updated) * self.churn
+        self.updated = now
+        count = int(self.pending)
+        self.pending -= count
+        for _ in range(count):
+            self.items.appendleft(self._listing(created=now))
+        return count
+
+
+class FakeVinted:
+    """
+    Stand-in local de vinted.fr : page d'accueil qui pose les cookies et
+    /api/v2/catalog/items avec latence, taux d'erreur et rythme de publication configurables.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        error_rate: float = 0.0,
+        churn: float = 0.2,
+        backlog: int = 50,
+        seed: int = 0,
+        rate_limit: float = 0.0
+    ):
+        """
+        :param latency: Latence moyenne d'une réponse API (secondes, loi exponentielle)
+        :param error_rate: Proportion de réponses en erreur (429 ou 500)
+        :param churn: Nouvelles annonces par seconde et par texte de recherche
+        :param backlog: Annonces déjà présentes à la première requête d'un texte
+        :param rate_limit: Débit soutenable (appels/s) au-delà duquel l'API répond 429 ; 0 pour illimité
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.churn = churn
+        self.backlog = backlog
+        self.rng = random.Random(seed)
+        self.queries: Dict[str, QueryListings] = {}
+        self.created: Dict[int, float] = {}  # id -> publication (monotonic), annonces publiées pendant le test
+        self.requests = 0
+        self.cookie_requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.rate_limit = rate_limit
+        self._allowance = rate_limit
+        self._allowance_at = time.monotonic()
+        self.base_url = ""
+        self._next_id = itertools.count(1_000_000_000)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self._home)
+        app.router.add_get("/api/v2/catalog/items", self._catalog)
+        return app
+
+    async def _home(self, request: web.Request) -> web.Response:
+        self.cookie_requests += 1
+        response = web.Response(text="<html></html>", content_type="text/html")
+        response.set_cookie("datadome", "bench")
+        return response
+
+    def _listings(self, search_text: str) -> QueryListings:
+        listings = self.queries.get(search_text)
+        if listings is None:
+            listings = self.queries[search_text] = QueryListings(self.churn, self.backlog, self._next_id, self.rng)
+        for item in itertools.islice(listings.items, listings.advance()):
+            self.created[item["id"]] = item["created"]
+        return listings
+
+    def _to_json(self, listing: Dict) -> Dict:
+        item_id = listing["id"]
+        return {
+            "id": item_id,
+            "title": f"Annonce {item_id}",
+            "path": f"/items/{item_id}-annonce",
+            "price": {"amount": f"{listing['price']:.2f}", "currency_code": "EUR"},
+            "brand_title": "Marque",
+            "size_title": "M",
+            "status": "Très bon état",
+            "user": {"login": "vendeur", "profile_url": f"{self.base_url}/member/1", "feedback_reputation": 1.0},
+            "photo": {
+                "url": f"{self.base_url}/photos/{item_id}.jpg",
+                "high_resolution": {"timestamp": int(time.time())}
+            }
+        }
+
+    def _over_limit(self) -> bool:
+        """Seau à jetons d'une seconde de réserve, comme un rate limit d'API"""
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        self._allowance = min(self.rate_limit, self._allowance + (now - self._allowance_at) * self.rate_limit)
+        self._allowance_at = now
+        if self._allowance < 1:
+            return True
+        self._allowance -= 1
+        return False
+
+    async def _catalog(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self._over_limit():
+            self.rate_limited += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        if self.latency:
+            await asyncio.sleep(self.rng.expovariate(1 / self.latency))
+        if request.cookies.get("datadome") != "bench":
+            self.errors += 1
+            return web.Response(status=403)
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            if self.rng.random() < 0.5:
+                return web.Response(status=429, headers={"Retry-After": "1"})
+            return web.Response(status=500)
+
+        query = request.query
+        listings = self._listings(" ".join(query.get("search_text", "").lower().split()))
+        price_from = float(query.get("price_from", 0))
+        price_to = float(query.get("price_to", float("inf")))
+        per_page = int(query.get("per_page", 96))
+        page = int(query.get("page", 1))
+
+        matching = [l for l in listings.items if price_from <= l["price"] <= price_to]
+        window = matching[(page - 1) * per_page:page * per_page]
+        return web.json_response({
+            "items": [self._to_json(l) for l in window],
+            "pagination": {"current_page": page, "per_page": per_page, "total_entries": len(matching)}
+        })
@@ -0,0 +1,185 @@
+"""
+Banc de performance de bout en bout du Bot, sans vinted.fr, Discord ni MySQL.
+
+    python -m bench.run --searches 10 100 1000 --duration 60
+
+Chaque scénario lance un faux Vinted et un faux Discord en local, une base SQLite
+en mémoire à la place de MySQL, puis la boucle de surveillance de main.py.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List
+from aiohttp import web
+from core.config import settings
+from core.item_writer import ItemWriter
+from core.notifier import DiscordNotifier
+from core.scheduler import DomainScheduler, SearchScheduler
+from core.pricing import PriceStats
+from core.scraper import VintedScraper
+from core.spool import ItemSpool
+from main import make_search_handler, run_bot
+from .fake_discord import FakeDiscord
+from .fake_vinted import FakeVinted
+from .sqlite_storage import SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+
+async def _serve(app: web.Application) -> (web.AppRunner, int):
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "localhost", 0)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _scenario_rows(searches: int, queries: int, discord_url: str, rng: random.Random) -> Dict[str, List[Dict]]:
+    """Utilisateurs (5 recherches chacun), un webhook par utilisateur, recherches réparties sur `queries` textes"""
+    users = [{"id": f"user-{i}", "email": f"user{i}@bench.local"} for i in range(max(1, searches // 5))]
+    webhooks = [{"id": f"wh-{u['id']}", "url": f"{discord_url}/webhooks/{u['id']}", "userId": u["id"]} for u in users]
+    rows = []
+    for i in range(searches):
+        min_price = rng.choice([None, 0, 10, 20])
+        rows.append({
+            "id": f"search-{i}",
+            "minPrice": min_price,
+            "maxPrice": rng.choice([None, 50, 100, 200]),
+            "tags": "",
+            "searchText": f"requete {i % queries}",
+            "priority": rng.choice([0, 1, 1, 2]),
+            "userId": users[i % len(users)]["id"]
+        })
+    return {"users": users, "webhooks": webhooks, "searches": rows}
+
+
+async def run_scenario(args: argparse.Namespace, searches: int) -> Dict:
+    rng = random.Random(args.seed)
+    vinted = FakeVinted(
+        latency=args.api_latency,
+        error_rate=args.error_rate,
+        churn=args.churn,
+        backlog=args.backlog,
+        seed=args.seed,
+        rate_limit=args.vinted_limit
+    )
+    discord = FakeDiscord()
+    vinted_runner, vinted_port = await _serve(vinted.app())
+    discord_runner, discord_port = await _serve(discord.app())
+    vinted.base_url = f"http://localhost:{vinted_port}"
+
+    storage = SQLiteStorage(db_latency=args.db_latency)
+    await storage.connect()
+    queries = max(1, int(searches * args.distinct))
+    storage.seed(**_scenario_rows(searches, queries, f"http://localhost:{discord_port}", rng))
+
+    settings.MAX_CONCURRENT_REQUESTS = args.workers
+    runs: Dict[str, List[float]] = {}
+    started = time.monotonic()
+
+    prices = PriceStats()
+    try:
+        async with ItemSpool(args.spool) as spool, \
+                VintedScraper(base_url=vinted.base_url, rate=args.rate * settings.MAX_PAGES) as scraper, \
+                DiscordNotifier(on_delivered=spool.mark_notified) as notifier, \
+                ItemWriter(storage, spool, prices=prices):
+            handler = make_search_handler(storage, scraper, spool, prices=prices)
+
+            async def timed_handler(group: Dict):
+                runs.setdefault(group['search_item_id'], []).append(time.monotonic() - started)
+                return await handler(group)
+
+            scheduler = DomainScheduler(lambda domain: SearchScheduler(
+                timed_handler,
+                workers=args.workers,
+                rate=args.rate,
+                interval=args.interval,
+                jitter=settings.SCHEDULER_JITTER,
+                domain=domain,
+                adaptive=args.adaptive
+            ))
+            bot = asyncio.create_task(run_bot(storage, scraper, notifier, spool, scheduler, refresh_interval=args.interval))
+            await asyncio.sleep(args.duration)
+            bot.cancel()
+            await asyncio.gather(bot, return_exceptions=True)
+        elapsed = time.monotonic() - started
+
+        first_runs = sorted(times[0] for times in runs.values())
+        revisits = [b - a for times in runs.values() for a, b in zip(times, times[1:])]
+        latencies = discord.latencies(vinted.created)
+        return {
+            "searches": searches,
+            "requests": queries,
+            "coverage": len(first_runs) / queries,
+            "first_cycle_s": first_runs[-1] if len(first_runs) == queries else float("nan"),
+            "revisit_s": sum(revisits) / len(revisits) if revisits else float("nan"),
+            "items_per_s": storage.count_items() / elapsed,
+            "db_round_trips": storage.round_trips,
+            "api_requests": vinted.requests,
+            "api_429": vinted.rate_limited,
+            "cookie_requests": vinted.cookie_requests,
+            "webhook_messages": discord.messages,
+            "webhook_429": discord.rate_limited,
+            "notif_p50_s": _percentile(latencies, 0.50),
+            "notif_p99_s": _percentile(latencies, 0.99),
+        }
+    finally:
+        await storage.close()
+        await vinted_runner.cleanup()
+        await discord_runner.cleanup()
+
+
+def _print_report(results: List[Dict]):
+    columns = list(results[0])
+    widths = {c: max(len(c), 10) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for row in results:
+        cells = []
+        for c in columns:
+            value = row[c]
+            cells.append((f"{value:.2f}" if isinstance(value, float) else str(value)).rjust(widths[c]))
+        print("  ".join(cells))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Banc de performance du Bot FastVinted")
+    parser.add_argument("--searches", type=int, nargs="+", default=[10, 100, 1000], help="Nombre de SearchItem par scénario")
+    parser.add_argument("--duration", type=float, default=60, help="Durée de chaque scénario en secondes")
+    parser.add_argument("--distinct", type=float, default=0.5, help="Proportion de textes de recherche distincts")
+    parser.add_argument("--interval", type=float, default=10, help="Intervalle de passage d'une recherche en secondes")
+    parser.add_argument("--adaptive", action="store_true", help="Intervalles adaptatifs par niveau de priorité au lieu de --interval fixe")
+    parser.add_argument("--rate", type=float, default=50, help="Budget de requêtes Vinted par seconde")
+    parser.add_argument("--workers", type=int, default=16, help="Workers du planificateur")
+    parser.add_argument("--churn", type=float, default=0.2, help="Nouvelles annonces par seconde et par texte")
+    parser.add_argument("--backlog", type=int, default=10, help="Annonces déjà publiées à la première requête d'un texte")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="Latence moyenne du faux Vinted en secondes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses Vinted en erreur")
+    parser.add_argument("--vinted-limit", type=float, default=0, help="Débit soutenable du faux Vinted avant 429 (0 : illimité)")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="Latence simulée d'un aller-retour MySQL")
+    parser.add_argument("--spool", default=":memory:", help="Fichier du spool local (en mémoire par défaut)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    results = []
+    for searches in args.searches:
+        logger.warning(f"Scénario {searches} recherches ({args.duration:.0f}s)...")
+        results.append(await run_scenario(args, searches))
+    _print_report(results)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main())
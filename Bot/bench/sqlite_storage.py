@@ -0,0 +1,163 @@
+import asyncio
+import re
+import sqlite3
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from core.metrics import DB_QUERY_SECONDS
+from core.storage import VintedStorage
+
+SCHEMA = """
+CREATE TABLE User (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL
+);
+CREATE TABLE SearchItem (
+    id TEXT PRIMARY KEY,
+    maxPrice REAL,
+    minPrice REAL,
+    tags TEXT NOT NULL,
+    searchText TEXT NOT NULL,
+    domain TEXT NOT NULL DEFAULT 'fr',
+    priority INTEGER NOT NULL DEFAULT 1,
+    minInterval INTEGER,
+    maxInterval INTEGER,
+    minDiscount INTEGER,
+    createdAt TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updatedAt TEXT NOT NULL,
+    userId TEXT NOT NULL
+);
+CREATE TABLE Item (
+    id TEXT PRIMARY KEY,
+    vintedId INTEGER,
+    imageUrl TEXT NOT NULL,
+    name TEXT NOT NULL,
+    `condition` TEXT NOT NULL,
+    size TEXT NOT NULL,
+    price REAL NOT NULL,
+    sellerName TEXT NOT NULL,
+    url TEXT NOT NULL,
+    createdAt TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updatedAt TEXT NOT NULL,
+    searchItemId TEXT NOT NULL,
+    UNIQUE (vintedId, searchItemId)
+);
+CREATE INDEX Item_searchItemId_createdAt_idx ON Item (searchItemId, createdAt);
+CREATE INDEX Item_createdAt_idx ON Item (createdAt);
+CREATE TABLE DiscordWebhook (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    userId TEXT NOT NULL UNIQUE
+);
+CREATE TABLE BotWorker (
+    id TEXT PRIMARY KEY,
+    startedAt TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    heartbeatAt TEXT NOT NULL
+);
+CREATE TABLE SearchLease (
+    searchKey TEXT PRIMARY KEY,
+    workerId TEXT NOT NULL,
+    expiresAt TEXT NOT NULL
+);
+"""
+
+# Équivalences MySQL -> SQLite pour les requêtes de VintedStorage
+TRANSLATIONS = [
+    ("%s", "?"),
+    ("INSERT IGNORE", "INSERT OR IGNORE"),
+    ("NOW()", "CURRENT_TIMESTAMP"),
+    ("UUID()", "lower(hex(randomblob(16)))"),
+    # Sans cible, l'upsert porte sur n'importe quelle contrainte d'unicité de la table
+    ("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET"),
+]
+VALUES_FUNCTION = re.compile(r"\bVALUES\((\w+)\)")
+IF_FUNCTION = re.compile(r"\bIF\(")
+# Dates à la milliseconde (baux et heartbeats), comparables entre elles sous forme de texte
+NOW_INTERVAL = re.compile(r"NOW\(3\) ([+-]) INTERVAL \? SECOND")
+NOW_MILLIS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def translate(query: str) -> str:
+    for mysql, sqlite in TRANSLATIONS:
+        query = query.replace(mysql, sqlite)
+    query = NOW_INTERVAL.sub(r"strftime('%Y-%m-%d %H:%M:%f', 'now', '\1' || ? || ' seconds')", query)
+    query = query.replace("NOW(3)", NOW_MILLIS)
+    query = IF_FUNCTION.sub("iif(", query)
+    return VALUES_FUNCTION.sub(r"excluded.\1", query)
+
+
+class SQLiteCursor:
+    """Curseur asynchrone minimal imitant aiomysql.DictCursor au-dessus de sqlite3"""
+
+    def __init__(self, storage: "SQLiteStorage"):
+        self.storage = storage
+        self._cursor = storage.db.cursor()
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    async def _round_trip(self):
+        self.storage.round_trips += 1
+        if self.storage.db_latency:
+            await asyncio.sleep(self.storage.db_latency)
+
+    async def execute(self, query: str, params=()):
+        await self._round_trip()
+        self._cursor.execute(translate(query), tuple(params or ()))
+
+    async def executemany(self, query: str, params):
+        await self._round_trip()
+        self._cursor.executemany(translate(query), [tuple(p) for p in params])
+
+    async def fetchone(self) -> Optional[Dict]:
+        row = self._cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    async def fetchall(self) -> List[Dict]:
+        return [dict(row) for row in self._cursor.fetchall()]
+
+
+class SQLiteStorage(VintedStorage):
+    """VintedStorage sur une base SQLite en mémoire, qui compte les allers-retours et simule la latence MySQL"""
+
+    def __init__(self, db_latency: float = 0.0):
+        super().__init__()
+        self.db: Optional[sqlite3.Connection] = None
+        self.db_latency = db_latency
+        self.round_trips = 0
+
+    async def connect(self, **kwargs):
+        self.db = sqlite3.connect(":memory:", isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        # Fonctions MySQL absentes de SQLite
+        self.db.create_function("CRC32", 1, lambda value: zlib.crc32(str(value).encode("utf-8")), deterministic=True)
+        self.db.create_function("CONCAT_WS", -1, lambda separator, *values: separator.join(str(v) for v in values if v is not None), deterministic=True)
+        self.db.executescript(SCHEMA)
+
+    async def close(self):
+        if self.db:
+            self.db.close()
+            self.db = None
+
+    @asynccontextmanager
+    async def get_cursor(self, operation: str = "query") -> AsyncIterator[SQLiteCursor]:
+        if not self.db:
+            raise RuntimeError("Base SQLite non initialisée")
+        with DB_QUERY_SECONDS.time(operation=operation):
+            yield SQLiteCursor(self)
+
+    def seed(self, users: List[Dict], webhooks: List[Dict], searches: List[Dict]):
+        """Insère directement les données du scénario (non comptées comme allers-retours)"""
+        self.db.executemany("INSERT INTO User (id, email) VALUES (:id, :email)", users)
+        self.db.executemany("INSERT INTO DiscordWebhook (id, url, userId) VALUES (:id, :url, :userId)", webhooks)
+        self.db.executemany(
+            """
+            INSERT INTO SearchItem (id, maxPrice, minPrice, tags, searchText, priority, updatedAt, userId)
+            VALUES (:id, :maxPrice, :minPrice, :tags, :searchText, :priority, CURRENT_TIMESTAMP, :userId)
+            """,
+            searches
+        )
+
+    def count_items(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM Item").fetchone()[0]
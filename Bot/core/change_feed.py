@@ -0,0 +1,78 @@
+import aiohttp
+import asyncio
+import json
+import logging
+import random
+from typing import Dict, Optional
+from .metrics import CHANGE_FEED_EVENTS
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEARCH_EVENTS = ("created", "updated", "deleted")
+
+
+class ChangeFeed:
+    """
+    Abonnement au flux SSE des SearchItem exposé par l'Api. Chaque événement réveille
+    le rafraîchissement des recherches (`changed`) ; la base reste la source de vérité,
+    un événement perdu est rattrapé par la relecture de secours.
+    """
+
+    def __init__(self, url: str = settings.CHANGE_FEED_URL, api_key: Optional[str] = settings.PYTHON_API_KEY):
+        self.url = url
+        self.api_key = api_key
+        self.changed = asyncio.Event()
+        self.connected = False
+
+    async def _consume(self, session: aiohttp.ClientSession):
+        headers = {"Accept": "text/event-stream"}
+        if self.api_key:
+            headers["x-api-key"] = self.api_key
+        async with session.get(self.url, headers=headers) as response:
+            response.raise_for_status()
+            self.connected = True
+            logger.info(f"Flux des recherches connecté : {self.url}")
+            # Reconnexion : des modifications ont pu être manquées entre-temps
+            self.changed.set()
+
+            event: Dict[str, str] = {}
+            async for raw in response.content:
+                line = raw.decode("utf-8").rstrip("\r\n")
+                if not line:
+                    self._handle(event)
+                    event = {}
+                elif not line.startswith(":"):
+                    field, _, value = line.partition(":")
+                    event[field] = event.get(field, "") + value.lstrip(" ")
+
+    def _handle(self, event: Dict[str, str]):
+        event_type = event.get("event", "message")
+        if event_type not in SEARCH_EVENTS:
+            return
+        CHANGE_FEED_EVENTS.inc(type=event_type)
+        try:
+            search_id = json.loads(event.get("data") or "{}").get("id")
+        except ValueError:
+            search_id = None
+        logger.info(f"Recherche {search_id} : {event_type}")
+        self.changed.set()
+
+    async def run(self):
+        """Maintient l'abonnement jusqu'à annulation, avec reconnexion à backoff exponentiel"""
+        attempt = 0
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=settings.CHANGE_FEED_READ_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                try:
+                    await self._consume(session)
+                    attempt = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    attempt += 1
+                    logger.warning(f"Flux des recherches interrompu : {str(e)}")
+                finally:
+                    self.connected = False
+                await asyncio.sleep(random.uniform(0, min(60, 2 ** attempt)))
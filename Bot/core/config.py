@@ -1,5 +1,6 @@
 import os
-from typing import List, Dict
+import socket
+from typing import List, Dict, Tuple
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -26,8 +27,132 @@ class Settings:
         "viewport_size"
     ]
     
+    # Domaines Vinted pris en charge : extension -> (devise, Accept-Language)
+    # Doit rester aligné sur Api/src/search-items/vinted-domains.ts (liste servie au Front)
+    DEFAULT_DOMAIN: str = "fr"
+    VINTED_DOMAINS: Dict[str, Dict[str, str]] = {
+        "fr": {"currency": "EUR", "language": "fr-FR,fr;q=0.9"},
+        "be": {"currency": "EUR", "language": "fr-BE,fr;q=0.9,nl;q=0.8"},
+        "de": {"currency": "EUR", "language": "de-DE,de;q=0.9"},
+        "at": {"currency": "EUR", "language": "de-AT,de;q=0.9"},
+        "es": {"currency": "EUR", "language": "es-ES,es;q=0.9"},
+        "it": {"currency": "EUR", "language": "it-IT,it;q=0.9"},
+        "nl": {"currency": "EUR", "language": "nl-NL,nl;q=0.9"},
+        "lu": {"currency": "EUR", "language": "fr-LU,fr;q=0.9"},
+        "pt": {"currency": "EUR", "language": "pt-PT,pt;q=0.9"},
+        "lt": {"currency": "EUR", "language": "lt-LT,lt;q=0.9"},
+        "pl": {"currency": "PLN", "language": "pl-PL,pl;q=0.9"},
+        "cz": {"currency": "CZK", "language": "cs-CZ,cs;q=0.9"},
+        "co.uk": {"currency": "GBP", "language": "en-GB,en;q=0.9"},
+    }
+    DOMAIN_REQUESTS_PER_SECOND: float = 4.0  # Débit initial des appels API par domaine (pages et retries compris)
+    PROXY_REQUESTS_PER_SECOND: float = 1.0  # Débit initial des appels API par proxy et par domaine
+
+    # Limiteur adaptatif (AIMD) des appels Vinted
+    ADAPTIVE_MIN_RATE: float = 0.2  # Débit plancher après refus successifs
+    ADAPTIVE_MAX_RATE: float = 20.0  # Débit plafond atteint par augmentation additive
+    ADAPTIVE_RATE_STEP: float = 0.1  # Débit gagné par seconde de réponses saines
+    ADAPTIVE_MAX_CONCURRENCY: int = 16  # Appels simultanés au plus
+    BACKOFF_BASE: float = 2.0  # Premier palier de backoff après un 429/403 en secondes
+    BACKOFF_MAX: float = 300.0  # Plafond du backoff en secondes
+
     CHECK_INTERVAL: int = 200  # Intervalle de vérification en secondes
+
+    # Planificateur des recherches
+    SCHEDULER_WORKERS: int = 8  # Recherches traitées en parallèle
+    REQUESTS_PER_SECOND: float = 2.0  # Budget de recherches lancées par seconde et par domaine
+    SCHEDULER_JITTER: float = 0.1  # Variation aléatoire des échéances (fraction de l'intervalle)
+    MAX_CONCURRENT_REQUESTS: int = 4  # Appels API Vinted simultanés au démarrage (ajusté ensuite)
+    CONFIG_REFRESH_INTERVAL: int = 60  # Relecture des SearchItem en secondes
+
+    # Niveaux de priorité : bornes (min, max) de l'intervalle adaptatif en secondes
+    PRIORITY_INTERVALS: Dict[int, Tuple[int, int]] = {
+        0: (300, 3600),  # Basse : recherches dormantes
+        1: (60, 900),  # Normale
+        2: (10, 120),  # Haute : bonnes affaires qui partent vite
+    }
+    DEFAULT_PRIORITY: int = 1
+    MIN_POLL_INTERVAL: int = 10  # Plancher absolu, même si l'utilisateur demande moins
+    TARGET_NEW_PER_POLL: float = 1.0  # Nouvelles annonces visées par passage
+
+    # Flux SSE des modifications de recherches exposé par l'Api (vide pour le désactiver)
+    CHANGE_FEED_URL: str = os.getenv("CHANGE_FEED_URL", "")  # ex. http://api:4200/python-integration/search-items/events
+    PYTHON_API_KEY: str = os.getenv("PYTHON_API_KEY", "")
+    CHANGE_FEED_READ_TIMEOUT: int = 45  # Silence maximal du flux (ping toutes les 15 s) en secondes
+    CHANGE_FEED_FALLBACK_INTERVAL: int = 600  # Relecture de secours des SearchItem quand le flux est connecté
+
+    # Répartition des recherches entre plusieurs instances
+    SHARDING: bool = os.getenv("BOT_SHARDING", "0") == "1"
+    WORKER_ID: str = os.getenv("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+    HEARTBEAT_INTERVAL: int = 10  # Heartbeat et renouvellement des baux en secondes
+
+    # Endpoint Prometheus (0 pour le désactiver)
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")  # 0.0.0.0 pour exposer /metrics hors de la machine
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", 9108))
+    COOKIE_TTL: int = 1800  # Durée de réutilisation des cookies Vinted en secondes
+
+    # Pagination incrémentale
+    MAX_PER_PAGE: int = 96  # Taille de page maximale acceptée par Vinted
+    MIN_PER_PAGE: int = 10  # Taille de page pour les recherches calmes
+    MAX_PAGES: int = 3  # Pages lues au plus quand toute une page est nouvelle
+
+    # Cache de déduplication
+    SEEN_CACHE_SIZE: int = 200_000  # Nombre maximum d'identifiants Vinted gardés en mémoire
+    SEEN_CACHE_TTL: int = 7 * 24 * 3600  # Durée de vie d'une entrée en secondes
     
     USE_PROXIES: bool = False
 
+    # Détection des republications par hash perceptuel des vignettes (nécessite Pillow)
+    REPOST_DETECTION: bool = os.getenv("BOT_REPOST_DETECTION", "0") == "1"
+    REPOST_INDEX_PATH: str = os.getenv("REPOST_INDEX_PATH", "data/image_hashes.bin")
+    REPOST_WINDOW: int = 14 * 24 * 3600  # Ancienneté maximale d'une annonce d'origine en secondes
+    REPOST_MAX_DISTANCE: int = 6  # Bits différents tolérés entre deux dHash de 64 bits
+    REPOST_FETCH_CONCURRENCY: int = 16  # Téléchargements de vignettes simultanés
+    REPOST_FETCH_TIMEOUT: float = 5.0  # Délai maximal d'un téléchargement en secondes
+    REPOST_HASH_WORKERS: int = 2  # Processus de calcul des hashes
+
+    # Instantané de l'état (cookies, proxies, points de reprise, échéances, cache des vus) pour un redémarrage à chaud
+    SNAPSHOT_PATH: str = os.getenv("SNAPSHOT_PATH", "data/state.bin")  # Vide pour désactiver
+    SNAPSHOT_INTERVAL: int = 60  # Écriture périodique en secondes (et à l'arrêt)
+    SNAPSHOT_PRICE_KEYS: int = 20_000  # Clés de prix les plus récemment alimentées gardées dans l'instantané
+
+    # Prix habituel par recherche (et par marque/taille) pour repérer les bonnes affaires
+    PRICE_WINDOW: int = 128  # Derniers prix gardés par clé
+    PRICE_MIN_SAMPLES: int = 20  # Prix nécessaires avant de comparer à une clé
+    PRICE_MAX_KEYS: int = 50_000  # Clés (recherche, marque, taille) gardées en mémoire
+    PRICE_BOOTSTRAP_ROWS: int = 200_000  # Item relus au démarrage sans instantané
+    DEAL_GOOD_DISCOUNT: float = 30.0  # % sous le prix habituel pour un embed vert
+    DEAL_FAIR_DISCOUNT: float = 10.0  # % sous le prix habituel pour un embed orange
+
+    # Spool local : les nouvelles annonces y sont validées avant notification et écriture MySQL
+    SPOOL_PATH: str = os.getenv("SPOOL_PATH", "data/spool.db")
+    SPOOL_BATCH_SIZE: int = 200  # Annonces relues par lot pour la notification
+    SPOOL_PURGE_INTERVAL: int = 60  # Suppression des lignes traitées en secondes
+
+    # Écriture différée des Item (depuis le spool)
+    WRITE_BATCH_SIZE: int = 500  # Lignes par INSERT multi-lignes
+    WRITE_FLUSH_INTERVAL: float = 5.0  # Attente maximale d'une annonce avant écriture en secondes
+    WRITE_RETRY_MAX: float = 60.0  # Plafond de l'attente entre deux tentatives d'écriture en secondes
+    WRITE_MAX_ATTEMPTS: int = 5  # Refus d'une annonce par une base joignable avant abandon (dead letter)
+    WRITE_DRAIN_TIMEOUT: int = 30  # Attente maximale du vidage du spool à l'arrêt en secondes
+
+    # Notifications Discord
+    NOTIFIER_WORKERS: int = 4  # Requêtes Discord simultanées, tous webhooks confondus
+    NOTIFIER_QUEUE_SIZE: int = 1000  # Envois en attente avant de bloquer les recherches
+    NOTIFIER_DRAIN_TIMEOUT: int = 30  # Attente maximale des files à l'arrêt en secondes
+    WEBHOOK_RATE: float = 0.5  # Messages par seconde et par webhook (30/min côté Discord)
+    WEBHOOK_BURST: int = 5  # Rafale autorisée par webhook
+    WEBHOOK_MAX_ATTEMPTS: int = 5  # Tentatives par message
+    EMBED_LINGER: float = 2.0  # Attente maximale avant l'envoi d'un lot incomplet en secondes
+    WEBHOOK_ROUTES_TTL: int = 300  # Durée du cache recherche -> webhooks en secondes (relu aussi quand DiscordWebhook change)
+    UNROUTED_MAX_AGE: int = 3600  # Attente d'un webhook pour les annonces d'une recherche qui n'en a pas, en secondes
+
+    # Contrôle des proxies
+    PROXY_TEST_URL: str = os.getenv("PROXY_TEST_URL", "https://httpbin.org/ip")
+    PROXY_PROBE_INTERVAL: int = 120  # Délai entre deux campagnes de tests en secondes
+    PROXY_PROBE_CONCURRENCY: int = 50  # Tests de proxies simultanés
+    PROXY_COOLDOWN: int = 60  # Quarantaine après un premier échec en secondes
+    PROXY_SCORE_DECAY: float = 0.8  # Poids de l'historique dans le score d'un proxy
+    PROXY_WARMUP_TIMEOUT: int = 30  # Attente maximale du premier proxy sain au démarrage
+
 settings = Settings()
\ No newline at end of file
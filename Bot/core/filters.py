@@ -0,0 +1,116 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
+from .listing import ListingRecord
+
+# Préfixes reconnus dans les tags d'une recherche ; un tag sans préfixe est un mot-clé à inclure
+EXCLUDE_PREFIX = "-"
+BRAND_PREFIX = "brand:"
+SIZE_PREFIX = "size:"
+CONDITION_PREFIX = "condition:"
+
+SIZE_SEPARATORS = re.compile(r"[\s/,]+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Minuscules sans accents, pour comparer titres, marques et tags"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _any_of(words: FrozenSet[str]) -> Optional[Pattern]:
+    """Une seule expression pour tous les mots-clés (les plus longs d'abord)"""
+    if not words:
+        return None
+    return re.compile("|".join(re.escape(word) for word in sorted(words, key=len, reverse=True)))
+
+
+class SearchFilter:
+    """
+    Filtre compilé d'une recherche : fourchette de prix, mots-clés à inclure (l'un d'eux)
+    ou à exclure (aucun) dans le titre et la marque, et listes de marques, tailles et états
+    acceptés. Les tags `-mot`, `brand:x`, `size:x` et `condition:x` alimentent ces critères.
+    """
+
+    __slots__ = ("min_price", "max_price", "include", "exclude", "brands", "sizes", "conditions")
+
+    def __init__(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        include: FrozenSet[str] = frozenset(),
+        exclude: FrozenSet[str] = frozenset(),
+        brands: FrozenSet[str] = frozenset(),
+        sizes: FrozenSet[str] = frozenset(),
+        conditions: FrozenSet[str] = frozenset()
+    ):
+        self.min_price = min_price
+        self.max_price = max_price
+        self.include = _any_of(include)
+        self.exclude = _any_of(exclude)
+        self.brands = brands
+        self.sizes = sizes
+        self.conditions = _any_of(conditions)
+
+    def matches(self, item: ListingRecord, text: str, brand: str, sizes: FrozenSet[str], condition: str) -> bool:
+        """Teste une annonce dont les champs texte ont déjà été normalisés (une fois pour tout le lot)"""
+        if self.min_price is not None and item.price < self.min_price:
+            return False
+        if self.max_price is not None and item.price > self.max_price:
+            return False
+        if self.brands and brand not in self.brands:
+            return False
+        if self.sizes and not (self.sizes & sizes):
+            return False
+        if self.conditions and not self.conditions.search(condition):
+            return False
+        if self.exclude and self.exclude.search(text):
+            return False
+        return self.include is None or self.include.search(text) is not None
+
+
+@lru_cache(maxsize=4096)
+def _compile(tags: Tuple[str, ...], min_price: Optional[float], max_price: Optional[float]) -> SearchFilter:
+    criteria: Dict[str, set] = {"include": set(), "exclude": set(), "brands": set(), "sizes": set(), "conditions": set()}
+    for raw in tags:
+        tag = normalize_text(raw.strip())
+        if tag.startswith(EXCLUDE_PREFIX):
+            key, value = "exclude", tag[len(EXCLUDE_PREFIX):]
+        elif tag.startswith(BRAND_PREFIX):
+            key, value = "brands", tag[len(BRAND_PREFIX):]
+        elif tag.startswith(SIZE_PREFIX):
+            key, value = "sizes", tag[len(SIZE_PREFIX):]
+        elif tag.startswith(CONDITION_PREFIX):
+            key, value = "conditions", tag[len(CONDITION_PREFIX):]
+        else:
+            key, value = "include", tag
+        value = value.strip()
+        if value:
+            criteria[key].add(value)
+    return SearchFilter(min_price, max_price, **{key: frozenset(values) for key, values in criteria.items()})
+
+
+def compile_filter(config: Dict) -> SearchFilter:
+    """Filtre d'une configuration de recherche ; les configurations identiques partagent le même filtre"""
+    return _compile(tuple(config.get('tags') or ()), config.get('min_price'), config.get('max_price'))
+
+
+def filter_batch(filters: List[Tuple[str, SearchFilter]], items: List[ListingRecord]) -> List[ListingRecord]:
+    """
+    Applique les filtres de plusieurs recherches à un lot d'annonces : les champs texte
+    de chaque annonce sont normalisés une seule fois, puis testés contre chaque filtre.
+    Retourne une copie de l'annonce par recherche satisfaite.
+    """
+    routed = []
+    for item in items:
+        text = normalize_text(f"{item.title} {item.brand or ''}")
+        brand = normalize_text(item.brand)
+        sizes = frozenset(SIZE_SEPARATORS.split(normalize_text(item.size))) - {""}
+        condition = normalize_text(item.status)
+        for search_item_id, search_filter in filters:
+            if search_filter.matches(item, text, brand, sizes, condition):
+                routed.append(item.routed(search_item_id))
+    return routed
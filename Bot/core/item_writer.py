@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+from .listing import ListingRecord
+from .storage import VintedStorage
+from .spool import ItemSpool
+from .pricing import PriceStats
+from .metrics import ITEMS_WRITTEN
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ItemWriter:
+    """
+    Écriture différée des Item : une tâche de fond relit le spool local toutes les
+    `flush_interval` secondes et écrit ce qui n'est pas encore en base par gros INSERT
+    multi-lignes. Une panne MySQL ne ralentit pas les recherches : les annonces restent
+    dans le spool et l'écriture est retentée jusqu'au retour de la base. Si la base répond
+    mais refuse un lot, les annonces en cause sont isolées et écartées (dead letter) quand
+    leur recherche n'existe plus ou après `max_attempts` refus, pour ne pas bloquer les autres.
+    """
+
+    def __init__(
+        self,
+        storage: VintedStorage,
+        spool: ItemSpool,
+        batch_size: int = settings.WRITE_BATCH_SIZE,
+        flush_interval: float = settings.WRITE_FLUSH_INTERVAL,
+        retry_max: float = settings.WRITE_RETRY_MAX,
+        max_attempts: int = settings.WRITE_MAX_ATTEMPTS,
+        prices: Optional[PriceStats] = None
+    ):
+        """
+        :param storage: Stockage MySQL cible
+        :param spool: Spool local d'où proviennent les annonces
+        :param batch_size: Lignes par écriture
+        :param flush_interval: Délai entre deux relectures du spool (secondes)
+        :param retry_max: Plafond du backoff entre deux tentatives (secondes)
+        :param max_attempts: Refus d'une annonce par une base joignable avant abandon
+        :param prices: Statistiques de prix alimentées par les annonces écrites
+        """
+        self.storage = storage
+        self.spool = spool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_max = retry_max
+        self.max_attempts = max_attempts
+        self.prices = prices
+        self._task: Optional[asyncio.Task] = None
+        self._purged_at = time.monotonic()
+        self._failures: Dict[int, int] = {}  # seq -> refus de l'annonce seule
+
+    @property
+    def pending(self) -> int:
+        """Annonces en attente d'écriture"""
+        return self.spool.to_store
+
+    async def _save(self, rows: List[Tuple[int, ListingRecord]]):
+        # L'upsert rend la réécriture d'un lot (reprise après arrêt) sans effet
+        items = [item for _, item in rows]
+        await self.storage.batch_save(items)
+        seqs = [seq for seq, _ in rows]
+        await self.spool.mark_stored(seqs)
+        ITEMS_WRITTEN.inc(len(rows), result="ok")
+        if self._failures:
+            for seq in seqs:
+                self._failures.pop(seq, None)
+        if self.prices:
+            self.prices.observe(items)
+
+    async def _isolate(self, rows: List[Tuple[int, ListingRecord]]) -> List[Tuple[int, ListingRecord]]:
+        """Écrit ce qui passe d'un lot refusé en le coupant en deux ; retourne les annonces refusées seules"""
+        try:
+            await self._save(rows)
+            return []
+        except Exception as e:
+            if len(rows) == 1:
+                logger.warning(f"Item {rows[0][1].id} refusé par la base : {str(e)}")
+                return rows
+        middle = len(rows) // 2
+        return await self._isolate(rows[:middle]) + await self._isolate(rows[middle:])
+
+    async def _drop(self, rows: List[Tuple[int, ListingRecord]], reason: str):
+        await self.spool.mark_dead([seq for seq, _ in rows])
+        for seq, _ in rows:
+            self._failures.pop(seq, None)
+        ITEMS_WRITTEN.inc(len(rows), result="dropped")
+        logger.error(f"{len(rows)} items abandonnés ({reason}) : {', '.join(str(item.id) for _, item in rows)}")
+
+    async def _triage(self, rows: List[Tuple[int, ListingRecord]]) -> Optional[int]:
+        """
+        Traite un lot refusé : retourne None si la base est injoignable (tout le lot attend),
+        sinon écarte les annonces de recherches supprimées, écrit le reste par moitiés et
+        retourne le nombre d'annonces encore refusées
+        """
+        try:
+            search_ids = await self.storage.get_search_ids()
+        except Exception:
+            return None
+        orphans = [row for row in rows if row[1].search_item_id not in search_ids]
+        if orphans:
+            await self._drop(orphans, "recherche supprimée")
+        rejected = await self._isolate([row for row in rows if row[1].search_item_id in search_ids])
+        exhausted = []
+        for seq, item in rejected:
+            self._failures[seq] = self._failures.get(seq, 0) + 1
+            if self._failures[seq] >= self.max_attempts:
+                exhausted.append((seq, item))
+        if exhausted:
+            await self._drop(exhausted, f"refusés {self.max_attempts} fois")
+        return len(rejected) - len(exhausted)
+
+    async def flush(self):
+        """Écrit tout ce que le spool contient, par lots de `batch_size`, en réessayant tant que la base est injoignable"""
+        attempt = 0
+        while True:
+            rows = await self.spool.claim_writes(self.batch_size)
+            if not rows:
+                break
+            try:
+                await self._save(rows)
+                attempt = 0
+                continue
+            except Exception as e:
+                error = e
+            retried = await self._triage(rows)
+            if retried == 0:
+                attempt = 0
+                continue
+            attempt += 1
+            ITEMS_WRITTEN.inc(retried or len(rows), result="retried")
+            delay = random.uniform(0, min(self.retry_max, 2 ** attempt))
+            if retried is None:
+                logger.warning(f"Écriture de {len(rows)} items échouée ({self.pending} en attente), nouvel essai dans {delay:.1f}s : {str(error)}")
+            else:
+                logger.warning(f"{retried} items refusés par la base, nouvel essai dans {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        if time.monotonic() - self._purged_at >= settings.SPOOL_PURGE_INTERVAL:
+            self._purged_at = time.monotonic()
+            purged = await self.spool.purge()
+            if purged:
+                logger.debug(f"{purged} lignes traitées retirées du spool")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur du spool lors de l'écriture : {str(e)}")
+
+    async def start(self):
+        """Lance la tâche d'écriture"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = settings.WRITE_DRAIN_TIMEOUT):
+        """Arrête la tâche de fond puis vide le spool (dans la limite de `timeout`)"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+            logger.info(f"Spool écrit en base en {time.monotonic() - started:.1f}s")
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.pending} items restent dans le spool, écrits au prochain démarrage")
+
+    # Gestionnaire de contexte asynchrone
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
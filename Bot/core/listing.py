@@ -0,0 +1,140 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from .metrics import LISTINGS_MALFORMED
+
+try:
+    import orjson
+except ImportError:  # Dépendance optionnelle : le module json standard suffit
+    orjson = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+THUMBNAIL_TYPE = "thumb150x210"
+
+
+def _thumbnail_url(photo: Dict[str, Any]) -> Optional[str]:
+    """Plus petite vignette utile de la photo principale (à défaut, la photo elle-même)"""
+    thumbnails = photo.get('thumbnails') or []
+    for thumbnail in thumbnails:
+        if thumbnail.get('type') == THUMBNAIL_TYPE:
+            return thumbnail.get('url')
+    return photo.get('url') or None
+
+
+class ListingRecord:
+    """
+    Annonce Vinted réduite aux champs utilisés par le bot (déduplication, routage,
+    stockage, notification). Construite une seule fois à la lecture de la réponse API ;
+    le dict d'origine n'est pas conservé.
+    """
+
+    __slots__ = (
+        "id", "title", "price", "currency", "brand", "size", "status", "url",
+        "photo_url", "thumbnail_url", "photo_timestamp", "seller_login", "seller_url", "seller_rating",
+        "search_item_id", "typical_price", "discount"
+    )
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        price: float,
+        currency: str,
+        url: str,
+        brand: Optional[str] = None,
+        size: Optional[str] = None,
+        status: Optional[str] = None,
+        photo_url: Optional[str] = None,
+        thumbnail_url: Optional[str] = None,
+        photo_timestamp: Optional[float] = None,
+        seller_login: Optional[str] = None,
+        seller_url: Optional[str] = None,
+        seller_rating: Optional[float] = None,
+        search_item_id: Optional[str] = None,
+        typical_price: Optional[float] = None,
+        discount: Optional[float] = None
+    ):
+        self.id = id
+        self.title = title
+        self.price = price
+        self.currency = currency
+        self.url = url
+        self.brand = brand
+        self.size = size
+        self.status = status
+        self.photo_url = photo_url
+        self.thumbnail_url = thumbnail_url
+        self.photo_timestamp = photo_timestamp
+        self.seller_login = seller_login
+        self.seller_url = seller_url
+        self.seller_rating = seller_rating
+        self.search_item_id = search_item_id
+        self.typical_price = typical_price  # Médiane des prix de la recherche (voir PriceStats)
+        self.discount = discount  # % sous le prix habituel
+
+    @classmethod
+    def from_api(cls, item: Dict[str, Any], base_url: str) -> "ListingRecord":
+        """Extrait une annonce du catalogue ; KeyError/TypeError/ValueError si elle est malformée"""
+        price = item['price']
+        photo = item.get('photo') or {}
+        user = item.get('user') or {}
+        return cls(
+            id=int(item['id']),
+            title=str(item['title']),
+            price=float(price['amount']),
+            currency=price.get('currency_code') or "EUR",
+            url=item.get('url') or f"{base_url}{item['path']}",
+            brand=item.get('brand_title') or None,
+            size=item.get('size_title') or None,
+            status=item.get('status') or None,
+            photo_url=photo.get('full_size_url') or photo.get('url') or None,
+            thumbnail_url=_thumbnail_url(photo),
+            photo_timestamp=(photo.get('high_resolution') or {}).get('timestamp'),
+            seller_login=user.get('login') or None,
+            seller_url=user.get('profile_url') or None,
+            seller_rating=user.get('feedback_reputation')
+        )
+
+    def routed(self, search_item_id: str) -> "ListingRecord":
+        """Copie de l'annonce attribuée à une autre recherche"""
+        copy = ListingRecord.__new__(ListingRecord)
+        for name in self.__slots__:
+            setattr(copy, name, getattr(self, name))
+        copy.search_item_id = search_item_id
+        return copy
+
+    def pack(self) -> bytes:
+        """Sérialisation JSON des champs renseignés (relisible après ajout ou retrait d'un champ)"""
+        values = {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+        return orjson.dumps(values) if orjson else json.dumps(values).encode("utf-8")
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "ListingRecord":
+        values = orjson.loads(data) if orjson else json.loads(data)
+        return cls(**{name: value for name, value in values.items() if name in cls.__slots__})
+
+    def __repr__(self) -> str:
+        return f"ListingRecord(id={self.id}, title={self.title!r}, price={self.price} {self.currency})"
+
+
+def parse_catalog(body: bytes, base_url: str) -> List[ListingRecord]:
+    """
+    Décode une réponse de /catalog/items (orjson s'il est installé) et extrait ses annonces
+    en un seul passage. Une annonce malformée est écartée et comptée ; une réponse
+    illisible lève ValueError.
+    """
+    data = orjson.loads(body) if orjson else json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("Réponse catalogue inattendue")
+
+    records = []
+    for item in data.get('items') or []:
+        try:
+            records.append(ListingRecord.from_api(item, base_url))
+        except (KeyError, TypeError, ValueError) as e:
+            LISTINGS_MALFORMED.inc()
+            logger.warning(f"Annonce malformée ignorée ({type(e).__name__}: {e}) : {str(item)[:200]}")
+    return records
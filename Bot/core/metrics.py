@@ -0,0 +1,212 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from aiohttp import web
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base commune : nom, aide, noms de labels"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def remove(self, **labels):
+        """Supprime la série de ces labels (objet surveillé disparu)"""
+        self.values.pop(self._key(labels), None)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self.functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """Valeur calculée au moment de la lecture"""
+        self.functions[self._key(labels)] = function
+
+    def remove(self, **labels):
+        super().remove(**labels)
+        self.functions.pop(self._key(labels), None)
+
+    def _samples(self) -> List[str]:
+        values = dict(self.values)
+        for key, function in self.functions.items():
+            try:
+                values[key] = function()
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple[str, ...], List[float]] = {}  # compteurs par bucket, puis +Inf, somme
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def remove(self, **labels):
+        self.series.pop(self._key(labels), None)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Mesure la durée du bloc"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, series in self.series.items():
+            bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, series):
+                labels = _format_labels(self.labels, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_count{labels} {series[-2]}")
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registre des métriques du Bot, rendu au format texte Prometheus"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# Récupération Vinted
+FETCH_SECONDS = metrics.histogram("vinted_fetch_seconds", "Durée de récupération d'une recherche (toutes pages)", ["search"])
+API_REQUESTS = metrics.counter("vinted_api_requests_total", "Appels à l'API catalogue par domaine et statut HTTP", ["domain", "status"])
+LISTINGS_MALFORMED = metrics.counter("vinted_listings_malformed_total", "Annonces du catalogue écartées car malformées")
+ITEMS_FETCHED = metrics.counter("vinted_items_fetched_total", "Annonces renvoyées par Vinted après point de reprise")
+ITEMS_NEW = metrics.counter("vinted_items_new_total", "Annonces jamais vues après déduplication")
+API_THROTTLED = metrics.counter("vinted_api_throttled_total", "Refus de Vinted (429, 403) par domaine et statut", ["domain", "status"])
+API_LIMIT = metrics.gauge("vinted_api_limit", "Débit (appels/s) et concurrence du limiteur adaptatif par domaine", ["domain", "kind"])
+SEARCH_RUNS = metrics.counter("scheduler_search_runs_total", "Passages de recherches (ou groupes) par résultat", ["result"])
+CHANGE_FEED_EVENTS = metrics.counter("change_feed_events_total", "Événements SearchItem reçus de l'Api par type", ["type"])
+SCHEDULER_INTERVAL = metrics.histogram(
+    "scheduler_interval_seconds", "Intervalle adapté choisi après chaque passage", ["domain"],
+    buckets=(5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+SCHEDULER_PENDING = metrics.gauge("scheduler_pending", "Recherches prêtes en attente d'un worker", ["domain"])
+
+# Déduplication et base
+DEDUP_LOOKUPS = metrics.counter("dedup_lookups_total", "Résultat des vérifications de doublons", ["source"])
+ITEMS_WRITTEN = metrics.counter("items_written_total", "Items écrits en base par résultat", ["result"])
+SPOOL_PENDING = metrics.gauge("spool_pending_items", "Annonces du spool local en attente par étape (notify, store)", ["stage"])
+IMAGES_HASHED = metrics.counter("images_hashed_total", "Vignettes hashées pour la détection des republications par résultat", ["result"])
+PRICE_SCORES = metrics.counter("price_scores_total", "Annonces comparées au prix habituel de leur recherche par résultat", ["result"])
+DEALS_FILTERED = metrics.counter("deals_filtered_total", "Annonces non notifiées car sous le seuil de remise de leur recherche")
+REPOSTS_SUPPRESSED = metrics.counter("reposts_suppressed_total", "Annonces écartées comme republications d'une annonce récente")
+DB_QUERY_SECONDS = metrics.histogram("db_query_seconds", "Durée des accès MySQL par opération, attente du pool exclue", ["operation"])
+DB_POOL_WAIT_SECONDS = metrics.histogram("db_pool_wait_seconds", "Attente d'une connexion libre du pool MySQL par opération", ["operation"])
+
+# Proxies
+PROXY_REQUESTS = metrics.counter("proxy_requests_total", "Requêtes via proxy par résultat", ["result"])
+PROXY_POOL = metrics.gauge("proxy_pool", "Proxies par état", ["state"])
+
+# Discord
+WEBHOOK_SEND_SECONDS = metrics.histogram("webhook_send_seconds", "Durée d'un envoi de message webhook")
+WEBHOOK_MESSAGES = metrics.counter("webhook_messages_total", "Messages webhook par résultat", ["result"])
+WEBHOOK_RATE_LIMITED = metrics.counter("webhook_rate_limited_total", "Réponses 429 de Discord")
+NOTIFIER_QUEUE_DEPTH = metrics.gauge("notifier_queue_depth", "Messages en attente d'envoi")
+
+
+async def serve_metrics(host: str, port: int) -> web.AppRunner:
+    """Expose /metrics sur la boucle d'événements courante"""
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Métriques exposées sur http://{host}:{port}/metrics")
+    return runner
@@ -1,166 +1,333 @@
-import aiohttp
+from collections import deque
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Deque, List, Dict, Optional, Set, Tuple
 import asyncio
-import logging
-import random
 import time
-from typing import List, Dict, Optional
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+import logging
 from .proxy_manager import ProxyManager
+from .listing import ListingRecord
+from .rate_limiter import TokenBucket, parse_retry_after
+from .metrics import NOTIFIER_QUEUE_DEPTH, WEBHOOK_MESSAGES, WEBHOOK_RATE_LIMITED, WEBHOOK_SEND_SECONDS
+from core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class VintedScraper:
-    def __init__(self, domain: str = "fr"):
-        self.base_url = f"https://www.vinted.{domain}"
-        self.api_url = f"{self.base_url}/api/v2"
-        self.user_agents = [
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36"
-        ]
-        self.cookies = {}
-        self.semaphore = asyncio.Semaphore(2)
-        self.retry_count = 3
-        self.proxy_manager = ProxyManager() if settings.USE_PROXIES else None
-
-    async def _create_session(self, proxy: Optional[str] = None) -> aiohttp.ClientSession:
-        conn = aiohttp.TCPConnector(ssl=False, limit=10, force_close=True)
-        return aiohttp.ClientSession(
-            connector=conn,
-            cookies=self.cookies,
-            headers={
-                'User-Agent': random.choice(self.user_agents),
-                'Accept': 'application/json',
-                'Accept-Language': 'fr-FR,fr;q=0.9',
-                'Referer': f'{self.base_url}/',
-                'DNT': '1'
-            }
-        )
+# Limites d'un message webhook Discord
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_EMBED_CHARS = 6000
+# Réponses signifiant que le webhook n'existe plus (supprimé ou jeton révoqué)
+WEBHOOK_GONE_STATUSES = (401, 404)
 
-    async def _fetch_cookies(self, session: aiohttp.ClientSession, proxy: Optional[str] = None) -> bool:
-        """Récupère les cookies initiaux en passant par le proxy si activé"""
-        try:
-            async with session.get(self.base_url, timeout=10) as response:
-                self.cookies = {key: value.value for key, value in response.cookies.items()}
-                return True
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des cookies : {str(e)}")
-            return False
-
-    async def fetch(self, search_config: Dict) -> List[Dict]:
-        params = {
-            "page": 1,
-            "per_page": 96,
-            "search_text": search_config['search_text'],
-            "price_to": search_config.get('max_price', 1000),
-            "price_from": search_config.get('min_price', 0),
-            "order": "newest_first",
-            "currency": "EUR",
-            "time": int(time.time()),
-        }
 
-        for attempt in range(self.retry_count):
-            proxy = await self.proxy_manager.get_proxy() if self.proxy_manager else None
-            if settings.USE_PROXIES and not proxy:
-                logger.error("Aucun proxy disponible alors que USE_PROXIES est activé")
-                return []
+def _embed_length(embed: dict) -> int:
+    """Nombre de caractères comptés par Discord dans la limite totale des embeds"""
+    size = len(embed.get("title", "")) + len(embed.get("description", ""))
+    size += len(embed.get("footer", {}).get("text", "")) + len(embed.get("author", {}).get("name", ""))
+    for field in embed.get("fields", []):
+        size += len(field.get("name", "")) + len(field.get("value", ""))
+    return size
 
-            session = await self._create_session(proxy)
-            try:
-                # 1. Cookies init
-                if not await self._fetch_cookies(session, proxy):
-                    raise RuntimeError("Récupération cookies échouée")
-
-                # 2. APPEL API
-                async with self.semaphore:
-                    request_params = {
-                        "url": f"{self.api_url}/catalog/items",
-                        "params": params,
-                        "timeout": aiohttp.ClientTimeout(total=15)
-                    }
-                    if settings.USE_PROXIES and proxy:
-                        request_params["proxy"] = proxy
-
-                    async with session.get(**request_params) as response:
-                        if response.status == 401:
-                            logger.warning("Session expirée - Tentative de renouvellement (HTTP 401)")
-                            raise RuntimeError("Session expirée")
-                        response.raise_for_status()
-                        data = await response.json()
-                        items = data.get('items', [])
-                        for item in items:
-                            item['search_item_id'] = search_config['search_item_id']
-                        await session.close()
-                        return items
 
-            except Exception as e:
-                logger.warning(f"Tentative {attempt+1}/{self.retry_count} échouée avec proxy : {proxy} - {e}")
-                await session.close()
-                if self.proxy_manager and proxy:
-                    self.proxy_manager.remove_proxy(proxy)
+def _price_text(item: ListingRecord) -> str:
+    """Prix de l'annonce, comparé au prix habituel de sa recherche s'il est connu"""
+    text = f"{item.price:.2f} {item.currency}"
+    if item.discount is None:
+        return text
+    if item.discount > 0:
+        return f"{text}\n📉 {item.discount:.0f} % sous le prix habituel ({item.typical_price:.2f})"
+    return f"{text}\n📈 {-item.discount:.0f} % au-dessus du prix habituel ({item.typical_price:.2f})"
 
-        logger.error("Échec après plusieurs tentatives.")
-        return []
 
-    # context manager support
-    async def __aenter__(self):
-        return self
+def _deal_color(item: ListingRecord) -> int:
+    """Vert pour une bonne affaire, orange pour un prix correct, rouge sinon"""
+    if item.discount is None:
+        # Sans historique de prix pour la recherche : barème fixe
+        return 0x00ff00 if item.price < 20 else (0xff9900 if item.price < 50 else 0xff0000)
+    if item.discount >= settings.DEAL_GOOD_DISCOUNT:
+        return 0x00ff00
+    return 0xff9900 if item.discount >= settings.DEAL_FAIR_DISCOUNT else 0xff0000
 
-    async def __aexit__(self, exc_type, exc, tb):
-        pass
 
+class EmbedBatch:
+    """Embeds en attente d'envoi pour un webhook"""
 
-from datetime import datetime
-from typing import List, Dict, Optional
-import asyncio
-from aiohttp import ClientSession
-import logging
-from .proxy_manager import ProxyManager
-from core.config import settings
+    def __init__(self, webhook_name: str):
+        self.webhook_name = webhook_name
+        self.embeds: List[dict] = []
+        self.item_ids: List[int] = []
+        self.size = 0
+        self.timer: Optional[asyncio.Task] = None
+
+
+class WebhookQueue:
+    """Messages en attente pour un webhook, envoyés dans l'ordre par une seule tâche"""
+
+    def __init__(self):
+        self.pending: Deque[tuple] = deque()  # (nom du webhook, payload, identifiants des annonces)
+        self.task: Optional[asyncio.Task] = None
+
+
+class WebhookRateLimit:
+    """Limite de débit d'un webhook : seau à jetons local recalé sur les en-têtes renvoyés par Discord"""
+
+    def __init__(self, rate: float = settings.WEBHOOK_RATE, burst: float = settings.WEBHOOK_BURST):
+        self.bucket = TokenBucket(rate, burst)
+        self.blocked_until = 0.0
+
+    async def acquire(self):
+        delay = self.blocked_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.bucket.acquire()
+
+    def update(self, status: int, headers) -> float:
+        """
+        Applique X-RateLimit-* et Retry-After ; retourne l'attente imposée en secondes.
+        Un en-tête illisible est ignoré (une seconde d'attente par défaut sur un 429).
+        """
+        now = time.monotonic()
+        wait = 0.0
+        if headers.get("X-RateLimit-Remaining") == "0":
+            wait = parse_retry_after(headers.get("X-RateLimit-Reset-After")) or 0.0
+        if status == 429:
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            wait = max(wait, 1.0 if retry_after is None else retry_after)
+        self.blocked_until = max(self.blocked_until, now + wait)
+        return wait
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
 
 class DiscordNotifier:
-    def __init__(self, webhooks: List[Dict], proxy_manager: Optional[ProxyManager] = None):
+    """
+    Dispatcher de notifications partagé : une session HTTP unique et une file par webhook,
+    vidée par sa propre tâche au rythme de la limite de ce webhook. Un webhook limité par
+    Discord ne retarde donc pas les autres ; le nombre total d'envois en attente est borné.
+    """
+
+    def __init__(
+        self,
+        webhooks: Optional[List[Dict]] = None,
+        proxy_manager: Optional[ProxyManager] = None,
+        workers: int = settings.NOTIFIER_WORKERS,
+        queue_size: int = settings.NOTIFIER_QUEUE_SIZE,
+        on_delivered: Optional[Callable[[List[int]], Awaitable[None]]] = None
+    ):
         """
         :param webhooks: Liste de dicts avec {'url': 'webhook_url', 'name': 'optional_name'}
         :param proxy_manager: Instance optionnelle de ProxyManager pour utiliser des proxies
+        :param workers: Requêtes Discord simultanées, tous webhooks confondus
+        :param queue_size: Nombre maximal d'envois en attente ; au-delà, `send_to_all` attend
+        :param on_delivered: Appelé avec les identifiants des annonces dont tous les envois
+            sont terminés (réussis ou abandonnés)
         """
-        self.webhooks = webhooks
+        self.webhooks = webhooks or []
         self.proxy_manager = proxy_manager if settings.USE_PROXIES else None
+        self.workers = workers
+        self.queues: Dict[str, WebhookQueue] = {}
+        self.rate_limits: Dict[str, WebhookRateLimit] = {}
+        self.disabled: Set[str] = set()  # Webhooks supprimés côté Discord : plus aucun envoi
+        # Annonces dont la recherche n'a pas de webhook : (annonce, recherche) -> (mise en attente, annonce)
+        self._unrouted: Dict[Tuple[int, str], Tuple[float, ListingRecord]] = {}
+        self._routes: Optional[Dict[str, List[Dict]]] = None
+        self.session: Optional[ClientSession] = None
+        self.on_delivered = on_delivered
+        self._batches: Dict[str, EmbedBatch] = {}
+        self._outstanding: Dict[int, int] = {}  # Envois restants par annonce
+        self._slots = asyncio.Semaphore(queue_size)
+        self._senders = asyncio.Semaphore(workers)
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        NOTIFIER_QUEUE_DEPTH.set_function(lambda: self.queue_depth)
+
+    @property
+    def queue_depth(self) -> int:
+        """Nombre d'envois en attente"""
+        return self._pending
 
-    async def send_to_all(self, item: dict) -> None:
-        """Envoie la notification à tous les webhooks en parallèle"""
-        if not self.webhooks:
-            logger.warning("Aucun webhook Discord configuré")
+    @property
+    def unrouted(self) -> int:
+        """Nombre d'annonces en attente d'un webhook"""
+        return len(self._unrouted)
+
+    async def start(self):
+        """Ouvre la session partagée"""
+        if self.session is None:
+            self.session = ClientSession(connector=TCPConnector(limit=self.workers, keepalive_timeout=60))
+
+    async def close(self, timeout: float = settings.NOTIFIER_DRAIN_TIMEOUT):
+        """Laisse les files se vider (dans la limite de `timeout`), puis arrête leurs tâches"""
+        await self.flush_all()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.queue_depth} notifications abandonnées à l'arrêt")
+        tasks = [queue.task for queue in self.queues.values() if queue.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.queues = {}
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def send_to_all(self, item: ListingRecord, webhooks: Optional[List[Dict]] = None) -> None:
+        """
+        Ajoute l'annonce au lot en cours de chaque webhook. Un lot part dès qu'il atteint
+        la limite de Discord, ou après EMBED_LINGER secondes (attend si la file est pleine).
+        """
+        webhooks = self.webhooks if webhooks is None else webhooks
+        webhooks = [wh for wh in webhooks if wh["url"] not in self.disabled]
+        if not webhooks:
+            logger.warning("Aucun webhook Discord actif pour cette annonce")
+            await self._settle([item.id])
             return
 
-        payload = self._prepare_payload(item)
-        
-        async with ClientSession() as session:
-            tasks = [
-                self._send_single(
-                    session=session,
-                    url=wh["url"],
-                    payload=payload,
-                    webhook_name=wh.get("name", "sans nom")
-                )
-                for wh in self.webhooks
-            ]
-            await asyncio.gather(*tasks, return_exceptions=True)
-
-    async def _send_single(
-        self,
-        session: ClientSession,
-        url: str,
-        payload: dict,
-        webhook_name: str = "sans nom"
-    ) -> bool:
+        embed = self._prepare_embed(item)
+        size = _embed_length(embed)
+        self._outstanding[item.id] = self._outstanding.get(item.id, 0) + len(webhooks)
+        for wh in webhooks:
+            url = wh["url"]
+            batch = self._batches.get(url)
+            # Le lot en cours est envoyé s'il ne peut pas accueillir cet embed
+            if batch and (len(batch.embeds) >= DISCORD_MAX_EMBEDS or batch.size + size > DISCORD_MAX_EMBED_CHARS):
+                await self._flush(url)
+                batch = None
+            if batch is None:
+                batch = self._batches[url] = EmbedBatch(wh.get("name", "sans nom"))
+                batch.timer = asyncio.create_task(self._linger(url, batch))
+            batch.embeds.append(embed)
+            batch.item_ids.append(item.id)
+            batch.size += size
+            if len(batch.embeds) >= DISCORD_MAX_EMBEDS:
+                await self._flush(url)
+
+    async def dispatch(self, items: List[ListingRecord], routes: Dict[str, List[Dict]]) -> None:
+        """
+        Envoie chaque annonce aux seuls webhooks des propriétaires des recherches qu'elle
+        satisfait, une fois par webhook même si plusieurs de leurs recherches correspondent.
+        Une annonce dont la recherche n'a pas de webhook reste non notifiée : elle est
+        retentée à chaque nouvelle lecture des routes, puis abandonnée après UNROUTED_MAX_AGE.
+        """
+        now = time.monotonic()
+        waiting = self._unrouted
+        if waiting and routes is not self._routes:
+            # Routes relues (webhook ajouté ou corrigé) : les annonces en attente sont retentées
+            items = [item for _, item in waiting.values()] + list(items)
+            self._unrouted = {}
+        self._routes = routes
+
+        deliveries: Dict[int, tuple] = {}
+        parked = 0
+        for item in items:
+            webhooks = routes.get(item.search_item_id)
+            if not webhooks:
+                key = (item.id, item.search_item_id)
+                if key not in self._unrouted:
+                    parked += key not in waiting
+                    self._unrouted[key] = (waiting.get(key, (now,))[0], item)
+                continue
+            _, targets = deliveries.setdefault(item.id, (item, {}))
+            for wh in webhooks:
+                targets[wh["url"]] = wh
+        if parked:
+            logger.warning(f"{parked} annonces sans webhook pour leur recherche, en attente d'un webhook")
+
+        for item, targets in deliveries.values():
+            await self.send_to_all(item, list(targets.values()))
+
+        expired = [key for key, (parked_at, _) in self._unrouted.items() if now - parked_at > settings.UNROUTED_MAX_AGE]
+        if expired:
+            logger.warning(f"{len(expired)} annonces abandonnées : aucun webhook configuré depuis {settings.UNROUTED_MAX_AGE}s")
+            # Une annonce encore en cours d'envoi pour une autre recherche sera marquée à la fin de celui-ci
+            await self._settle([item_id for item_id, _ in expired if item_id not in self._outstanding])
+            for key in expired:
+                del self._unrouted[key]
+
+    async def _settle(self, item_ids: List[int]):
+        """Décompte les envois terminés et signale les annonces qui n'en attendent plus"""
+        done = []
+        for item_id in item_ids:
+            remaining = self._outstanding.get(item_id, 1) - 1
+            if remaining > 0:
+                self._outstanding[item_id] = remaining
+            else:
+                self._outstanding.pop(item_id, None)
+                done.append(item_id)
+        if done and self.on_delivered:
+            try:
+                await self.on_delivered(done)
+            except Exception as e:
+                logger.error(f"Suivi des notifications impossible pour {len(done)} annonces : {str(e)}")
+
+    async def _linger(self, url: str, batch: "EmbedBatch"):
+        """Envoie un lot incomplet après le délai d'attente"""
+        await asyncio.sleep(settings.EMBED_LINGER)
+        if self._batches.get(url) is batch:
+            batch.timer = None
+            await self._flush(url)
+
+    async def _flush(self, url: str):
+        """Met en file le lot en cours d'un webhook (attend si trop d'envois sont en attente)"""
+        batch = self._batches.pop(url, None)
+        if not batch or not batch.embeds:
+            return
+        if batch.timer:
+            batch.timer.cancel()
+        await self._slots.acquire()
+        queue = self.queues.get(url)
+        if queue is None:
+            queue = self.queues[url] = WebhookQueue()
+        queue.pending.append((batch.webhook_name, self._prepare_payload(batch.embeds), batch.item_ids))
+        self._pending += 1
+        self._idle.clear()
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._drain(url, queue))
+
+    async def flush_all(self):
+        """Met en file tous les lots en attente"""
+        for url in list(self._batches):
+            await self._flush(url)
+
+    def _rate_limit(self, url: str) -> WebhookRateLimit:
+        rate_limit = self.rate_limits.get(url)
+        if rate_limit is None:
+            rate_limit = self.rate_limits[url] = WebhookRateLimit()
+        return rate_limit
+
+    async def _drain(self, url: str, queue: WebhookQueue):
+        """Envoie les messages d'un webhook jusqu'à vider sa file"""
+        try:
+            while queue.pending:
+                webhook_name, payload, item_ids = queue.pending[0]
+                try:
+                    if url not in self.disabled:
+                        await self._send_single(url, payload, webhook_name)
+                    # Envoyé ou abandonné : dans les deux cas l'annonce n'est pas rejouée
+                    await self._settle(item_ids)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Erreur inattendue lors de l'envoi à {webhook_name}: {str(e)}")
+                finally:
+                    queue.pending.popleft()
+                    self._pending -= 1
+                    self._slots.release()
+                    if not self._pending:
+                        self._idle.set()
+        finally:
+            queue.task = None
+
+    async def _send_single(self, url: str, payload: dict, webhook_name: str = "sans nom") -> bool:
+        rate_limit = self._rate_limit(url)
         proxy = None
         tried_proxies = set()
-        max_attempts = 2
 
-        for attempt in range(1, max_attempts + 1):
+        # Un 429 ne compte pas comme une tentative : la limite de Discord est attendue, pas subie
+        attempt = 0
+        while attempt < settings.WEBHOOK_MAX_ATTEMPTS:
+            attempt += 1
             if self.proxy_manager and settings.USE_PROXIES:
                 # S'assure d'avoir un proxy différent à chaque tentative
                 for _ in range(5):  # évite boucles infinies si peu de proxies
@@ -170,67 +337,91 @@ class DiscordNotifier:
                         tried_proxies.add(proxy_candidate)
                         break
 
+            # Attente propre à ce webhook, hors du quota d'envois simultanés
+            await rate_limit.acquire()
             try:
                 request_params = {
                     "url": url,
                     "json": payload,
-                    "timeout": 10
+                    "timeout": ClientTimeout(total=10)
                 }
                 if settings.USE_PROXIES and proxy:
                     request_params["proxy"] = proxy
 
-                async with session.post(**request_params) as response:
-                    response.raise_for_status()
-                    logger.info(f"Notification envoyée avec succès à {webhook_name} via {proxy}")
-                    return True
+                async with self._senders:
+                    started = time.monotonic()
+                    async with self.session.post(**request_params) as response:
+                        WEBHOOK_SEND_SECONDS.observe(time.monotonic() - started)
+                        wait = rate_limit.update(response.status, response.headers)
+                        if response.status == 429:
+                            WEBHOOK_RATE_LIMITED.inc()
+                            logger.warning(f"[Tentative {attempt}] Limite Discord atteinte pour {webhook_name}, reprise dans {wait:.1f}s")
+                            attempt -= 1
+                            continue
+                        if response.status in WEBHOOK_GONE_STATUSES:
+                            self.disabled.add(url)
+                            logger.error(f"Webhook {webhook_name} désactivé : Discord répond {response.status}")
+                            WEBHOOK_MESSAGES.inc(result="rejected")
+                            return False
+                        if 400 <= response.status < 500:
+                            # Erreur définitive (message refusé) : un nouvel essai donnerait la même réponse
+                            logger.error(f"Notification refusée par Discord pour {webhook_name} ({response.status}) : {await response.text()}")
+                            WEBHOOK_MESSAGES.inc(result="rejected")
+                            return False
+                        response.raise_for_status()
+                        logger.info(f"Notification envoyée avec succès à {webhook_name} via {proxy}")
+                        WEBHOOK_MESSAGES.inc(result="sent")
+                        return True
 
             except Exception as e:
+                # Erreur serveur (5xx) ou réseau : nouvel essai
                 logger.error(f"[Tentative {attempt}] Échec envoi à {webhook_name} (proxy: {proxy}): {str(e)}")
-                if attempt == max_attempts:
-                    return False  # Après 2 tentatives, abandon
-                else:
-                    await asyncio.sleep(2)  # Petite pause avant retry (optionnel)
-
-    def _prepare_payload(self, item: dict) -> dict:
-        """Prépare le message Discord avec embeds"""
-        def format_price(price_data):
-            return f"{float(price_data['amount']):.2f} {price_data['currency_code']}"
+                if attempt < settings.WEBHOOK_MAX_ATTEMPTS:
+                    await asyncio.sleep(min(2 ** attempt, 30))
 
-        def get_photo_url(photo_data):
-            return photo_data.get('full_size_url') or photo_data.get('url') if photo_data else None
+        logger.error(f"Notification abandonnée pour {webhook_name} après {settings.WEBHOOK_MAX_ATTEMPTS} tentatives")
+        WEBHOOK_MESSAGES.inc(result="failed")
+        return False
 
-        def format_seller(user_data):
-            if not user_data:
-                return "Non disponible"
-            return (f"👤 [{user_data['login']}]({user_data['profile_url']})\n"
-                    f"⭐ {user_data.get('feedback_reputation', 'N/A')}")
+    def _prepare_payload(self, embeds: List[dict]) -> dict:
+        """Prépare le message Discord regroupant jusqu'à 10 embeds"""
+        content = (
+            "🛍️ **Nouvelle annonce Vinted !**" if len(embeds) == 1
+            else f"🛍️ **{len(embeds)} nouvelles annonces Vinted !**"
+        )
+        return {"content": content, "embeds": embeds}
 
-        product_url = f"https://www.vinted.fr{item['path']}"
-        price_amount = float(item['price']['amount'])
+    def _prepare_embed(self, item: ListingRecord) -> dict:
+        """Prépare l'embed Discord d'une annonce"""
+        if item.seller_login:
+            seller = (f"👤 [{item.seller_login}]({item.seller_url})\n"
+                      f"⭐ {item.seller_rating if item.seller_rating is not None else 'N/A'}")
+        else:
+            seller = "Non disponible"
 
         embed = {
-            "title": f"🏷 {item['title']}",
-            "url": product_url,
-            "color": 0x00ff00 if price_amount < 20 else (0xff9900 if price_amount < 50 else 0xff0000),
-            "timestamp": datetime.utcnow().isoformat(),
+            "title": f"🏷 {item.title}",
+            "url": item.url,
+            "color": _deal_color(item),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "fields": [
                 {
                     "name": "🔍 Détails",
                     "value": (
-                        f"• **Marque:** {item.get('brand_title', 'Non spécifié')}\n"
-                        f"• **Taille:** {item.get('size_title', '?')}\n"
-                        f"• **État:** {item.get('status', '?')}"
+                        f"• **Marque:** {item.brand or 'Non spécifié'}\n"
+                        f"• **Taille:** {item.size or '?'}\n"
+                        f"• **État:** {item.status or '?'}"
                     ),
                     "inline": True
                 },
                 {
                     "name": "💰 Prix",
-                    "value": f"{format_price(item['price'])}",
+                    "value": _price_text(item),
                     "inline": True
                 },
                 {
                     "name": "📌 Vendeur",
-                    "value": format_seller(item.get('user')),
+                    "value": seller,
                     "inline": False
                 },
             ],
@@ -240,10 +431,15 @@ class DiscordNotifier:
         }
 
         # Ajout de l'image principale si disponible
-        if main_photo := get_photo_url(item.get('photo')):
-            embed["image"] = {"url": main_photo}
+        if item.photo_url:
+            embed["image"] = {"url": item.photo_url}
+
+        return embed
 
-        return {
-            "content": "🛍️ **Nouvelle annonce Vinted !**",
-            "embeds": [embed]
-        }
\ No newline at end of file
+    # Gestionnaire de contexte asynchrone
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,164 @@
+import logging
+from array import array
+from collections import OrderedDict
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
+from .filters import normalize_text
+from .listing import ListingRecord
+from .metrics import PRICE_SCORES
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Clé de statistiques : (recherche,), (recherche, marque) ou (recherche, marque, taille)
+PriceKey = Tuple[str, ...]
+
+# Facteur rendant le MAD comparable à un écart-type pour une distribution normale
+MAD_SCALE = 1.4826
+
+
+class PriceWindow:
+    """
+    Derniers prix observés pour une clé (fenêtre glissante de taille fixe). Médiane et MAD
+    sont recalculées à la demande, une seule fois par modification de la fenêtre.
+    """
+
+    __slots__ = ("prices", "position", "_summary")
+
+    def __init__(self, size: int):
+        self.prices = array("f", [0.0] * size)
+        self.position = 0  # Nombre total de prix ajoutés
+        self._summary: Optional[Tuple[float, float]] = None
+
+    def __len__(self) -> int:
+        return min(self.position, len(self.prices))
+
+    def add(self, price: float):
+        self.prices[self.position % len(self.prices)] = price
+        self.position += 1
+        self._summary = None
+
+    def values(self) -> List[float]:
+        """Prix de la fenêtre, du plus ancien au plus récent"""
+        size = len(self.prices)
+        if self.position <= size:
+            return list(self.prices[:self.position])
+        start = self.position % size
+        return list(self.prices[start:]) + list(self.prices[:start])
+
+    def summary(self) -> Tuple[float, float]:
+        """(médiane, MAD) des prix de la fenêtre"""
+        if self._summary is None:
+            ordered = sorted(self.values())
+            median = _median(ordered)
+            mad = _median(sorted(abs(price - median) for price in ordered))
+            self._summary = (median, mad)
+        return self._summary
+
+
+def _median(ordered: List[float]) -> float:
+    count = len(ordered)
+    middle = count // 2
+    return ordered[middle] if count % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class PriceStats:
+    """
+    Prix habituel des annonces de chaque recherche, et par marque et taille au sein d'une
+    recherche, tenu en mémoire à partir des annonces enregistrées. Une nouvelle annonce est
+    comparée à la médiane de la clé la plus précise ayant assez d'historique ; l'écart en %
+    sert à l'embed Discord et au seuil de notification des recherches.
+    """
+
+    def __init__(
+        self,
+        window: int = settings.PRICE_WINDOW,
+        min_samples: int = settings.PRICE_MIN_SAMPLES,
+        max_keys: int = settings.PRICE_MAX_KEYS
+    ):
+        """
+        :param window: Prix gardés par clé
+        :param min_samples: Prix nécessaires avant qu'une clé serve de référence
+        :param max_keys: Clés gardées au plus (les moins récemment alimentées sont oubliées)
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.max_keys = max_keys
+        self.windows: "OrderedDict[PriceKey, PriceWindow]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+    @staticmethod
+    def keys(item: ListingRecord) -> List[PriceKey]:
+        """Clés d'une annonce, de la plus précise à la plus générale"""
+        search_id = item.search_item_id or ""
+        brand = normalize_text(item.brand)
+        keys = [(search_id,)]
+        if brand:
+            keys.insert(0, (search_id, brand))
+            if item.size:
+                keys.insert(0, (search_id, brand, normalize_text(item.size)))
+        return keys
+
+    def _add(self, key: PriceKey, price: float):
+        window = self.windows.get(key)
+        if window is None:
+            window = self.windows[key] = PriceWindow(self.window)
+            if len(self.windows) > self.max_keys:
+                self.windows.popitem(last=False)
+        else:
+            self.windows.move_to_end(key)
+        window.add(price)
+
+    def observe(self, items: Iterable[ListingRecord]):
+        """Ajoute les prix d'annonces enregistrées à toutes leurs clés"""
+        for item in items:
+            if item.price and item.price > 0:
+                for key in self.keys(item):
+                    self._add(key, item.price)
+
+    def reference(self, item: ListingRecord) -> Optional[Tuple[float, float, int]]:
+        """(médiane, MAD, nombre de prix) de la clé la plus précise ayant assez d'historique"""
+        for key in self.keys(item):
+            window = self.windows.get(key)
+            if window is not None and len(window) >= self.min_samples:
+                median, mad = window.summary()
+                return median, mad, len(window)
+        return None
+
+    def score(self, items: Iterable[ListingRecord]):
+        """Renseigne `typical_price` et `discount` (% sous le prix habituel, négatif au-dessus) des annonces"""
+        for item in items:
+            reference = self.reference(item)
+            if reference is None or reference[0] <= 0:
+                PRICE_SCORES.inc(result="unknown")
+                continue
+            median = reference[0]
+            item.typical_price = round(median, 2)
+            item.discount = round((median - item.price) / median * 100, 1)
+            PRICE_SCORES.inc(result="scored")
+
+    def copy(self, max_keys: Optional[int] = None) -> List[Tuple[PriceKey, int, bytes]]:
+        """
+        Copie rapide des `max_keys` clés les plus récemment alimentées (toutes par défaut), des
+        moins aux plus récemment alimentées : clé, nombre de prix ajoutés, tampon brut de la fenêtre
+        """
+        recent = islice(reversed(self.windows.items()), max_keys)
+        entries = [(key, window.position, window.prices.tobytes()) for key, window in recent]
+        entries.reverse()
+        return entries
+
+    def restore(self, entries: Iterable[Tuple[PriceKey, List[float]]]):
+        for key, prices in entries:
+            for price in prices:
+                self._add(tuple(key), price)
+        logger.info(f"Prix habituels repris pour {len(self.windows)} clés")
+
+
+def is_deal(item: ListingRecord, min_discount: Optional[float]) -> bool:
+    """Vrai si l'annonce mérite une notification : sans seuil, ou sans référence de prix, elle passe toujours"""
+    if not min_discount or item.discount is None:
+        return True
+    return item.discount >= min_discount
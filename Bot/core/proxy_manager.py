@@ -1,19 +1,78 @@
+import asyncio
 import random
 import time
 import aiohttp
 import logging
+from typing import Dict, List, Optional, Set, Tuple
+from core.config import settings
+from core.metrics import PROXY_POOL, PROXY_REQUESTS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class ProxyScore:
+    """Taux de succès et latence d'un proxy, en moyennes à décroissance exponentielle"""
+
+    __slots__ = ("success_rate", "latency", "failures")
+
+    def __init__(self):
+        self.success_rate = 0.5
+        self.latency = 1.0
+        self.failures = 0
+
+    def record(self, success: bool, latency: Optional[float] = None, decay: float = settings.PROXY_SCORE_DECAY):
+        self.success_rate = decay * self.success_rate + (1 - decay) * (1.0 if success else 0.0)
+        if latency is not None:
+            self.latency = decay * self.latency + (1 - decay) * latency
+        self.failures = 0 if success else self.failures + 1
+
+    @property
+    def weight(self) -> float:
+        return self.success_rate ** 2 / max(self.latency, 0.05)
+
+
+def _build_alias(weights: List[float]) -> Tuple[List[float], List[int]]:
+    """Table d'alias de Vose : tirage pondéré en O(1)"""
+    n = len(weights)
+    total = sum(weights) or 1.0
+    prob = [w * n / total for w in weights]
+    alias = list(range(n))
+    small = [i for i, p in enumerate(prob) if p < 1.0]
+    large = [i for i, p in enumerate(prob) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        alias[s] = l
+        prob[l] -= 1.0 - prob[s]
+        (small if prob[l] < 1.0 else large).append(l)
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
+
 class ProxyManager:
-    """Gestionnaire de proxies venant de proxyscrape (format protocol://ip:port par ligne)."""
+    """
+    Gestionnaire de proxies venant de proxyscrape (format protocol://ip:port par ligne).
+    Une tâche de fond valide les proxies et les note ; le chemin des requêtes ne fait
+    qu'un tirage pondéré parmi les proxies sains.
+    """
 
-    def __init__(self, protocols=('http', 'socks4', 'socks5')):
+    def __init__(self, protocols=('http', 'socks4', 'socks5'), test_url: str = settings.PROXY_TEST_URL):
         self.proxies = []
         self.last_refresh = 0
         self.refresh_interval = 3600 * 2  # 4 heures
         self.protocols = protocols  # filtre sur protocol//ip:port
+        self.test_url = test_url
+        self.scores: Dict[str, ProxyScore] = {}
+        self.cooldown: Dict[str, float] = {}  # proxy -> fin de quarantaine (monotonic)
+        self.healthy: Set[str] = set()
+        self._ranked: List[str] = []
+        self._alias: Tuple[List[float], List[int]] = ([], [])
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        PROXY_POOL.set_function(lambda: len(self.proxies), state="known")
+        PROXY_POOL.set_function(lambda: len(self.healthy), state="healthy")
+        PROXY_POOL.set_function(lambda: len(self.cooldown), state="cooldown")
 
     async def fetch_proxies(self) -> bool:
         """
@@ -32,6 +91,10 @@ class ProxyManager:
                         if any(p.startswith(proto + '://') for proto in self.protocols)
                     ]
                     self.proxies = filtered
+                    known = set(filtered)
+                    self.scores = {p: s for p, s in self.scores.items() if p in known}
+                    self.cooldown = {p: t for p, t in self.cooldown.items() if p in known}
+                    self.healthy &= known
                     self.last_refresh = time.time()
                     logger.info(f"Récupéré {len(filtered)} proxies valides via ProxyScrape")
                     return True
@@ -39,22 +102,124 @@ class ProxyManager:
             logger.error(f"Erreur récupération proxies ProxyScrape: {e}")
             return False
 
-    async def get_proxy(self) -> str:
-        """Retourne un proxy aléatoire, rafraîchit si nécessaire"""
-        if not self.proxies or (time.time() - self.last_refresh > self.refresh_interval):
-            await self.fetch_proxies()
-        return random.choice(self.proxies) if self.proxies else None
+    def start(self):
+        """Démarre la tâche de contrôle en arrière-plan si elle ne tourne pas"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def close(self):
+        """Arrête la tâche de contrôle"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def get_proxy(self) -> Optional[str]:
+        """Tire un proxy sain, pondéré par son score. N'attend qu'au tout premier contrôle."""
+        self.start()
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=settings.PROXY_WARMUP_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
 
-    async def test_proxy(self, proxy: str, test_url: str = "https://httpbin.org/ip") -> bool:
+        prob, alias = self._alias
+        if prob:
+            for _ in range(8):
+                i = random.randrange(len(prob))
+                proxy = self._ranked[i if random.random() < prob[i] else alias[i]]
+                if proxy in self.healthy:
+                    return proxy
+        return next(iter(self.healthy), None)
+
+    async def test_proxy(
+        self,
+        proxy: str,
+        test_url: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None
+    ) -> bool:
         """Teste si un proxy fonctionne (http/socks compatible avec aiohttp)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(test_url, proxy=proxy, timeout=10) as resp:
-                    return resp.status == 200
+            if session is None:
+                async with aiohttp.ClientSession() as own_session:
+                    return await self.test_proxy(proxy, test_url, own_session)
+            async with session.get(test_url or self.test_url, proxy=proxy, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                return resp.status == 200
         except Exception:
             return False
 
+    def report_success(self, proxy: str, latency: float):
+        """Enregistre une requête réussie via ce proxy"""
+        PROXY_REQUESTS.inc(result="success")
+        self.scores.setdefault(proxy, ProxyScore()).record(True, latency)
+        self.cooldown.pop(proxy, None)
+        if proxy not in self.healthy:
+            self.healthy.add(proxy)
+            # Reconstruction amortie : la table double de taille au plus
+            if len(self.healthy) >= 2 * len(self._ranked):
+                self._rebuild()
+
+    def report_failure(self, proxy: str):
+        """Enregistre un échec et met le proxy en quarantaine (durée doublée à chaque échec consécutif)"""
+        PROXY_REQUESTS.inc(result="failure")
+        score = self.scores.setdefault(proxy, ProxyScore())
+        score.record(False)
+        self.cooldown[proxy] = time.monotonic() + settings.PROXY_COOLDOWN * 2 ** min(score.failures - 1, 6)
+        self.healthy.discard(proxy)
+        # Reconstruction amortie quand la table contient trop de proxies écartés
+        if len(self.healthy) * 2 < len(self._ranked):
+            self._rebuild()
+
+    def restore(self, proxies: List[str], scores: Dict[str, ProxyScore], healthy: Set[str], last_refresh: float):
+        """
+        Reprend une liste de proxies notés lors d'une exécution précédente : le tirage
+        est possible tout de suite, le contrôle de fond revalide ensuite la liste.
+        """
+        self.proxies = proxies
+        self.scores = scores
+        self.healthy = healthy & set(proxies)
+        self.last_refresh = last_refresh
+        self._rebuild()
+        if self.healthy:
+            self._ready.set()
+
     def remove_proxy(self, proxy: str):
-        """Supprime un proxy inactif"""
-        if proxy in self.proxies:
-            self.proxies.remove(proxy)
+        """Écarte un proxy inactif (quarantaine plutôt que suppression)"""
+        self.report_failure(proxy)
+
+    def _rebuild(self):
+        ranked = list(self.healthy)
+        self._alias = _build_alias([self.scores[p].weight for p in ranked]) if ranked else ([], [])
+        self._ranked = ranked
+
+    async def _probe(self, proxy: str, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            started = time.monotonic()
+            if await self.test_proxy(proxy, session=session):
+                self.report_success(proxy, time.monotonic() - started)
+                self._ready.set()
+            else:
+                self.report_failure(proxy)
+
+    async def probe_all(self):
+        """Teste en parallèle les proxies non testés, sortis de quarantaine ou déjà sains"""
+        now = time.monotonic()
+        candidates = [p for p in self.proxies if self.cooldown.get(p, 0) <= now]
+        semaphore = asyncio.Semaphore(settings.PROXY_PROBE_CONCURRENCY)
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(self._probe(p, session, semaphore) for p in candidates))
+        self._rebuild()
+        logger.info(f"{len(self.healthy)}/{len(self.proxies)} proxies opérationnels")
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                if not self.proxies or (time.time() - self.last_refresh > self.refresh_interval):
+                    await self.fetch_proxies()
+                await self.probe_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur lors du contrôle des proxies: {e}")
+            self._ready.set()
+            await asyncio.sleep(settings.PROXY_PROBE_INTERVAL)
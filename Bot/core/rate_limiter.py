@@ -0,0 +1,154 @@
+import asyncio
+import math
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional
+from core.config import settings
+
+
+class TokenBucket:
+    """Seau à jetons asynchrone : `rate` jetons par seconde, au plus `capacity` en réserve"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Attend qu'assez de jetons soient disponibles (les appelants sont servis dans l'ordre)"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Délai d'un en-tête Retry-After (secondes ou date HTTP) ; None s'il est absent ou illisible"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    Limiteur AIMD : débit et concurrence augmentent un peu à chaque réponse saine
+    et sont divisés par deux sur un refus (429, 403). Un refus suspend aussi les
+    nouveaux appels pendant un backoff exponentiel à jitter complet, ou pendant
+    le Retry-After imposé s'il est plus long.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        concurrency: int,
+        min_rate: float = settings.ADAPTIVE_MIN_RATE,
+        max_rate: float = settings.ADAPTIVE_MAX_RATE,
+        max_concurrency: int = settings.ADAPTIVE_MAX_CONCURRENCY,
+        rate_step: float = settings.ADAPTIVE_RATE_STEP,
+        backoff_base: float = settings.BACKOFF_BASE,
+        backoff_max: float = settings.BACKOFF_MAX
+    ):
+        """
+        :param rate: Débit initial (appels par seconde)
+        :param concurrency: Appels simultanés initiaux
+        :param rate_step: Débit gagné par seconde de réponses saines
+        :param backoff_base: Premier palier de backoff en secondes, doublé à chaque refus consécutif
+        :param backoff_max: Plafond du backoff en secondes
+        """
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max(max_rate, rate)
+        self.max_concurrency = max(max_concurrency, concurrency)
+        self.rate_step = rate_step
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate)
+        self.concurrency = float(concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttles = 0  # Refus consécutifs
+        self._condition = asyncio.Condition()
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    async def _acquire(self):
+        while True:
+            delay = self.blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            async with self._condition:
+                await self._condition.wait_for(lambda: self.in_flight < int(self.concurrency))
+                # Un refus a pu tomber pendant l'attente d'une place
+                if self.blocked_until > time.monotonic():
+                    continue
+                self.in_flight += 1
+                return
+
+    async def _release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Attend la fin d'un éventuel backoff, une place libre et un jeton de débit"""
+        await self._acquire()
+        try:
+            await self.bucket.acquire()
+            delay = self.blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            await self._release()
+
+    def on_success(self):
+        """Augmentation additive : environ +rate_step appel/s par seconde et +1 place par fenêtre saine"""
+        self.throttles = 0
+        self.bucket.rate = min(self.max_rate, self.bucket.rate + self.rate_step / self.bucket.rate)
+        self.bucket.capacity = max(1.0, self.bucket.rate)
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def restore(self, rate: float, concurrency: float):
+        """Reprend un débit et une concurrence appris lors d'une exécution précédente"""
+        self.bucket.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.bucket.capacity = max(1.0, self.bucket.rate)
+        self.bucket.tokens = min(self.bucket.tokens, self.bucket.capacity)
+        self.concurrency = min(self.max_concurrency, max(1.0, concurrency))
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> float:
+        """Diminution multiplicative et backoff ; retourne la pause appliquée en secondes"""
+        now = time.monotonic()
+        # Les appels déjà partis pendant une pause ne réduisent pas la limite une seconde fois
+        if now >= self.blocked_until:
+            self.throttles += 1
+            self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+            self.bucket.capacity = max(1.0, self.bucket.rate)
+            self.bucket.tokens = min(self.bucket.tokens, self.bucket.capacity)
+            self.concurrency = max(1.0, self.concurrency / 2)
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (self.throttles - 1)))
+        wait = max(backoff, retry_after or 0.0)
+        self.blocked_until = max(self.blocked_until, now + wait)
+        return wait
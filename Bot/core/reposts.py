@@ -0,0 +1,251 @@
+import aiohttp
+import asyncio
+import io
+import logging
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Dict, List, Optional, Tuple
+from .listing import ListingRecord
+from .metrics import IMAGES_HASHED, REPOSTS_SUPPRESSED
+from core.config import settings
+
+try:
+    from PIL import Image
+except ImportError:  # Dépendance optionnelle : sans Pillow, la détection des republications est désactivée
+    Image = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Entrée de l'index sur disque : hash 64 bits, identifiant Vinted, vendeur (crc32), date (epoch)
+RECORD = struct.Struct("<QqId")
+
+
+def image_hash(data: bytes) -> int:
+    """dHash 64 bits d'une image : gradients horizontaux d'une vignette 9x8 en niveaux de gris"""
+    with Image.open(io.BytesIO(data)) as image:
+        pixels = list(image.convert("L").resize((9, 8), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def seller_key(login: str) -> int:
+    return zlib.crc32(login.encode("utf-8"))
+
+
+class BKTree:
+    """Arbre BK sur la distance de Hamming : recherche des hashes proches sans tout parcourir"""
+
+    __slots__ = ("root", "size")
+
+    def __init__(self):
+        self.root: Optional[list] = None  # Nœud : [hash, [identifiants], {distance: enfant}]
+        self.size = 0
+
+    def add(self, value: int, item_id: int):
+        self.size += 1
+        if self.root is None:
+            self.root = [value, [item_id], {}]
+            return
+        node = self.root
+        while True:
+            distance = bin(node[0] ^ value).count("1")
+            if distance == 0:
+                node[1].append(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item_id], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[int]:
+        """Identifiants dont le hash est à au plus `max_distance` bits de `value`"""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            distance = bin(node[0] ^ value).count("1")
+            if distance <= max_distance:
+                found.extend(node[1])
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return found
+
+
+class RepostDetector:
+    """
+    Écarte les annonces republiées : la vignette de chaque nouvelle annonce est téléchargée
+    (pool borné), hashée dans un pool de processus, puis comparée aux annonces du même
+    vendeur vues pendant REPOST_WINDOW. L'index des hashes est conservé sur disque.
+    En cas d'échec (image absente, téléchargement lent) ou sans vendeur connu, l'annonce passe.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.REPOST_INDEX_PATH,
+        window: float = settings.REPOST_WINDOW,
+        max_distance: int = settings.REPOST_MAX_DISTANCE
+    ):
+        self.path = path
+        self.window = window
+        self.max_distance = max_distance
+        self.tree = BKTree()
+        self.entries: Deque[Tuple[int, int, int, float]] = deque()  # (hash, id, vendeur, date), par date
+        self.known: Dict[int, Tuple[int, float]] = {}  # id -> (vendeur, date)
+        self.semaphore = asyncio.Semaphore(settings.REPOST_FETCH_CONCURRENCY)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._file = None
+        self._file_lock = asyncio.Lock()  # Ajouts et réécriture du fichier ne se chevauchent pas
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None
+
+    def _index(self, value: int, item_id: int, seller: int, seen_at: float):
+        self.tree.add(value, item_id)
+        self.entries.append((value, item_id, seller, seen_at))
+        self.known[item_id] = (seller, seen_at)
+
+    async def _expire(self):
+        """Oublie les entrées hors fenêtre ; l'arbre (sans suppression) est reconstruit s'il est à moitié périmé"""
+        cutoff = time.time() - self.window
+        while self.entries and self.entries[0][3] < cutoff:
+            _, item_id, _, seen_at = self.entries.popleft()
+            if self.known.get(item_id, (0, 0.0))[1] == seen_at:
+                del self.known[item_id]
+        if self.tree.size > 2 * len(self.entries) + 1000:
+            self.tree = BKTree()
+            for value, item_id, _, _ in self.entries:
+                self.tree.add(value, item_id)
+            await self._compact()
+
+    def _load(self):
+        """Lit l'index sur disque (au démarrage, hors de la boucle d'événements)"""
+        if not os.path.exists(self.path):
+            return
+        cutoff = time.time() - self.window
+        with open(self.path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % RECORD.size  # Dernier enregistrement tronqué (arrêt brutal)
+        for value, item_id, seller, seen_at in RECORD.iter_unpack(data[:usable]):
+            if seen_at >= cutoff:
+                self._index(value, item_id, seller, seen_at)
+        logger.info(f"{len(self.entries)} hashes d'images chargés depuis {self.path}")
+
+    def _rewrite(self, data: bytes):
+        """Remplace le fichier (atomiquement) et le rouvre en ajout"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "ab")
+
+    def _append(self, data: bytes):
+        if self._file:
+            self._file.write(data)
+            self._file.flush()
+
+    async def _compact(self):
+        """Réécrit le fichier avec les seules entrées encore dans la fenêtre (écriture hors de la boucle)"""
+        data = b"".join(RECORD.pack(*entry) for entry in self.entries)
+        async with self._file_lock:
+            await asyncio.to_thread(self._rewrite, data)
+
+    async def start(self):
+        if not self.enabled:
+            logger.warning("Pillow n'est pas installé : détection des republications désactivée")
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        await asyncio.to_thread(self._load)
+        await self._compact()
+        self.executor = ProcessPoolExecutor(max_workers=settings.REPOST_HASH_WORKERS)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.REPOST_FETCH_CONCURRENCY, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=settings.REPOST_FETCH_TIMEOUT)
+        )
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        async with self._file_lock:
+            if self._file:
+                await asyncio.to_thread(self._file.close)
+                self._file = None
+
+    async def _hash(self, item: ListingRecord) -> Optional[int]:
+        url = item.thumbnail_url or item.photo_url
+        # Sans vendeur connu, aucune annonce ne peut être rattachée au même vendeur
+        if not url or not item.seller_login:
+            IMAGES_HASHED.inc(result="skipped")
+            return None
+        try:
+            async with self.semaphore:
+                async with self.session.get(url) as response:
+                    response.raise_for_status()
+                    data = await response.read()
+            value = await asyncio.get_running_loop().run_in_executor(self.executor, image_hash, data)
+            IMAGES_HASHED.inc(result="ok")
+            return value
+        except Exception as e:
+            IMAGES_HASHED.inc(result="error")
+            logger.debug(f"Image de l'annonce {item.id} non hashée : {str(e)}")
+            return None
+
+    async def filter(self, items: List[ListingRecord]) -> List[ListingRecord]:
+        """Retourne les annonces qui ne sont pas des republications récentes, et les indexe"""
+        if not items or self.session is None:
+            return items
+
+        hashes = await asyncio.gather(*(self._hash(item) for item in items))
+        now = time.time()
+        await self._expire()
+
+        kept, records = [], []
+        for item, value in zip(items, hashes):
+            if value is None:
+                kept.append(item)
+                continue
+            seller = seller_key(item.seller_login)
+            original = next(
+                (other for other in self.tree.search(value, self.max_distance)
+                 if other != item.id and self.known.get(other, (None,))[0] == seller),
+                None
+            )
+            if original is None:
+                kept.append(item)
+            else:
+                REPOSTS_SUPPRESSED.inc()
+                logger.info(f"Annonce {item.id} ignorée : republication de {original}")
+            # Une republication prolonge la fenêtre de l'image
+            self._index(value, item.id, seller, now)
+            records.append(RECORD.pack(value, item.id, seller, now))
+
+        if records:
+            async with self._file_lock:
+                await asyncio.to_thread(self._append, b"".join(records))
+        return kept
+
+    # Gestionnaire de contexte asynchrone
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,384 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from .rate_limiter import TokenBucket
+from .listing import ListingRecord
+from .filters import compile_filter, filter_batch
+from .metrics import SCHEDULER_INTERVAL, SCHEDULER_PENDING, SEARCH_RUNS
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Retourne le nombre d'annonces nouvelles trouvées (None si inconnu), qui règle l'intervalle suivant
+SearchHandler = Callable[[Dict], Awaitable[Optional[int]]]
+
+
+def normalize_search_text(text: str) -> str:
+    """Forme canonique d'un texte de recherche (casse et espaces)"""
+    return " ".join((text or "").lower().split())
+
+
+def _union_bound(current: Optional[float], other: Optional[float], pick) -> Optional[float]:
+    # Une borne absente chez un membre rend la borne du groupe absente
+    if current is None or other is None:
+        return None
+    return pick(current, other)
+
+
+def _tightest(current: Optional[float], other: Optional[float]) -> Optional[float]:
+    # Une borne d'intervalle absente chez un membre n'assouplit pas celle des autres
+    if current is None:
+        return other
+    if other is None:
+        return current
+    return min(current, other)
+
+
+def search_domain(config: Dict) -> str:
+    """Domaine Vinted d'une recherche (domaine par défaut si absent ou inconnu)"""
+    domain = (config.get('domain') or settings.DEFAULT_DOMAIN).lower()
+    return domain if domain in settings.VINTED_DOMAINS else settings.DEFAULT_DOMAIN
+
+
+def group_searches(configs: List[Dict]) -> List[Dict]:
+    """
+    Regroupe les recherches ayant le même domaine et le même texte normalisé en une
+    seule requête couvrant l'union de leurs fourchettes de prix. Chaque groupe garde
+    ses recherches d'origine dans `members`.
+    """
+    groups: Dict[Tuple[str, str], Dict] = {}
+    for config in configs:
+        domain = search_domain(config)
+        text = normalize_search_text(config['search_text'])
+        group = groups.get((domain, text))
+        if group is None:
+            groups[(domain, text)] = {
+                # Le domaine par défaut garde l'identifiant historique (baux et points de reprise)
+                "search_item_id": f"group:{text}" if domain == settings.DEFAULT_DOMAIN else f"group:{domain}:{text}",
+                "search_text": text,
+                "domain": domain,
+                "min_price": config.get('min_price'),
+                "max_price": config.get('max_price'),
+                "priority": search_priority(config),
+                "min_interval": config.get('min_interval'),
+                "max_interval": config.get('max_interval'),
+                "members": [config],
+                # Filtres compilés une fois par changement de configuration
+                "filters": [(config['search_item_id'], compile_filter(config))]
+            }
+            continue
+        group['min_price'] = _union_bound(group['min_price'], config.get('min_price'), min)
+        group['max_price'] = _union_bound(group['max_price'], config.get('max_price'), max)
+        # Le groupe est servi au rythme de son membre le plus exigeant
+        group['priority'] = max(group['priority'], search_priority(config))
+        group['min_interval'] = _tightest(group['min_interval'], config.get('min_interval'))
+        group['max_interval'] = _tightest(group['max_interval'], config.get('max_interval'))
+        group['members'].append(config)
+        group['filters'].append((config['search_item_id'], compile_filter(config)))
+    return list(groups.values())
+
+
+def route_items(group: Dict, items: List[ListingRecord]) -> List[ListingRecord]:
+    """Distribue les items d'un groupe à chacune des recherches membres dont ils passent le filtre"""
+    return filter_batch(group['filters'], items)
+
+
+def search_priority(config: Dict) -> int:
+    """Niveau de priorité d'une recherche, borné aux niveaux configurés"""
+    priority = config.get('priority')
+    if priority is None:
+        return settings.DEFAULT_PRIORITY
+    return min(max(int(priority), min(settings.PRIORITY_INTERVALS)), max(settings.PRIORITY_INTERVALS))
+
+
+def interval_bounds(config: Dict) -> Tuple[float, float]:
+    """Bornes d'intervalle d'une recherche : celles de l'utilisateur, sinon celles de son niveau"""
+    tier_min, tier_max = settings.PRIORITY_INTERVALS[search_priority(config)]
+    low = max(settings.MIN_POLL_INTERVAL, config.get('min_interval') or tier_min)
+    high = max(low, config.get('max_interval') or tier_max)
+    return low, high
+
+
+class SearchPace:
+    """Intervalle de passage d'une recherche, adapté à son débit observé de nouvelles annonces"""
+
+    __slots__ = ("min_interval", "max_interval", "interval", "rate", "last_run")
+
+    def __init__(self, min_interval: float, max_interval: float, interval: float):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max_interval, max(min_interval, interval))
+        self.rate = 0.0  # Nouvelles annonces par seconde (moyenne glissante)
+        self.last_run: Optional[float] = None
+
+    def record(self, found: Optional[int], now: float) -> float:
+        """
+        Met à jour le débit avec le nombre d'annonces nouvelles du passage et retourne l'intervalle
+        visant TARGET_NEW_PER_POLL annonces par passage, dans les bornes de la recherche
+        """
+        if found is not None and self.last_run is not None:
+            elapsed = max(1.0, now - self.last_run)
+            self.rate = 0.7 * self.rate + 0.3 * (found / elapsed)
+            target = settings.TARGET_NEW_PER_POLL / self.rate if self.rate > 0 else self.max_interval
+            self.interval = min(self.max_interval, max(self.min_interval, target))
+        self.last_run = now
+        return self.interval
+
+
+class SearchScheduler:
+    """
+    Planificateur des recherches : chaque recherche a sa propre échéance dans une file de priorité,
+    un pool borné de workers les exécute et un seau à jetons limite le débit vers le domaine Vinted servi.
+    Parmi les recherches échues, les plus prioritaires passent d'abord ; l'intervalle de chacune
+    s'adapte à son rythme de nouvelles annonces dans les bornes de son niveau de priorité.
+    """
+
+    def __init__(
+        self,
+        handler: SearchHandler,
+        workers: int = settings.SCHEDULER_WORKERS,
+        rate: float = settings.REQUESTS_PER_SECOND,
+        interval: float = settings.CHECK_INTERVAL,
+        jitter: float = settings.SCHEDULER_JITTER,
+        domain: str = settings.DEFAULT_DOMAIN,
+        adaptive: bool = True
+    ):
+        """
+        :param handler: Coroutine appelée avec la config d'une recherche (ou d'un groupe) arrivée à échéance
+        :param workers: Nombre maximum de recherches traitées simultanément
+        :param rate: Budget de recherches lancées par seconde
+        :param interval: Délai initial entre deux passages d'une même recherche (secondes)
+        :param jitter: Variation aléatoire appliquée aux échéances (fraction de l'intervalle)
+        :param domain: Domaine Vinted servi, utilisé comme label des métriques
+        :param adaptive: Adapter l'intervalle de chaque recherche (sinon `interval` fixe pour toutes)
+        """
+        self.handler = handler
+        self.domain = domain
+        self.workers = workers
+        self.interval = interval
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.bucket = TokenBucket(rate)
+        self.configs: Dict[str, Dict] = {}
+        self.paces: Dict[str, SearchPace] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._ready: List[Tuple[int, float, int, str]] = []  # Échues : (-priorité, échéance, n°, id)
+        self._due: Dict[str, float] = {}
+        self._running: Set[str] = set()
+        self._resume: Dict[str, Tuple[float, float, float]] = {}
+        self._counter = itertools.count()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=workers)
+        self._wakeup = asyncio.Event()
+        SCHEDULER_PENDING.set_function(lambda: self.pending, domain=domain)
+
+    def _schedule(self, search_id: str, delay: float):
+        due = time.monotonic() + max(0.0, delay)
+        self._due[search_id] = due
+        heapq.heappush(self._heap, (due, next(self._counter), search_id))
+        self._wakeup.set()
+
+    def _next_delay(self, search_id: str, found: Optional[int]) -> float:
+        interval = self.interval
+        pace = self.paces.get(search_id)
+        if self.adaptive and pace:
+            interval = pace.record(found, time.monotonic())
+            SCHEDULER_INTERVAL.observe(interval, domain=self.domain)
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def update(self, configs: List[Dict]) -> List[str]:
+        """Synchronise les recherches planifiées avec la configuration courante ; retourne les identifiants retirés"""
+        fresh = {config['search_item_id']: config for config in configs}
+
+        removed = [search_id for search_id in self.configs if search_id not in fresh]
+        for search_id in removed:
+            # L'entrée du tas devient périmée et sera ignorée par le dispatcher
+            del self.configs[search_id]
+            self.paces.pop(search_id, None)
+            self._due.pop(search_id, None)
+
+        for search_id, config in fresh.items():
+            is_new = search_id not in self.configs
+            self.configs[search_id] = config
+            low, high = interval_bounds(config)
+            pace = self.paces.get(search_id)
+            if pace is None:
+                self.paces[search_id] = SearchPace(low, high, self.interval)
+            elif (pace.min_interval, pace.max_interval) != (low, high):
+                pace.min_interval, pace.max_interval = low, high
+                pace.interval = min(high, max(low, pace.interval))
+            if is_new and search_id not in self._running:
+                self._schedule(search_id, self._initial_delay(search_id))
+        return removed
+
+    def _initial_delay(self, search_id: str) -> float:
+        """Première échéance : celle de l'instantané si la recherche y figure, sinon presque tout de suite"""
+        state = self._resume.pop(search_id, None)
+        if state is None:
+            return random.uniform(0, self.jitter * self.interval)
+        due, interval, rate = state
+        pace = self.paces[search_id]
+        pace.interval = min(pace.max_interval, max(pace.min_interval, interval))
+        pace.rate = rate
+        delay = due - time.time()
+        # Échéances dépassées pendant l'arrêt : étalées plutôt que toutes lancées d'un coup
+        return delay if delay > 0 else random.uniform(0, pace.min_interval)
+
+    def snapshot(self) -> Dict[str, Tuple[float, float, float]]:
+        """État de chaque recherche : (prochaine échéance epoch, intervalle, débit de nouveautés)"""
+        offset = time.time() - time.monotonic()
+        now = time.time()
+        state = {}
+        for search_id, pace in self.paces.items():
+            due = self._due.get(search_id)
+            state[search_id] = (due + offset if due is not None else now, pace.interval, pace.rate)
+        return state
+
+    def resume(self, state: Dict[str, Tuple[float, float, float]]):
+        """Échéances et rythmes à reprendre pour les recherches qui seront ajoutées par `update`"""
+        self._resume.update(state)
+
+    @property
+    def pending(self) -> int:
+        """Nombre de recherches échues en attente du budget ou d'un worker"""
+        return self._queue.qsize() + len(self._ready)
+
+    def _promote(self):
+        """Passe les recherches échues du tas des échéances à celui des priorités"""
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            due, seq, search_id = heapq.heappop(self._heap)
+            if self._due.get(search_id) != due:
+                continue  # Entrée périmée (recherche retirée ou replanifiée)
+            priority = search_priority(self.configs.get(search_id, {}))
+            heapq.heappush(self._ready, (-priority, due, seq, search_id))
+
+    async def _dispatch(self):
+        while True:
+            self._promote()
+            if not self._ready:
+                self._wakeup.clear()
+                if self._heap:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self._heap[0][0] - time.monotonic())
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await self._wakeup.wait()
+                continue
+
+            await self.bucket.acquire()
+            # Des recherches plus prioritaires ont pu échoir pendant l'attente du budget
+            self._promote()
+            _, due, _, search_id = heapq.heappop(self._ready)
+            # Supprimée (ou replanifiée) entre-temps
+            if self._due.get(search_id) != due or search_id not in self.configs:
+                continue
+            del self._due[search_id]
+            self._running.add(search_id)
+            await self._queue.put(search_id)
+
+    async def _worker(self):
+        while True:
+            search_id = await self._queue.get()
+            found = None
+            try:
+                config = self.configs.get(search_id)
+                if config:
+                    found = await self.handler(config)
+                    SEARCH_RUNS.inc(result="ok")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                SEARCH_RUNS.inc(result="error")
+                logger.error(f"Erreur sur la recherche {search_id}: {str(e)}")
+            finally:
+                self._running.discard(search_id)
+                self._queue.task_done()
+                if search_id in self.configs and search_id not in self._due:
+                    self._schedule(search_id, self._next_delay(search_id, found))
+
+    async def run(self):
+        """Lance le dispatcher et les workers jusqu'à annulation"""
+        tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self._dispatch()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class DomainScheduler:
+    """
+    Un SearchScheduler par domaine Vinted, créé à la première recherche du domaine :
+    chaque domaine a son propre budget et ses propres workers, un domaine lent ou
+    limité ne retarde pas les autres. Même interface que SearchScheduler.
+    """
+
+    def __init__(self, factory: Callable[[str], SearchScheduler]):
+        """
+        :param factory: Construit le planificateur d'un domaine à partir de son nom
+        """
+        self.factory = factory
+        self.schedulers: Dict[str, SearchScheduler] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._resume: Dict[str, Tuple[float, float, float]] = {}
+        self._running = False
+
+    def _start(self, domain: str):
+        task = self._tasks.get(domain)
+        if self._running and (task is None or task.done()):
+            self._tasks[domain] = asyncio.create_task(self.schedulers[domain].run())
+
+    def update(self, configs: List[Dict]) -> List[str]:
+        """Répartit les configurations par domaine ; retourne les identifiants retirés"""
+        by_domain: Dict[str, List[Dict]] = {}
+        for config in configs:
+            by_domain.setdefault(search_domain(config), []).append(config)
+
+        removed = []
+        for domain in set(self.schedulers) | set(by_domain):
+            scheduler = self.schedulers.get(domain)
+            if scheduler is None:
+                scheduler = self.schedulers[domain] = self.factory(domain)
+                scheduler.resume(self._resume)
+                logger.info(f"Nouveau domaine planifié : vinted.{domain}")
+            removed.extend(scheduler.update(by_domain.get(domain, [])))
+            self._start(domain)
+        return removed
+
+    def snapshot(self) -> Dict[str, Tuple[float, float, float]]:
+        state = {}
+        for scheduler in self.schedulers.values():
+            state.update(scheduler.snapshot())
+        return state
+
+    def resume(self, state: Dict[str, Tuple[float, float, float]]):
+        self._resume.update(state)
+        for scheduler in self.schedulers.values():
+            scheduler.resume(state)
+
+    @property
+    def pending(self) -> int:
+        return sum(scheduler.pending for scheduler in self.schedulers.values())
+
+    async def run(self):
+        """Lance les planificateurs de chaque domaine jusqu'à annulation"""
+        self._running = True
+        for domain in self.schedulers:
+            self._start(domain)
+        try:
+            # Les domaines apparus en cours de route démarrent dans update()
+            await asyncio.Event().wait()
+        finally:
+            self._running = False
+            tasks = list(self._tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
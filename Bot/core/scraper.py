@@ -1,110 +1,294 @@
 import aiohttp
 import asyncio
 import logging
+import math
 import random
 import time
-from typing import List, Dict, Optional
+from contextlib import nullcontext
+from typing import AsyncContextManager, List, Dict, Optional, Tuple
 from .proxy_manager import ProxyManager
+from .session_pool import SessionPool
+from .listing import ListingRecord, parse_catalog
+from .rate_limiter import AdaptiveLimiter, parse_retry_after
+from .metrics import API_LIMIT, API_REQUESTS, API_THROTTLED, FETCH_SECONDS
 from core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class VintedScraper:
-    def __init__(self, domain: str = "fr"):
-        self.base_url = f"https://www.vinted.{domain}"
+
+class SearchWatermark:
+    """Point de reprise d'une recherche et taille de page adaptée à son rythme de nouvelles annonces"""
+
+    def __init__(self, query_key: Tuple):
+        self.query_key = query_key
+        self.last_id = 0
+        self.last_timestamp = 0.0
+        self.per_page = settings.MAX_PER_PAGE
+        self.new_rate = 0.0  # Moyenne glissante des nouvelles annonces par passage
+        self.pending: Optional[Tuple[int, float]] = None  # Point de reprise lu, en attente du traitement
+
+    def commit(self):
+        """Avance le point de reprise une fois les annonces lues traitées"""
+        if self.pending:
+            self.last_id, self.last_timestamp = self.pending
+            self.pending = None
+
+    def record(self, new_count: int, saturated: bool):
+        """Ajuste la taille de page : le double du rythme observé, le maximum si la page était pleine"""
+        self.new_rate = 0.7 * self.new_rate + 0.3 * new_count
+        if saturated:
+            self.per_page = settings.MAX_PER_PAGE
+        else:
+            self.per_page = min(settings.MAX_PER_PAGE, max(settings.MIN_PER_PAGE, math.ceil(self.new_rate * 2)))
+
+
+class ThrottledError(RuntimeError):
+    """Vinted refuse l'appel (429, ou 403 DataDome) : le limiteur concerné est déjà en pause"""
+
+
+# Échecs imputables au proxy ou à la connexion (et non à la réponse de Vinted)
+CONNECTION_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+class DomainClient:
+    """Sessions, cookies et limiteurs adaptatifs (domaine et proxies) propres à un domaine Vinted"""
+
+    def __init__(self, domain: str, user_agents: List[str], base_url: Optional[str] = None, rate: float = settings.DOMAIN_REQUESTS_PER_SECOND):
+        profile = settings.VINTED_DOMAINS.get(domain, settings.VINTED_DOMAINS[settings.DEFAULT_DOMAIN])
+        self.domain = domain
+        self.currency = profile["currency"]
+        self.base_url = base_url or f"https://www.vinted.{domain}"
         self.api_url = f"{self.base_url}/api/v2"
+        self.sessions = SessionPool(self.base_url, user_agents, language=profile["language"])
+        self.limiter = AdaptiveLimiter(rate, settings.MAX_CONCURRENT_REQUESTS)
+        self.proxy_limiters: Dict[str, AdaptiveLimiter] = {}
+        API_LIMIT.set_function(lambda: self.limiter.rate, domain=domain, kind="rate")
+        API_LIMIT.set_function(lambda: int(self.limiter.concurrency), domain=domain, kind="concurrency")
+
+    def proxy_limiter(self, proxy: str) -> AdaptiveLimiter:
+        limiter = self.proxy_limiters.get(proxy)
+        if limiter is None:
+            limiter = self.proxy_limiters[proxy] = AdaptiveLimiter(settings.PROXY_REQUESTS_PER_SECOND, 1)
+        return limiter
+
+    def proxy_slot(self, proxy: Optional[str]) -> AsyncContextManager:
+        """Place dans le limiteur du proxy (aucun sans proxy : le limiteur du domaine suffit)"""
+        return self.proxy_limiter(proxy).slot() if proxy else nullcontext()
+
+    def limiters(self, proxy: Optional[str]) -> List[AdaptiveLimiter]:
+        return [self.limiter, self.proxy_limiter(proxy)] if proxy else [self.limiter]
+
+    def throttle(self, proxy: Optional[str], status: int, retry_after: Optional[float]) -> float:
+        """
+        Applique un refus : un 403 vise l'adresse de sortie (le proxy s'il y en a un),
+        un 429 ralentit aussi tout le domaine. Retourne la pause la plus longue.
+        """
+        targeted = [self.proxy_limiter(proxy)] if proxy else []
+        if not proxy or status == 429:
+            targeted.append(self.limiter)
+        return max(limiter.on_throttle(retry_after) for limiter in targeted)
+
+
+class VintedScraper:
+    def __init__(self, domain: str = settings.DEFAULT_DOMAIN, base_url: Optional[str] = None, rate: float = settings.DOMAIN_REQUESTS_PER_SECOND):
+        """
+        :param domain: Domaine des recherches qui n'en précisent pas
+        :param base_url: Adresse remplaçant celle du domaine par défaut (banc de performance)
+        :param rate: Budget d'appels API par seconde et par domaine
+        """
+        self.domain = domain
+        self.base_url_override = base_url
+        self.rate = rate
         self.user_agents = [
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36"
         ]
-        self.cookies = {}
-        self.semaphore = asyncio.Semaphore(2)
         self.retry_count = 3
         self.proxy_manager = ProxyManager() if settings.USE_PROXIES else None
+        self.clients: Dict[str, DomainClient] = {}
+        self.watermarks: Dict[str, SearchWatermark] = {}
 
-    async def _create_session(self, proxy: Optional[str] = None) -> aiohttp.ClientSession:
-        conn = aiohttp.TCPConnector(ssl=False, limit=10, force_close=True)
-        return aiohttp.ClientSession(
-            connector=conn,
-            cookies=self.cookies,
-            headers={
-                'User-Agent': random.choice(self.user_agents),
-                'Accept': 'application/json',
-                'Accept-Language': 'fr-FR,fr;q=0.9',
-                'Referer': f'{self.base_url}/',
-                'DNT': '1'
-            }
+    def client(self, domain: Optional[str] = None) -> DomainClient:
+        """Client du domaine, créé au premier appel"""
+        domain = domain or self.domain
+        client = self.clients.get(domain)
+        if client is None:
+            base_url = self.base_url_override if domain == self.domain else None
+            client = self.clients[domain] = DomainClient(domain, self.user_agents, base_url, self.rate)
+        return client
+
+    async def fetch(self, search_config: Dict) -> List[ListingRecord]:
+        """
+        Retourne les annonces publiées depuis le dernier passage de la recherche.
+        Les annonces déjà traitées sont sautées ; une page suivante n'est demandée que
+        si la page est pleine et se termine par une annonce nouvelle. Le point de reprise
+        n'avance qu'à l'appel de `commit`, une fois les annonces traitées.
+        """
+        search_item_id = search_config['search_item_id']
+        client = self.client(search_config.get('domain'))
+        query_key = (
+            client.domain,
+            search_config['search_text'],
+            search_config.get('min_price'),
+            search_config.get('max_price')
         )
+        watermark = self.watermarks.get(search_item_id)
+        if watermark is None or watermark.query_key != query_key:
+            watermark = SearchWatermark(query_key)
+            self.watermarks[search_item_id] = watermark
+        # Un passage dont le traitement a échoué est relu en entier
+        watermark.pending = None
+        first_run = watermark.last_id == 0
 
-    async def _fetch_cookies(self, session: aiohttp.ClientSession, proxy: Optional[str] = None) -> bool:
-        """Récupère les cookies initiaux en passant par le proxy si activé"""
-        try:
-            async with session.get(self.base_url, timeout=10) as response:
-                self.cookies = {key: value.value for key, value in response.cookies.items()}
-                return True
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des cookies : {str(e)}")
-            return False
-
-    async def fetch(self, search_config: Dict) -> List[Dict]:
         params = {
             "page": 1,
-            "per_page": 96,
+            "per_page": watermark.per_page,
             "search_text": search_config['search_text'],
-            "price_to": search_config.get('max_price', 1000),
-            "price_from": search_config.get('min_price', 0),
             "order": "newest_first",
-            "currency": "EUR",
+            "currency": client.currency,
             "time": int(time.time()),
         }
+        # Une borne absente (recherche sans limite de prix) n'est pas envoyée
+        if search_config.get('min_price') is not None:
+            params["price_from"] = search_config['min_price']
+        if search_config.get('max_price') is not None:
+            params["price_to"] = search_config['max_price']
+
+        started = time.monotonic()
+        new_items = []
+        saturated = False
+        gap = False
+        page = 1
+        while page <= settings.MAX_PAGES:
+            params["page"] = page
+            items = await self._fetch_page(client, params)
+            if items is None:
+                if not new_items:
+                    return []
+                gap = True
+                break
+
+            # Une annonce remontée (bump, mise en avant) peut précéder des annonces plus récentes
+            # qu'elle : les annonces déjà traitées sont sautées, pas prises pour la fin de la lecture
+            new_items.extend(item for item in items if item.id > watermark.last_id)
 
+            # Page pleine dont la dernière annonce est encore nouvelle : la suite peut l'être aussi
+            saturated = len(items) == params["per_page"] and items[-1].id > watermark.last_id
+            # Sans point de reprise, la première page suffit : la déduplication fait le reste
+            if first_run or not saturated:
+                break
+            if params["per_page"] < settings.MAX_PER_PAGE:
+                # Rafale d'annonces : on relit depuis le début avec des pages pleines
+                params["per_page"] = settings.MAX_PER_PAGE
+                new_items = []
+                page = 1
+                continue
+            page += 1
+
+        FETCH_SECONDS.observe(time.monotonic() - started, search=search_item_id)
+        if saturated and not first_run:
+            logger.warning(f"Recherche {search_item_id} : plus de {len(new_items)} nouvelles annonces, les plus anciennes sont ignorées")
+
+        if gap:
+            # Les pages non lues sont plus anciennes que les annonces retournées : le point
+            # de reprise reste en place pour les relire au prochain passage
+            logger.warning(f"Recherche {search_item_id} : page {page} illisible, point de reprise conservé")
+        elif new_items:
+            newest = max(new_items, key=lambda item: item.id)
+            watermark.pending = (newest.id, newest.photo_timestamp or time.time())
+        watermark.record(0 if first_run else len(new_items), saturated and not first_run)
+
+        for item in new_items:
+            item.search_item_id = search_item_id
+        return new_items
+
+    def commit(self, search_item_id: str):
+        """Valide le dernier passage de la recherche : ses annonces ne seront plus retournées"""
+        watermark = self.watermarks.get(search_item_id)
+        if watermark:
+            watermark.commit()
+
+    def forget(self, search_item_id: str):
+        """Oublie le point de reprise et les mesures d'une recherche supprimée"""
+        self.watermarks.pop(search_item_id, None)
+        FETCH_SECONDS.remove(search=search_item_id)
+
+    async def _fetch_page(self, client: DomainClient, params: Dict) -> Optional[List[ListingRecord]]:
+        """
+        Appelle l'API catalogue du domaine avec retries ; None si toutes les tentatives échouent.
+        Les refus (429, 403) pausent le limiteur concerné, les autres erreurs sont espacées
+        d'un backoff exponentiel à jitter complet.
+        """
         for attempt in range(self.retry_count):
             proxy = await self.proxy_manager.get_proxy() if self.proxy_manager else None
             if settings.USE_PROXIES and not proxy:
                 logger.error("Aucun proxy disponible alors que USE_PROXIES est activé")
-                return []
+                return None
 
-            session = await self._create_session(proxy)
+            vinted_session = client.sessions.get(proxy)
+            # La session peut être retirée par une autre recherche : elle reste ouverte jusqu'à `release`
+            client.sessions.acquire(vinted_session)
             try:
-                # 1. Cookies init
-                if not await self._fetch_cookies(session, proxy):
+                # 1. Cookies (réutilisés tant qu'ils sont valides)
+                if not await client.sessions.ensure_cookies(vinted_session):
                     raise RuntimeError("Récupération cookies échouée")
 
-                # 2. APPEL API
-                async with self.semaphore:
+                # 2. APPEL API (place du proxy d'abord, pour ne pas bloquer le domaine pendant sa pause)
+                async with client.proxy_slot(proxy), client.limiter.slot():
                     request_params = {
-                        "url": f"{self.api_url}/catalog/items",
+                        "url": f"{client.api_url}/catalog/items",
                         "params": params,
                         "timeout": aiohttp.ClientTimeout(total=15)
                     }
                     if settings.USE_PROXIES and proxy:
                         request_params["proxy"] = proxy
 
-                    async with session.get(**request_params) as response:
+                    started = time.monotonic()
+                    async with vinted_session.session.get(**request_params) as response:
+                        API_REQUESTS.inc(domain=client.domain, status=response.status)
+                        if response.status in (403, 429):
+                            API_THROTTLED.inc(domain=client.domain, status=response.status)
+                            if response.status == 403:
+                                # Défi DataDome : les cookies de la session ne sont plus acceptés
+                                client.sessions.invalidate_cookies(vinted_session)
+                            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                            wait = client.throttle(proxy, response.status, retry_after)
+                            raise ThrottledError(f"HTTP {response.status}, pause de {wait:.1f}s")
                         if response.status == 401:
                             logger.warning("Session expirée - Tentative de renouvellement (HTTP 401)")
+                            client.sessions.invalidate_cookies(vinted_session)
                             raise RuntimeError("Session expirée")
                         response.raise_for_status()
-                        data = await response.json()
-                        items = data.get('items', [])
-                        for item in items:
-                            item['search_item_id'] = search_config['search_item_id']
-                        await session.close()
+                        items = parse_catalog(await response.read(), client.base_url)
+                        for limiter in client.limiters(proxy):
+                            limiter.on_success()
+                        if self.proxy_manager and proxy:
+                            self.proxy_manager.report_success(proxy, time.monotonic() - started)
                         return items
 
             except Exception as e:
-                logger.warning(f"Tentative {attempt+1}/{self.retry_count} échouée avec proxy : {proxy} - {e}")
-                await session.close()
-                if self.proxy_manager and proxy:
-                    self.proxy_manager.remove_proxy(proxy)
+                error = e
+            finally:
+                await client.sessions.release(vinted_session)
+
+            logger.warning(f"Tentative {attempt+1}/{self.retry_count} échouée avec proxy : {proxy} - {error}")
+            if self.proxy_manager and proxy and isinstance(error, (ThrottledError, *CONNECTION_ERRORS)):
+                # Adresse refusée ou injoignable ; une erreur HTTP ordinaire ne met pas en cause le proxy
+                self.proxy_manager.remove_proxy(proxy)
+                if isinstance(error, CONNECTION_ERRORS):
+                    await client.sessions.discard(proxy)
+            if not isinstance(error, ThrottledError) and attempt + 1 < self.retry_count:
+                await asyncio.sleep(random.uniform(0, min(settings.BACKOFF_MAX, settings.BACKOFF_BASE * 2 ** attempt)))
 
         logger.error("Échec après plusieurs tentatives.")
-        return []
+        return None
 
     # context manager support
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        pass
\ No newline at end of file
+        await asyncio.gather(*(client.sessions.close() for client in self.clients.values()))
+        if self.proxy_manager:
+            await self.proxy_manager.close()
\ No newline at end of file
@@ -0,0 +1,150 @@
+import aiohttp
+import asyncio
+import logging
+import random
+import time
+from http.cookies import SimpleCookie
+from typing import Dict, List, Optional, Tuple
+from yarl import URL
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class VintedSession:
+    """Session aiohttp persistante liée à un proxy (ou à la connexion directe) avec son jeu de cookies"""
+
+    def __init__(self, session: aiohttp.ClientSession, proxy: Optional[str] = None):
+        self.session = session
+        self.proxy = proxy
+        self.cookies_expire_at = 0.0
+        self.lock = asyncio.Lock()
+        self.in_flight = 0  # Requêtes en cours sur la session
+        self.retired = False  # Retirée du pool : fermée dès la fin de ses requêtes en cours
+
+    @property
+    def has_valid_cookies(self) -> bool:
+        return time.monotonic() < self.cookies_expire_at
+
+
+class SessionPool:
+    """
+    Garde une session keep-alive par proxy (une seule sans proxy). Les cookies Vinted
+    sont partagés entre toutes les recherches passant par la même session et ne sont
+    renouvelés qu'à expiration ou après un 401/403.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        user_agents: List[str],
+        cookie_ttl: float = settings.COOKIE_TTL,
+        language: str = 'fr-FR,fr;q=0.9'
+    ):
+        self.base_url = base_url
+        self.user_agents = user_agents
+        self.language = language
+        self.cookie_ttl = cookie_ttl
+        self.sessions: Dict[Optional[str], VintedSession] = {}
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        conn = aiohttp.TCPConnector(ssl=False, limit=10, keepalive_timeout=60)
+        return aiohttp.ClientSession(
+            connector=conn,
+            cookie_jar=aiohttp.CookieJar(),
+            headers={
+                'User-Agent': random.choice(self.user_agents),
+                'Accept': 'application/json',
+                'Accept-Language': self.language,
+                'Referer': f'{self.base_url}/',
+                'DNT': '1'
+            }
+        )
+
+    def get(self, proxy: Optional[str] = None) -> VintedSession:
+        """Retourne la session associée au proxy, créée à la première utilisation"""
+        vinted_session = self.sessions.get(proxy)
+        if vinted_session is None or vinted_session.session.closed:
+            vinted_session = VintedSession(self._create_session(), proxy)
+            self.sessions[proxy] = vinted_session
+        return vinted_session
+
+    async def ensure_cookies(self, vinted_session: VintedSession) -> bool:
+        """Récupère les cookies initiaux si la session n'en a pas de valides"""
+        if vinted_session.has_valid_cookies:
+            return True
+
+        async with vinted_session.lock:
+            # Une autre recherche a pu les renouveler pendant l'attente
+            if vinted_session.has_valid_cookies:
+                return True
+            try:
+                request_params = {"url": self.base_url, "timeout": aiohttp.ClientTimeout(total=10)}
+                if vinted_session.proxy:
+                    request_params["proxy"] = vinted_session.proxy
+                async with vinted_session.session.get(**request_params) as response:
+                    await response.read()
+                    vinted_session.cookies_expire_at = time.monotonic() + self.cookie_ttl
+                    return True
+            except Exception as e:
+                logger.error(f"Erreur lors de la récupération des cookies : {str(e)}")
+                return False
+
+    def export_cookies(self) -> List[Tuple[Optional[str], float, List[Tuple[str, str, str, str]]]]:
+        """Cookies encore valides de chaque session : (proxy, expiration epoch, [(nom, valeur, domaine, chemin)])"""
+        offset = time.time() - time.monotonic()
+        exported = []
+        for proxy, vinted_session in self.sessions.items():
+            if vinted_session.has_valid_cookies and not vinted_session.session.closed:
+                cookies = [
+                    (morsel.key, morsel.value, morsel["domain"], morsel["path"])
+                    for morsel in vinted_session.session.cookie_jar
+                ]
+                exported.append((proxy, vinted_session.cookies_expire_at + offset, cookies))
+        return exported
+
+    def restore_cookies(self, proxy: Optional[str], expires_at: float, cookies: List[Tuple[str, str, str, str]]):
+        """Recrée la session d'un proxy avec des cookies exportés, s'ils n'ont pas expiré entre-temps"""
+        remaining = expires_at - time.time()
+        if remaining <= 0 or not cookies:
+            return
+        jar = SimpleCookie()
+        for name, value, domain, path in cookies:
+            jar[name] = value
+            if domain:
+                jar[name]["domain"] = domain
+            jar[name]["path"] = path or "/"
+        vinted_session = self.get(proxy)
+        vinted_session.session.cookie_jar.update_cookies(jar, response_url=URL(self.base_url))
+        vinted_session.cookies_expire_at = time.monotonic() + remaining
+
+    def invalidate_cookies(self, vinted_session: VintedSession):
+        """Force le renouvellement des cookies au prochain appel"""
+        vinted_session.cookies_expire_at = 0.0
+        vinted_session.session.cookie_jar.clear()
+
+    def acquire(self, vinted_session: VintedSession):
+        """Signale une requête en cours sur la session (à terminer par `release`)"""
+        vinted_session.in_flight += 1
+
+    async def release(self, vinted_session: VintedSession):
+        vinted_session.in_flight -= 1
+        if vinted_session.retired and vinted_session.in_flight == 0:
+            await vinted_session.session.close()
+
+    async def discard(self, proxy: Optional[str]):
+        """
+        Retire la session d'un proxy abandonné : les nouvelles requêtes en obtiennent une autre,
+        celles en cours se terminent avant sa fermeture
+        """
+        vinted_session = self.sessions.pop(proxy, None)
+        if vinted_session:
+            vinted_session.retired = True
+            if vinted_session.in_flight == 0:
+                await vinted_session.session.close()
+
+    async def close(self):
+        """Ferme toutes les sessions"""
+        sessions, self.sessions = list(self.sessions.values()), {}
+        await asyncio.gather(*(s.session.close() for s in sessions), return_exceptions=True)
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List, Optional, Set
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def lease_key(search_id: str) -> str:
+    """Clé de bail compacte (les textes de recherche peuvent dépasser la taille d'une clé MySQL)"""
+    return hashlib.sha1(search_id.encode()).hexdigest()
+
+
+def rendezvous_owner(key: str, workers: List[str]) -> Optional[str]:
+    """
+    Hachage consistant (rendezvous) : chaque clé revient à l'instance de plus fort poids.
+    L'arrivée ou le départ d'une instance ne déplace que les clés qui la concernent.
+    """
+    def weight(worker_id: str) -> int:
+        return int.from_bytes(hashlib.blake2b(f"{worker_id}:{key}".encode(), digest_size=8).digest(), "big")
+    return max(workers, key=weight) if workers else None
+
+
+class ShardCoordinator:
+    """
+    Répartit les recherches entre plusieurs instances du Bot. Chaque instance publie un
+    heartbeat dans BotWorker, calcule sa part par hachage consistant sur les instances
+    vivantes et ne traite une recherche qu'après en avoir pris le bail dans SearchLease.
+    Le bail d'une instance disparue expire et sa part est reprise par les autres.
+    """
+
+    def __init__(
+        self,
+        storage,
+        worker_id: str = settings.WORKER_ID,
+        heartbeat_interval: float = settings.HEARTBEAT_INTERVAL
+    ):
+        self.storage = storage
+        self.worker_id = worker_id
+        self.heartbeat_interval = heartbeat_interval
+        self.ttl = heartbeat_interval * 3
+        self.workers: List[str] = [worker_id]
+        self.keys: Dict[str, str] = {}  # clé de bail -> identifiant de recherche
+        self.held: Set[str] = set()
+        self.changed = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    def assign(self, search_ids: List[str]):
+        """Déclare l'ensemble des recherches à répartir"""
+        self.keys = {lease_key(search_id): search_id for search_id in search_ids}
+        self._wakeup.set()
+
+    def owns(self, search_id: str) -> bool:
+        return lease_key(search_id) in self.held
+
+    async def heartbeat(self):
+        """Un tour de coordination : heartbeat, calcul de la part, baux"""
+        await self.storage.heartbeat_worker(self.worker_id)
+        self.workers = await self.storage.get_live_workers(self.ttl) or [self.worker_id]
+
+        wanted = [key for key in self.keys if rendezvous_owner(key, self.workers) == self.worker_id]
+        released = [key for key in self.held if key not in wanted]
+        await self.storage.release_leases(self.worker_id, released)
+        await self.storage.claim_leases(self.worker_id, wanted, self.ttl)
+
+        held = await self.storage.get_held_leases(self.worker_id) & set(wanted)
+        if held != self.held:
+            logger.info(f"Instance {self.worker_id} : {len(held)}/{len(self.keys)} recherches sur {len(self.workers)} instances")
+            self.held = held
+            self.changed.set()
+
+    async def run(self):
+        """Boucle de coordination jusqu'à annulation ; libère la part de l'instance à l'arrêt"""
+        try:
+            while True:
+                try:
+                    await self.heartbeat()
+                except Exception as e:
+                    logger.error(f"Erreur de coordination: {str(e)}")
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            try:
+                await self.storage.remove_worker(self.worker_id)
+            except Exception as e:
+                logger.error(f"Impossible de libérer les baux de {self.worker_id}: {str(e)}")
@@ -0,0 +1,406 @@
+import asyncio
+import logging
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from .pricing import PriceKey, PriceStats
+from .proxy_manager import ProxyScore
+from .scheduler import DomainScheduler, SearchScheduler
+from .scraper import SearchWatermark, VintedScraper
+from .storage import SeenKey, VintedStorage
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# En-tête : signature, version du format, date d'écriture (epoch) ; puis des sections (étiquette, taille, contenu)
+MAGIC = b"VBST"
+VERSION = 1
+HEADER = struct.Struct("<4sHd")
+SECTION = struct.Struct("<4sI")
+
+# Section encodée, ou encodage différé (hors de la boucle) d'une copie de l'état
+Sections = Dict[bytes, Union[bytes, Callable[[], bytes]]]
+
+
+class _Writer:
+    """Encodage little-endian des types de base ; chaînes préfixées par leur longueur"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def pack(self, fmt: str, *values):
+        self.buffer += struct.pack(f"<{fmt}", *values)
+
+    def string(self, value: Optional[str]):
+        data = (value or "").encode("utf-8")
+        self.pack("H", len(data))
+        self.buffer += data
+
+    def number(self, value: Optional[float]):
+        """Flottant optionnel (None encodé en NaN)"""
+        self.pack("d", math.nan if value is None else value)
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt: str) -> tuple:
+        fmt = struct.Struct(f"<{fmt}")
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def string(self) -> str:
+        size, = self.unpack("H")
+        value = bytes(self.data[self.offset:self.offset + size]).decode("utf-8")
+        self.offset += size
+        return value
+
+    def number(self) -> Optional[float]:
+        value, = self.unpack("d")
+        return None if math.isnan(value) else value
+
+
+class StateSnapshot:
+    """
+    Instantané binaire de l'état chaud du bot, écrit périodiquement et à l'arrêt, relu au
+    démarrage : cache des annonces vues, points de reprise et échéances des recherches,
+    cookies et débits appris par domaine, proxies notés, prix habituels. Le bot reprend
+    ainsi sans relire la table Item, sans attendre ProxyScrape ni relancer toutes les
+    recherches d'un coup.
+    Un fichier absent, d'une autre version ou illisible est ignoré (démarrage à froid).
+    """
+
+    def __init__(self, path: str = settings.SNAPSHOT_PATH, interval: float = settings.SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.sections: Dict[bytes, bytes] = {}
+
+    def load(self) -> bool:
+        """Lit le fichier ; les sections sont appliquées ensuite par `restore`"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            magic, version, written_at = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                logger.warning(f"Instantané {self.path} ignoré : format inconnu")
+                return False
+            offset = HEADER.size
+            sections = {}
+            while offset < len(data):
+                tag, size = SECTION.unpack_from(data, offset)
+                offset += SECTION.size
+                sections[tag] = data[offset:offset + size]
+                offset += size
+        except FileNotFoundError:
+            return False
+        except (OSError, struct.error) as e:
+            logger.warning(f"Instantané {self.path} illisible, démarrage à froid : {str(e)}")
+            return False
+        self.sections = sections
+        logger.info(f"Instantané {self.path} du {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(written_at))} chargé")
+        return True
+
+    @property
+    def has_seen(self) -> bool:
+        return b"SEN2" in self.sections
+
+    @property
+    def has_prices(self) -> bool:
+        return b"PRCE" in self.sections
+
+    def restore(
+        self,
+        storage: VintedStorage,
+        scraper: VintedScraper,
+        scheduler: Union[SearchScheduler, DomainScheduler],
+        prices: Optional[PriceStats] = None
+    ):
+        """Applique les sections chargées ; une section corrompue est ignorée sans bloquer les autres"""
+        decoders = {
+            # SEEN (identifiants seuls, avant la déduplication par recherche) n'est plus relu
+            b"SEN2": lambda reader: self._restore_seen(reader, storage),
+            b"WMRK": lambda reader: self._restore_watermarks(reader, scraper),
+            b"SCHD": lambda reader: self._restore_schedule(reader, scheduler),
+            b"COOK": lambda reader: self._restore_clients(reader, scraper),
+            b"PRXY": lambda reader: self._restore_proxies(reader, scraper),
+        }
+        if prices is not None:
+            decoders[b"PRCE"] = lambda reader: self._restore_prices(reader, prices)
+        for tag, data in self.sections.items():
+            decoder = decoders.get(tag)
+            if decoder is None:
+                continue
+            try:
+                decoder(_Reader(data))
+            except (struct.error, UnicodeDecodeError, ValueError, IndexError) as e:
+                logger.warning(f"Section {tag.decode()} de l'instantané ignorée : {str(e)}")
+        self.sections = {}
+
+    def capture(
+        self,
+        storage: VintedStorage,
+        scraper: VintedScraper,
+        scheduler: Union[SearchScheduler, DomainScheduler],
+        prices: Optional[PriceStats] = None
+    ) -> Sections:
+        """
+        Capture l'état dans la boucle (cohérent) : les petites sections sont encodées tout de suite,
+        le cache des vus et les prix habituels sont seulement copiés, encodés ensuite par `encode`
+        """
+        sections: Sections = {
+            b"SEN2": partial(self._dump_seen, *storage.seen.copy()),
+            b"WMRK": self._dump_watermarks(scraper),
+            b"SCHD": self._dump_schedule(scheduler),
+            b"COOK": self._dump_clients(scraper),
+        }
+        if scraper.proxy_manager and scraper.proxy_manager.proxies:
+            sections[b"PRXY"] = self._dump_proxies(scraper)
+        if prices is not None:
+            sections[b"PRCE"] = partial(self._dump_prices, prices.copy(settings.SNAPSHOT_PRICE_KEYS))
+        return sections
+
+    @staticmethod
+    def encode(sections: Sections) -> bytes:
+        parts = [HEADER.pack(MAGIC, VERSION, time.time())]
+        for tag, data in sections.items():
+            if callable(data):
+                data = data()
+            parts.append(SECTION.pack(tag, len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+    def _write(self, sections: Sections) -> int:
+        """Encode et écrit le fichier (remplacement atomique) ; retourne sa taille"""
+        data = self.encode(sections)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        return len(data)
+
+    async def save(
+        self,
+        storage: VintedStorage,
+        scraper: VintedScraper,
+        scheduler: Union[SearchScheduler, DomainScheduler],
+        prices: Optional[PriceStats] = None
+    ):
+        """Capture l'état dans la boucle (cohérent), l'encode et écrit le fichier hors de la boucle"""
+        started = time.monotonic()
+        sections = self.capture(storage, scraper, scheduler, prices)
+        captured = time.monotonic()
+        size = await asyncio.to_thread(self._write, sections)
+        logger.debug(
+            f"Instantané écrit ({size} octets) : capture {captured - started:.3f}s, "
+            f"encodage et écriture {time.monotonic() - captured:.2f}s"
+        )
+
+    async def run(
+        self,
+        storage: VintedStorage,
+        scraper: VintedScraper,
+        scheduler: Union[SearchScheduler, DomainScheduler],
+        prices: Optional[PriceStats] = None
+    ):
+        """Écrit un instantané toutes les `interval` secondes, et une dernière fois à l'annulation"""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self.save(storage, scraper, scheduler, prices)
+                except Exception as e:
+                    logger.error(f"Écriture de l'instantané impossible : {str(e)}")
+        finally:
+            try:
+                await self.save(storage, scraper, scheduler, prices)
+                logger.info(f"Instantané écrit à l'arrêt : {self.path}")
+            except Exception as e:
+                logger.error(f"Écriture de l'instantané impossible à l'arrêt : {str(e)}")
+
+    # Cache des annonces vues : table des recherches, puis index de recherche, identifiants
+    # et dates (secondes epoch), du plus ancien au plus récent
+    @staticmethod
+    def _dump_seen(offset: float, keys: List[SeenKey], dates: List[float]) -> bytes:
+        searches: Dict[str, int] = {}
+        indexes = [searches.setdefault(search_id, len(searches)) for search_id, _ in keys]
+        writer = _Writer()
+        writer.pack("I", len(searches))
+        for search_id in searches:
+            writer.string(search_id)
+        count = len(keys)
+        writer.pack(f"I{count}I", count, *indexes)
+        writer.pack(f"{count}Q", *(item_id for _, item_id in keys))
+        writer.pack(f"{count}I", *(int(seen_at + offset) for seen_at in dates))
+        return bytes(writer.buffer)
+
+    @staticmethod
+    def _restore_seen(reader: _Reader, storage: VintedStorage):
+        searches, = reader.unpack("I")
+        search_ids = [reader.string() for _ in range(searches)]
+        count, = reader.unpack("I")
+        indexes = reader.unpack(f"{count}I")
+        ids = reader.unpack(f"{count}Q")
+        dates = reader.unpack(f"{count}I")
+        keys = [(search_ids[index], item_id) for index, item_id in zip(indexes, ids)]
+        storage.seen.restore(list(zip(keys, dates)))
+        logger.info(f"{count} items déjà vus repris de l'instantané")
+
+    # Points de reprise des recherches
+    @staticmethod
+    def _dump_watermarks(scraper: VintedScraper) -> bytes:
+        writer = _Writer()
+        writer.pack("I", len(scraper.watermarks))
+        for search_id, watermark in scraper.watermarks.items():
+            domain, text, min_price, max_price = watermark.query_key
+            writer.string(search_id)
+            writer.string(domain)
+            writer.string(text)
+            writer.number(min_price)
+            writer.number(max_price)
+            writer.pack("qdHf", watermark.last_id, watermark.last_timestamp, watermark.per_page, watermark.new_rate)
+        return bytes(writer.buffer)
+
+    @staticmethod
+    def _restore_watermarks(reader: _Reader, scraper: VintedScraper):
+        count, = reader.unpack("I")
+        for _ in range(count):
+            search_id = reader.string()
+            query_key = (reader.string(), reader.string(), reader.number(), reader.number())
+            watermark = SearchWatermark(query_key)
+            watermark.last_id, watermark.last_timestamp, watermark.per_page, watermark.new_rate = reader.unpack("qdHf")
+            scraper.watermarks[search_id] = watermark
+
+    # Prix habituels : clé (1 à 3 chaînes) puis prix de la fenêtre en float32, du plus ancien au plus récent
+    @staticmethod
+    def _dump_prices(entries: List[Tuple[PriceKey, int, bytes]]) -> bytes:
+        writer = _Writer()
+        writer.pack("I", len(entries))
+        for key, position, data in entries:
+            writer.pack("B", len(key))
+            for part in key:
+                writer.string(part)
+            # Tampon circulaire de la fenêtre remis dans l'ordre d'arrivée
+            size = len(data) // 4
+            if position > size:
+                start = position % size * 4
+                data = data[start:] + data[:start]
+            else:
+                data = data[:position * 4]
+            if sys.byteorder != "little":
+                values = array("f", data)
+                values.byteswap()
+                data = values.tobytes()
+            writer.pack("H", len(data) // 4)
+            writer.buffer += data
+        return bytes(writer.buffer)
+
+    @staticmethod
+    def _restore_prices(reader: _Reader, prices: PriceStats):
+        count, = reader.unpack("I")
+        entries = []
+        for _ in range(count):
+            size, = reader.unpack("B")
+            key = tuple(reader.string() for _ in range(size))
+            length, = reader.unpack("H")
+            entries.append((key, reader.unpack(f"{length}f")))
+        prices.restore(entries)
+
+    # Échéances et rythmes des recherches
+    @staticmethod
+    def _dump_schedule(scheduler: Union[SearchScheduler, DomainScheduler]) -> bytes:
+        writer = _Writer()
+        state = scheduler.snapshot()
+        writer.pack("I", len(state))
+        for search_id, (due, interval, rate) in state.items():
+            writer.string(search_id)
+            writer.pack("dff", due, interval, rate)
+        return bytes(writer.buffer)
+
+    @staticmethod
+    def _restore_schedule(reader: _Reader, scheduler: Union[SearchScheduler, DomainScheduler]):
+        count, = reader.unpack("I")
+        state = {}
+        for _ in range(count):
+            search_id = reader.string()
+            state[search_id] = reader.unpack("dff")
+        scheduler.resume(state)
+
+    # Par domaine : débit et concurrence appris, puis cookies de chaque session
+    @staticmethod
+    def _dump_clients(scraper: VintedScraper) -> bytes:
+        writer = _Writer()
+        writer.pack("H", len(scraper.clients))
+        for domain, client in scraper.clients.items():
+            writer.string(domain)
+            writer.pack("ff", client.limiter.rate, client.limiter.concurrency)
+            sessions = client.sessions.export_cookies()
+            writer.pack("H", len(sessions))
+            for proxy, expires_at, cookies in sessions:
+                writer.string(proxy)
+                writer.pack("dH", expires_at, len(cookies))
+                for name, value, cookie_domain, path in cookies:
+                    writer.string(name)
+                    writer.string(value)
+                    writer.string(cookie_domain)
+                    writer.string(path)
+        return bytes(writer.buffer)
+
+    @staticmethod
+    def _restore_clients(reader: _Reader, scraper: VintedScraper):
+        domains, = reader.unpack("H")
+        for _ in range(domains):
+            domain = reader.string()
+            rate, concurrency = reader.unpack("ff")
+            client = scraper.client(domain)
+            client.limiter.restore(rate, concurrency)
+            sessions, = reader.unpack("H")
+            for _ in range(sessions):
+                proxy = reader.string() or None
+                expires_at, count = reader.unpack("dH")
+                cookies = [(reader.string(), reader.string(), reader.string(), reader.string()) for _ in range(count)]
+                client.sessions.restore_cookies(proxy, expires_at, cookies)
+
+    # Proxies notés
+    @staticmethod
+    def _dump_proxies(scraper: VintedScraper) -> bytes:
+        manager = scraper.proxy_manager
+        writer = _Writer()
+        writer.pack("dI", manager.last_refresh, len(manager.proxies))
+        for proxy in manager.proxies:
+            score = manager.scores.get(proxy)
+            writer.string(proxy)
+            if score is None:
+                writer.pack("?ffH?", False, 0.0, 0.0, 0, False)
+            else:
+                writer.pack("?ffH?", True, score.success_rate, score.latency, min(score.failures, 0xFFFF), proxy in manager.healthy)
+        return bytes(writer.buffer)
+
+    @staticmethod
+    def _restore_proxies(reader: _Reader, scraper: VintedScraper):
+        if scraper.proxy_manager is None:
+            return
+        last_refresh, count = reader.unpack("dI")
+        proxies: List[str] = []
+        scores: Dict[str, ProxyScore] = {}
+        healthy = set()
+        for _ in range(count):
+            proxy = reader.string()
+            scored, success_rate, latency, failures, is_healthy = reader.unpack("?ffH?")
+            proxies.append(proxy)
+            if scored:
+                score = scores[proxy] = ProxyScore()
+                score.success_rate, score.latency, score.failures = success_rate, latency, failures
+            if is_healthy:
+                healthy.add(proxy)
+        scraper.proxy_manager.restore(proxies, scores, healthy, last_refresh)
+        logger.info(f"{len(healthy)}/{len(proxies)} proxies repris de l'instantané")
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Tuple
+from .listing import ListingRecord
+from .metrics import SPOOL_PENDING
+from core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL,
+    search_item_id TEXT NOT NULL,
+    record BLOB NOT NULL,
+    notified INTEGER NOT NULL DEFAULT 0,
+    stored INTEGER NOT NULL DEFAULT 0,  -- 0 à écrire, 1 écrite, 2 abandonnée (dead letter)
+    created REAL NOT NULL,
+    UNIQUE (item_id, search_item_id)
+);
+CREATE INDEX IF NOT EXISTS spool_to_notify ON spool (seq) WHERE notified = 0;
+CREATE INDEX IF NOT EXISTS spool_to_store ON spool (seq) WHERE stored = 0;
+"""
+
+
+class ItemSpool:
+    """
+    Journal local (SQLite en WAL) entre la récupération et les étapes aval. Les nouvelles
+    annonces y sont validées avant toute notification ou écriture MySQL ; chaque étape
+    relit ce qui lui reste et le marque une fois fait. Ce qui n'est pas marqué au moment
+    d'un arrêt est rejoué au démarrage suivant (au moins une fois). La clé
+    (item_id, search_item_id) rend un ajout répété sans effet. Une annonce que la base
+    refuse durablement est écartée (dead letter) au lieu de bloquer les écritures suivantes.
+    """
+
+    def __init__(self, path: str = settings.SPOOL_PATH):
+        self.path = path
+        self.db: sqlite3.Connection = None
+        self.appended = asyncio.Event()  # Levé à chaque ajout, pour le relais des notifications
+        self.to_notify = 0
+        self.to_store = 0
+        self._notify_cursor = 0  # Dernier seq remis au notifier par ce processus
+        self._lock = threading.Lock()
+        SPOOL_PENDING.set_function(lambda: self.to_notify, stage="notify")
+        SPOOL_PENDING.set_function(lambda: self.to_store, stage="store")
+
+    def _open(self):
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.to_notify = self.db.execute("SELECT COUNT(*) FROM spool WHERE notified = 0").fetchone()[0]
+        self.to_store = self.db.execute("SELECT COUNT(*) FROM spool WHERE stored = 0").fetchone()[0]
+
+    async def _run(self, function, *args):
+        """Exécute une opération SQLite hors de la boucle d'événements, une à la fois"""
+        def locked():
+            with self._lock:
+                return function(*args)
+        return await asyncio.to_thread(locked)
+
+    async def open(self):
+        await self._run(self._open)
+        if self.to_notify or self.to_store:
+            logger.info(f"Spool {self.path} : {self.to_notify} notifications et {self.to_store} écritures à rejouer")
+            self.appended.set()
+
+    async def close(self):
+        if self.db:
+            await self._run(self.db.close)
+            self.db = None
+
+    def _append(self, items: List[ListingRecord], notified: bool) -> int:
+        now = time.time()
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO spool (item_id, search_item_id, record, notified, created) VALUES (?, ?, ?, ?, ?)",
+                [(item.id, item.search_item_id, item.pack(), int(notified), now) for item in items]
+            )
+            return self.db.total_changes - before
+
+    async def append(self, items: List[ListingRecord], notified: bool = False) -> int:
+        """
+        Valide des annonces dans le journal ; retourne le nombre de lignes réellement ajoutées.
+        Avec `notified`, elles sont seulement écrites en base (pas de notification).
+        """
+        if not items:
+            return 0
+        inserted = await self._run(self._append, items, notified)
+        self.to_store += inserted
+        if not notified:
+            self.to_notify += inserted
+            self.appended.set()
+        return inserted
+
+    def _claim_notifications(self, limit: int) -> List[Tuple[int, bytes]]:
+        return self.db.execute(
+            "SELECT seq, record FROM spool WHERE notified = 0 AND seq > ? ORDER BY seq LIMIT ?",
+            (self._notify_cursor, limit)
+        ).fetchall()
+
+    async def claim_notifications(self, limit: int = settings.SPOOL_BATCH_SIZE) -> List[ListingRecord]:
+        """Annonces pas encore remises au notifier par ce processus (toutes celles non notifiées au démarrage)"""
+        rows = await self._run(self._claim_notifications, limit)
+        if rows:
+            self._notify_cursor = rows[-1][0]
+        return [ListingRecord.unpack(record) for _, record in rows]
+
+    def _mark_notified(self, item_ids: List[int], cursor: int) -> int:
+        placeholders = ", ".join("?" * len(item_ids))
+        with self.db:
+            return self.db.execute(
+                f"UPDATE spool SET notified = 1 WHERE notified = 0 AND seq <= ? AND item_id IN ({placeholders})",
+                [cursor, *item_ids]
+            ).rowcount
+
+    async def mark_notified(self, item_ids: List[int]):
+        """Marque comme notifiées les lignes déjà remises de ces annonces (toutes recherches confondues)"""
+        if item_ids:
+            self.to_notify -= await self._run(self._mark_notified, list(item_ids), self._notify_cursor)
+
+    def _claim_writes(self, limit: int) -> List[Tuple[int, bytes]]:
+        return self.db.execute(
+            "SELECT seq, record FROM spool WHERE stored = 0 ORDER BY seq LIMIT ?", (limit,)
+        ).fetchall()
+
+    async def claim_writes(self, limit: int = settings.WRITE_BATCH_SIZE) -> List[Tuple[int, ListingRecord]]:
+        """Plus anciennes annonces non encore écrites en base, avec leur seq"""
+        rows = await self._run(self._claim_writes, limit)
+        return [(seq, ListingRecord.unpack(record)) for seq, record in rows]
+
+    def _mark_stored(self, seqs: List[int]) -> int:
+        placeholders = ", ".join("?" * len(seqs))
+        with self.db:
+            return self.db.execute(
+                f"UPDATE spool SET stored = 1 WHERE stored = 0 AND seq IN ({placeholders})", seqs
+            ).rowcount
+
+    async def mark_stored(self, seqs: List[int]):
+        if seqs:
+            self.to_store -= await self._run(self._mark_stored, list(seqs))
+
+    def _mark_dead(self, seqs: List[int]) -> int:
+        placeholders = ", ".join("?" * len(seqs))
+        with self.db:
+            return self.db.execute(
+                f"UPDATE spool SET stored = 2 WHERE stored = 0 AND seq IN ({placeholders})", seqs
+            ).rowcount
+
+    async def mark_dead(self, seqs: List[int]):
+        """Abandonne l'écriture de ces lignes ; elles partent au prochain `purge` une fois notifiées"""
+        if seqs:
+            self.to_store -= await self._run(self._mark_dead, list(seqs))
+
+    def _purge(self) -> int:
+        with self.db:
+            return self.db.execute("DELETE FROM spool WHERE notified = 1 AND stored != 0").rowcount
+
+    async def purge(self) -> int:
+        """Supprime les lignes notifiées et écrites (ou abandonnées)"""
+        return await self._run(self._purge)
+
+    # Gestionnaire de contexte asynchrone
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
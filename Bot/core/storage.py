@@ -1,11 +1,182 @@
 import aiomysql
-from typing import List, Dict, Optional, AsyncIterator
+from typing import List, Dict, Optional, AsyncIterator, Set, Tuple, TypedDict
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-import uuid
+from datetime import datetime
+import logging
+import time
+from core.config import settings
+from core.metrics import DB_POOL_WAIT_SECONDS, DB_QUERY_SECONDS, DEDUP_LOOKUPS
+from core.listing import ListingRecord
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Entrée du cache des vus : (recherche, identifiant Vinted)
+SeenKey = Tuple[str, int]
+
+
+class SeenCache:
+    """
+    Ensemble borné (LRU + TTL) des annonces déjà vues, par recherche : une annonce
+    remise à une recherche reste nouvelle pour les autres recherches qu'elle satisfait
+    """
+
+    def __init__(self, max_size: int = settings.SEEN_CACHE_SIZE, ttl: float = settings.SEEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[SeenKey, float]" = OrderedDict()
+
+    def __contains__(self, key: SeenKey) -> bool:
+        seen_at = self._entries.get(key)
+        if seen_at is None:
+            return False
+        if time.monotonic() - seen_at > self.ttl:
+            del self._entries[key]
+            return False
+        self._entries.move_to_end(key)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: SeenKey):
+        self._entries[key] = time.monotonic()
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: SeenKey):
+        self._entries.pop(key, None)
+
+    def copy(self) -> Tuple[float, List[SeenKey], List[float]]:
+        """
+        Copie rapide des clés (recherche, identifiant) et de leurs dates monotones, des moins aux
+        plus récemment vues, avec le décalage à ajouter aux dates pour obtenir des dates epoch
+        """
+        return time.time() - time.monotonic(), list(self._entries), list(self._entries.values())
+
+    def restore(self, entries: List[Tuple[SeenKey, float]]):
+        """Recharge des entrées ((recherche, identifiant), date epoch), sans effacer les présentes"""
+        offset = time.time() - time.monotonic()
+        for key, seen_at in entries:
+            self._entries[key] = seen_at - offset
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class SearchConfig(TypedDict):
+    """Recherche telle que lue dans SearchItem, tags déjà découpés"""
+    search_item_id: str
+    search_text: str
+    min_price: Optional[float]
+    max_price: Optional[float]
+    tags: List[str]
+    domain: str
+    priority: int
+    min_interval: Optional[int]
+    max_interval: Optional[int]
+    min_discount: Optional[int]
+    user_id: str
+    updated_at: datetime
+
+
+class ConfigDiff:
+    """
+    Recherches ajoutées, supprimées et modifiées lors d'un rafraîchissement, et changement
+    des webhooks Discord (sans effet sur les recherches elles-mêmes)
+    """
+
+    def __init__(self, added: List[str] = None, removed: List[str] = None, changed: List[str] = None, webhooks: bool = False):
+        self.added = added or []
+        self.removed = removed or []
+        self.changed = changed or []
+        self.webhooks = webhooks
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self) -> str:
+        return f"+{len(self.added)} -{len(self.removed)} ~{len(self.changed)}"
+
+
+class ConfigCache:
+    """
+    Garde les SearchConfig parsées en mémoire. Un rafraîchissement ne lit que l'empreinte
+    COUNT(*)/MAX(updatedAt)/somme des CRC32(id, updatedAt) de la table, puis uniquement les
+    lignes modifiées depuis le MAX(updatedAt) précédent (inclus) si elle a changé. La somme
+    révèle une modification datée de la même seconde que la lecture précédente ; les lignes
+    relues sans changement ne figurent pas dans le diff. Une empreinte changée que cette
+    lecture partielle n'explique pas (date antérieure écrite par une transaction lente)
+    entraîne une relecture complète.
+    L'empreinte de DiscordWebhook signale en plus l'ajout ou la modification d'un webhook.
+    """
+
+    def __init__(self, storage: "VintedStorage"):
+        self.storage = storage
+        self.configs: Dict[str, SearchConfig] = {}
+        self.fingerprint: Optional[Tuple[int, Optional[datetime], int]] = None
+        self.webhook_fingerprint: Optional[Tuple[int, int]] = None
+
+    def values(self) -> List[SearchConfig]:
+        return list(self.configs.values())
+
+    async def refresh(self) -> ConfigDiff:
+        """Met le cache à jour et retourne les différences constatées"""
+        diff = ConfigDiff()
+        webhook_fingerprint = await self.storage.get_webhook_fingerprint()
+        diff.webhooks = self.webhook_fingerprint is not None and webhook_fingerprint != self.webhook_fingerprint
+        self.webhook_fingerprint = webhook_fingerprint
+
+        fingerprint = await self.storage.get_search_fingerprint()
+        if fingerprint == self.fingerprint:
+            return diff
+
+        total, _, _ = fingerprint
+        last_update = self.fingerprint[1] if self.fingerprint else None
+
+        complete = False
+        if last_update is not None:
+            self._apply(await self.storage.get_search_configs(updated_since=last_update), diff)
+            # Des lignes ont disparu ou sont apparues : seule une lecture des identifiants permet de savoir lesquelles
+            existing = await self.storage.get_search_ids() if len(self.configs) != total else None
+            if existing is not None:
+                self._remove_missing(existing, diff)
+            # Empreinte changée sans modification visible, ou ligne inconnue : une transaction plus
+            # lente a écrit une date antérieure au MAX(updatedAt) précédent
+            complete = bool(diff) and (existing is None or existing <= self.configs.keys())
+        if not complete:
+            rows = await self.storage.get_search_configs()
+            self._apply(rows, diff)
+            self._remove_missing({row['search_item_id'] for row in rows}, diff)
+
+        self.fingerprint = fingerprint
+        return diff
+
+    def _apply(self, rows: List[SearchConfig], diff: ConfigDiff):
+        for config in rows:
+            search_id = config['search_item_id']
+            previous = self.configs.get(search_id)
+            if previous is None:
+                diff.added.append(search_id)
+            elif previous != config and search_id not in diff.changed:
+                diff.changed.append(search_id)
+            self.configs[search_id] = config
+
+    def _remove_missing(self, existing: Set[str], diff: ConfigDiff):
+        for search_id in [sid for sid in self.configs if sid not in existing]:
+            del self.configs[search_id]
+            diff.removed.append(search_id)
+
 
 class VintedStorage:
     def __init__(self):
         self.pool: Optional[aiomysql.Pool] = None
+        self.seen = SeenCache()
+        self._webhook_routes: Optional[Dict[str, List[Dict]]] = None
+        self._last_webhook_routes: Optional[Dict[str, List[Dict]]] = None  # Survit à l'invalidation
+        self._webhook_routes_expire_at = 0.0
 
     async def connect(self, **kwargs):
         """Établit le pool de connexions"""
@@ -28,83 +199,289 @@ class VintedStorage:
             self.pool = None
 
     @asynccontextmanager
-    async def get_cursor(self) -> AsyncIterator[aiomysql.Cursor]:
-        """Gestionnaire de contexte pour les curseurs"""
+    async def get_cursor(self, operation: str = "query") -> AsyncIterator[aiomysql.Cursor]:
+        """
+        Gestionnaire de contexte pour les curseurs. L'attente d'une connexion libre et la
+        durée de l'accès lui-même sont mesurées séparément, par `operation`.
+        """
         if not self.pool:
             raise RuntimeError("Pool de connexion non initialisé")
         
+        started = time.perf_counter()
         async with self.pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                yield cur
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started, operation=operation)
+            with DB_QUERY_SECONDS.time(operation=operation):
+                async with conn.cursor(aiomysql.DictCursor) as cur:
+                    yield cur
 
-    async def is_new(self, item_url: str) -> bool:
-        """Vérifie si un item existe déjà"""
-        async with self.get_cursor() as cur:
+    async def load_seen(self):
+        """Pré-remplit le cache des items vus avec les plus récents de la table Item"""
+        async with self.get_cursor("load_seen") as cur:
             await cur.execute(
-                "SELECT 1 FROM Item WHERE url = %s LIMIT 1",
-                (item_url,)
+                "SELECT vintedId, searchItemId FROM Item WHERE vintedId IS NOT NULL ORDER BY createdAt DESC LIMIT %s",
+                (self.seen.max_size,)
             )
-            return await cur.fetchone() is None
+            rows = await cur.fetchall()
+        # Du plus ancien au plus récent pour conserver l'ordre LRU
+        for row in reversed(rows):
+            self.seen.add((row['searchItemId'], int(row['vintedId'])))
+        logger.info(f"{len(self.seen)} items déjà vus chargés en cache")
+
+    async def filter_new(self, items: List[ListingRecord]) -> List[ListingRecord]:
+        """
+        Retourne les items (déjà attribués à leur recherche) jamais vus pour cette recherche :
+        le cache mémoire élimine la plupart des doublons, les inconnus restants sont vérifiés
+        en une seule requête groupée. Les items retournés sont immédiatement marqués comme vus.
+        Si MySQL ne répond pas, le cache seul fait foi (l'upsert de `batch_save` absorbe un
+        éventuel doublon).
+        """
+        candidates: Dict[SeenKey, ListingRecord] = {}
+        for item in items:
+            key = (item.search_item_id, item.id)
+            if key not in self.seen:
+                candidates.setdefault(key, item)
+        DEDUP_LOOKUPS.inc(len(items) - len(candidates), source="cache")
+
+        if not candidates:
+            return []
+
+        item_ids = list({item_id for _, item_id in candidates})
+        placeholders = ", ".join(["%s"] * len(item_ids))
+        try:
+            async with self.get_cursor("filter_new") as cur:
+                await cur.execute(
+                    f"SELECT vintedId, searchItemId FROM Item WHERE vintedId IN ({placeholders})",
+                    item_ids
+                )
+                known = {(row['searchItemId'], int(row['vintedId'])) for row in await cur.fetchall()}
+        except Exception as e:
+            logger.warning(f"Vérification des doublons en base impossible, cache seul utilisé : {str(e)}")
+            known = set()
 
-    async def batch_save(self, items: List[Dict]):
-        """Sauvegarde plusieurs items en une seule opération"""
+        new_items = []
+        for key, item in candidates.items():
+            self.seen.add(key)
+            if key not in known:
+                new_items.append(item)
+        DEDUP_LOOKUPS.inc(len(candidates) - len(new_items), source="db")
+        DEDUP_LOOKUPS.inc(len(new_items), source="new")
+        return new_items
+
+    async def batch_save(self, items: List[ListingRecord]):
+        """
+        Enregistre les items en un INSERT multi-lignes par tranche de WRITE_BATCH_SIZE.
+        Un item déjà présent pour la même recherche (même identifiant Vinted) est mis à jour
+        au lieu de faire échouer le lot ; chaque recherche satisfaite a sa propre ligne.
+        """
         if not items:
             return
 
-        values = []
-        for item in items:
-            photo = item.get('photo', {})
-            user = item.get('user', {})
-            values.append((
-                str(uuid.uuid4()),  # Génère un nouvel UUID
-                photo.get('full_size_url') or photo.get('url', ''),
-                item.get('title', ''),
-                item.get('status', 'inconnu'),
-                item.get('size_title', 'inconnu'),
-                float(item['price']['amount']),
-                user.get('login', 'inconnu'),
-                f"https://www.vinted.fr{item['path']}",
-                item['search_item_id']
-            ))
-        
-        async with self.get_cursor() as cur:
-            await cur.executemany(
-                """
-                INSERT INTO Item 
-                (id, imageUrl, name, `condition`, size, price, sellerName, url, searchItemId, updatedAt)
-                VALUES 
-                (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                """,
-                values
-            )
+        for start in range(0, len(items), settings.WRITE_BATCH_SIZE):
+            chunk = items[start:start + settings.WRITE_BATCH_SIZE]
+            values = []
+            for item in chunk:
+                values.extend((
+                    item.id,
+                    item.photo_url or '',
+                    item.title,
+                    item.status or 'inconnu',
+                    item.size or 'inconnu',
+                    item.price,
+                    item.seller_login or 'inconnu',
+                    item.url,
+                    item.search_item_id
+                ))
+            rows = ", ".join(["(UUID(), %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())"] * len(chunk))
 
-    async def get_search_configs(self) -> List[Dict]:
-        """Récupère les configurations de recherche"""
-        async with self.get_cursor() as cur:
-            await cur.execute("""
-                SELECT id, searchText as searchText, maxPrice as maxPrice, minPrice as minPrice, tags as tags 
-                FROM SearchItem
-            """)
+            async with self.get_cursor("batch_save") as cur:
+                await cur.execute(
+                    f"""
+                    INSERT INTO Item
+                    (id, vintedId, imageUrl, name, `condition`, size, price, sellerName, url, searchItemId, updatedAt)
+                    VALUES {rows}
+                    ON DUPLICATE KEY UPDATE
+                    imageUrl = VALUES(imageUrl), name = VALUES(name), price = VALUES(price), updatedAt = VALUES(updatedAt)
+                    """,
+                    values
+                )
+
+    async def get_search_configs(self, updated_since: Optional[datetime] = None) -> List[SearchConfig]:
+        """Récupère les configurations de recherche (seulement celles modifiées depuis `updated_since` si fourni)"""
+        query = """
+            SELECT id, searchText as searchText, maxPrice as maxPrice, minPrice as minPrice, tags as tags,
+                   domain as domain, priority as priority, minInterval as minInterval, maxInterval as maxInterval,
+                   minDiscount as minDiscount, userId as userId, updatedAt as updatedAt
+            FROM SearchItem
+        """
+        params = ()
+        if updated_since is not None:
+            query += " WHERE updatedAt >= %s"
+            params = (updated_since,)
+
+        async with self.get_cursor("get_search_configs") as cur:
+            await cur.execute(query, params)
             return [
                 {
                     "search_text": item['searchText'],
                     "max_price": item['maxPrice'],
                     "min_price": item['minPrice'],
                     "tags": item['tags'].split(',') if item['tags'] else [],
-                    "search_item_id": item['id']
+                    "domain": item['domain'] or settings.DEFAULT_DOMAIN,
+                    "priority": item['priority'],
+                    "min_interval": item['minInterval'],
+                    "max_interval": item['maxInterval'],
+                    "min_discount": item['minDiscount'],
+                    "search_item_id": item['id'],
+                    "user_id": item['userId'],
+                    "updated_at": item['updatedAt']
                 }
                 for item in await cur.fetchall()
             ]
-            
-    async def get_discord_webhooks(self) -> List[Dict]:
-        """Récupère tous les webhooks Discord configurés"""
-        async with self.get_cursor() as cur:
-            await cur.execute("""
-                SELECT url FROM DiscordWebhook
-            """)
-            return [{"url": row["url"]} for row in await cur.fetchall()]
+
+    async def get_price_history(self, limit: int = settings.PRICE_BOOTSTRAP_ROWS) -> List[ListingRecord]:
+        """Prix des Item les plus récents (du plus ancien au plus récent), pour amorcer PriceStats"""
+        async with self.get_cursor("get_price_history") as cur:
+            await cur.execute(
+                "SELECT searchItemId, price FROM Item ORDER BY createdAt DESC LIMIT %s",
+                (limit,)
+            )
+            rows = await cur.fetchall()
+        # Sans marque en base, seules les clés par recherche sont amorcées
+        return [
+            ListingRecord(id=0, title="", price=float(row['price']), currency="", url="", search_item_id=row['searchItemId'])
+            for row in reversed(rows)
+        ]
+
+    async def get_search_fingerprint(self) -> Tuple[int, Optional[datetime], int]:
+        """Empreinte peu coûteuse de la table SearchItem : (nombre de lignes, dernière modification, somme des CRC32)"""
+        async with self.get_cursor("get_search_fingerprint") as cur:
+            await cur.execute(
+                """
+                SELECT COUNT(*) AS total, MAX(updatedAt) AS lastUpdate,
+                       COALESCE(SUM(CRC32(CONCAT_WS(':', id, updatedAt))), 0) AS checksum
+                FROM SearchItem
+                """
+            )
+            row = await cur.fetchone()
+            return row['total'], row['lastUpdate'], int(row['checksum'])
+
+    async def get_search_ids(self) -> Set[str]:
+        """Identifiants de toutes les recherches existantes"""
+        async with self.get_cursor("get_search_ids") as cur:
+            await cur.execute("SELECT id FROM SearchItem")
+            return {row['id'] for row in await cur.fetchall()}
+
+    async def get_webhook_fingerprint(self) -> Tuple[int, int]:
+        """Empreinte de la table DiscordWebhook (sans date de modification) : nombre de lignes et somme des CRC32"""
+        async with self.get_cursor("get_webhook_fingerprint") as cur:
+            await cur.execute(
+                "SELECT COUNT(*) AS total, COALESCE(SUM(CRC32(CONCAT_WS(':', userId, url))), 0) AS checksum FROM DiscordWebhook"
+            )
+            row = await cur.fetchone()
+            return row['total'], int(row['checksum'])
+
+    async def get_webhook_routes(self) -> Dict[str, List[Dict]]:
+        """
+        Associe chaque recherche aux webhooks de son propriétaire. Le résultat est
+        gardé en cache jusqu'à `invalidate_webhook_routes` ou WEBHOOK_ROUTES_TTL ;
+        si MySQL ne répond pas, les dernières routes lues restent utilisées.
+        """
+        if self._webhook_routes is not None and time.monotonic() < self._webhook_routes_expire_at:
+            return self._webhook_routes
+
+        try:
+            async with self.get_cursor("get_webhook_routes") as cur:
+                await cur.execute("""
+                    SELECT s.id AS searchItemId, w.url AS url
+                    FROM SearchItem s
+                    JOIN DiscordWebhook w ON w.userId = s.userId
+                """)
+                routes: Dict[str, List[Dict]] = {}
+                for row in await cur.fetchall():
+                    routes.setdefault(row['searchItemId'], []).append({"url": row['url']})
+        except Exception as e:
+            if self._last_webhook_routes is None:
+                raise
+            logger.warning(f"Routes de notification non relues, dernières connues utilisées : {str(e)}")
+            return self._last_webhook_routes
+
+        self._webhook_routes = self._last_webhook_routes = routes
+        self._webhook_routes_expire_at = time.monotonic() + settings.WEBHOOK_ROUTES_TTL
+        return routes
+
+    def invalidate_webhook_routes(self):
+        """Force le rechargement des routes de notification"""
+        self._webhook_routes = None
         
 
+    async def heartbeat_worker(self, worker_id: str):
+        """Signale qu'une instance du Bot est vivante"""
+        async with self.get_cursor("heartbeat_worker") as cur:
+            await cur.execute(
+                """
+                INSERT INTO BotWorker (id, heartbeatAt) VALUES (%s, NOW(3))
+                ON DUPLICATE KEY UPDATE heartbeatAt = NOW(3)
+                """,
+                (worker_id,)
+            )
+
+    async def get_live_workers(self, ttl: float) -> List[str]:
+        """Instances ayant donné signe de vie depuis moins de `ttl` secondes"""
+        async with self.get_cursor("get_live_workers") as cur:
+            await cur.execute(
+                "SELECT id FROM BotWorker WHERE heartbeatAt > NOW(3) - INTERVAL %s SECOND ORDER BY id",
+                (ttl,)
+            )
+            return [row['id'] for row in await cur.fetchall()]
+
+    async def claim_leases(self, worker_id: str, keys: List[str], ttl: float):
+        """
+        Prend ou prolonge les baux des clés données. Un bail détenu par une autre
+        instance n'est repris qu'après son expiration.
+        """
+        if not keys:
+            return
+        async with self.get_cursor("claim_leases") as cur:
+            # Même condition pour les deux affectations : le résultat ne dépend pas de l'ordre
+            # d'évaluation (MySQL voit le workerId déjà mis à jour, SQLite l'ancienne ligne)
+            await cur.executemany(
+                """
+                INSERT INTO SearchLease (searchKey, workerId, expiresAt)
+                VALUES (%s, %s, NOW(3) + INTERVAL %s SECOND)
+                ON DUPLICATE KEY UPDATE
+                    workerId = IF(expiresAt < NOW(3) OR workerId = VALUES(workerId), VALUES(workerId), workerId),
+                    expiresAt = IF(expiresAt < NOW(3) OR workerId = VALUES(workerId), VALUES(expiresAt), expiresAt)
+                """,
+                [(key, worker_id, ttl) for key in keys]
+            )
+
+    async def get_held_leases(self, worker_id: str) -> Set[str]:
+        """Clés dont l'instance détient un bail valide"""
+        async with self.get_cursor("get_held_leases") as cur:
+            await cur.execute(
+                "SELECT searchKey FROM SearchLease WHERE workerId = %s AND expiresAt > NOW(3)",
+                (worker_id,)
+            )
+            return {row['searchKey'] for row in await cur.fetchall()}
+
+    async def release_leases(self, worker_id: str, keys: Optional[List[str]] = None):
+        """Libère les baux donnés (tous si `keys` est None)"""
+        if keys is not None and not keys:
+            return
+        query = "DELETE FROM SearchLease WHERE workerId = %s"
+        params = [worker_id]
+        if keys is not None:
+            query += f" AND searchKey IN ({', '.join(['%s'] * len(keys))})"
+            params.extend(keys)
+        async with self.get_cursor("release_leases") as cur:
+            await cur.execute(query, params)
+
+    async def remove_worker(self, worker_id: str):
+        """Retire une instance et libère ses baux (arrêt propre)"""
+        await self.release_leases(worker_id)
+        async with self.get_cursor("remove_worker") as cur:
+            await cur.execute("DELETE FROM BotWorker WHERE id = %s", (worker_id,))
+
     # Gestionnaire de contexte asynchrone
     async def __aenter__(self):
         return self
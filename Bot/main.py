@@ -1,14 +1,186 @@
 import asyncio
 import os
-from core.storage import VintedStorage
+from typing import Dict, List, Optional, Union
+from core.storage import VintedStorage, ConfigCache
 from core.scraper import VintedScraper
 from core.notifier import DiscordNotifier
+from core.item_writer import ItemWriter
+from core.spool import ItemSpool
+from core.snapshot import StateSnapshot
+from core.pricing import PriceStats, is_deal
+from core.reposts import RepostDetector
+from core.sharding import ShardCoordinator
+from core.change_feed import ChangeFeed
+from core.scheduler import DomainScheduler, SearchHandler, SearchScheduler, group_searches, route_items
 from core.config import settings
+from core.metrics import DEALS_FILTERED, ITEMS_FETCHED, ITEMS_NEW, serve_metrics
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def make_search_handler(
+    storage: VintedStorage,
+    scraper: VintedScraper,
+    spool: ItemSpool,
+    reposts: Optional[RepostDetector] = None,
+    prices: Optional[PriceStats] = None
+) -> SearchHandler:
+    """Construit le traitement d'un groupe de recherches arrivé à échéance"""
+    async def process_search(group: Dict):
+        """Une requête pour le groupe, puis répartition locale entre ses recherches"""
+        items = await scraper.fetch(group)
+        ITEMS_FETCHED.inc(len(items))
+        # Répartition avant déduplication : une annonce déjà remise à une recherche
+        # (d'un autre groupe ou d'un autre utilisateur) reste nouvelle pour les autres
+        new_items = await storage.filter_new(route_items(group, items))
+        ITEMS_NEW.inc(len(new_items))
+        if reposts and new_items:
+            # Détection faite une fois par annonce, quel que soit le nombre de recherches servies
+            listings = list({item.id: item for item in new_items}.values())
+            kept = {item.id for item in await reposts.filter(listings)}
+            new_items = [item for item in new_items if item.id in kept]
+        
+        if new_items:
+            if prices:
+                prices.score(new_items)
+            thresholds = {member['search_item_id']: member.get('min_discount') for member in group['members']}
+            deals, others = [], []
+            for item in new_items:
+                (deals if is_deal(item, thresholds.get(item.search_item_id)) else others).append(item)
+            DEALS_FILTERED.inc(len(others))
+            # Validées localement d'abord : notification et écriture MySQL repartent du spool
+            await spool.append(deals)
+            # Sous le seuil : enregistrées sans notification, l'historique des prix reste complet
+            await spool.append(others, notified=True)
+        # Annonces dédupliquées et au spool : le point de reprise peut avancer
+        scraper.commit(group['search_item_id'])
+        # Le rythme des annonces nouvelles (une fois chacune, quel que soit le nombre de
+        # recherches servies) règle l'intervalle du prochain passage
+        return len({item.id for item in new_items})
+
+    return process_search
+
+async def relay_notifications(
+    spool: ItemSpool,
+    storage: VintedStorage,
+    notifier: DiscordNotifier,
+    retry_interval: float = 5
+):
+    """
+    Remet au notifier les annonces du spool pas encore notifiées, dans l'ordre d'arrivée.
+    Tant que des annonces attendent un webhook, le relais se réveille toutes les
+    `retry_interval` secondes pour les retenter avec les routes relues.
+    """
+    while True:
+        spool.appended.clear()
+        try:
+            # Routes lues avant de prélever : un échec laisse les annonces dans le spool
+            routes = await storage.get_webhook_routes()
+            items = await spool.claim_notifications()
+        except Exception as e:
+            logger.error(f"Relais des notifications suspendu : {str(e)}")
+            await asyncio.sleep(retry_interval)
+            continue
+        if items or notifier.unrouted:
+            # Chaque annonce part uniquement vers le webhook du propriétaire de la recherche
+            await notifier.dispatch(items, routes)
+        if not items:
+            if notifier.unrouted:
+                await wait_any([spool.appended], retry_interval)
+            else:
+                await spool.appended.wait()
+
+async def refresh_configs(
+    storage: VintedStorage,
+    scraper: VintedScraper,
+    notifier: DiscordNotifier,
+    scheduler: Union[SearchScheduler, DomainScheduler],
+    interval: float = settings.CONFIG_REFRESH_INTERVAL,
+    shard: Optional[ShardCoordinator] = None,
+    feed: Optional[ChangeFeed] = None
+):
+    """
+    Relit les recherches quand la table change et met à jour le planificateur : tout de suite
+    sur un événement du flux de l'Api ou une nouvelle répartition, sinon toutes les `interval` secondes
+    (CHANGE_FEED_FALLBACK_INTERVAL tant que le flux est connecté).
+    """
+    config_cache = ConfigCache(storage)
+    wakeups = [event for event in (shard.changed if shard else None, feed.changed if feed else None) if event]
+    while True:
+        if feed:
+            # Effacé avant la lecture : un événement arrivé pendant celle-ci en relance une
+            feed.changed.clear()
+        try:
+            diff = await config_cache.refresh()
+            reassigned = shard is not None and shard.changed.is_set()
+            if diff.added or diff.removed or diff.webhooks:
+                storage.invalidate_webhook_routes()
+            if diff.webhooks:
+                logger.info("Webhooks Discord modifiés : routes de notification relues")
+            if diff or reassigned:
+                groups = group_searches(config_cache.values())
+                if shard:
+                    shard.changed.clear()
+                    shard.assign([group['search_item_id'] for group in groups])
+                    groups = [group for group in groups if shard.owns(group['search_item_id'])]
+                for group_id in scheduler.update(groups):
+                    scraper.forget(group_id)
+                logger.info(f"Recherches mises à jour ({diff}) : {len(config_cache.configs)} recherches, {len(groups)} requêtes pour cette instance")
+            logger.info(f"{scheduler.pending} recherches en attente, {notifier.queue_depth} notifications en file")
+        except Exception as e:
+            logger.error(f"Erreur: {str(e)}")
+
+        timeout = settings.CHANGE_FEED_FALLBACK_INTERVAL if feed and feed.connected else interval
+        await wait_any(wakeups, timeout)
+
+async def wait_any(events: List[asyncio.Event], timeout: float):
+    """Attend qu'un des événements soit levé, au plus `timeout` secondes"""
+    if not events:
+        await asyncio.sleep(timeout)
+        return
+    waiters = [asyncio.create_task(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+async def run_bot(
+    storage: VintedStorage,
+    scraper: VintedScraper,
+    notifier: DiscordNotifier,
+    spool: ItemSpool,
+    scheduler: Optional[Union[SearchScheduler, DomainScheduler]] = None,
+    reposts: Optional[RepostDetector] = None,
+    refresh_interval: float = settings.CONFIG_REFRESH_INTERVAL,
+    shard: Optional[ShardCoordinator] = None,
+    feed: Optional[ChangeFeed] = None,
+    snapshot: Optional[StateSnapshot] = None,
+    prices: Optional[PriceStats] = None
+):
+    """Boucle de surveillance : planificateur, relais des notifications et rafraîchissement des recherches, jusqu'à annulation"""
+    if scheduler is None:
+        # Un planificateur (budget et workers) par domaine Vinted
+        handler = make_search_handler(storage, scraper, spool, reposts, prices)
+        scheduler = DomainScheduler(lambda domain: SearchScheduler(handler, domain=domain))
+    if snapshot:
+        # Avant la première lecture des recherches : elles reprennent leurs échéances
+        snapshot.restore(storage, scraper, scheduler, prices)
+    logger.info("Monitoring started...")
+    tasks = [
+        scheduler.run(),
+        relay_notifications(spool, storage, notifier),
+        refresh_configs(storage, scraper, notifier, scheduler, refresh_interval, shard, feed)
+    ]
+    if shard:
+        tasks.append(shard.run())
+    if feed:
+        tasks.append(feed.run())
+    if snapshot:
+        tasks.append(snapshot.run(storage, scraper, scheduler, prices))
+    await asyncio.gather(*tasks)
+
 async def main():
     # Configuration
     db_config = {
@@ -22,42 +194,38 @@ async def main():
     # Initialisation avec gestion de contexte
     storage = VintedStorage()
     await storage.connect(**db_config)
+    snapshot = StateSnapshot() if settings.SNAPSHOT_PATH else None
+    if snapshot:
+        await asyncio.to_thread(snapshot.load)
+    # Le cache des vus de l'instantané évite de relire la table Item
+    if not (snapshot and snapshot.has_seen):
+        await storage.load_seen()
+    prices = PriceStats()
+    if not (snapshot and snapshot.has_prices):
+        prices.observe(await storage.get_price_history())
     
+    metrics_runner = await serve_metrics(settings.METRICS_HOST, settings.METRICS_PORT) if settings.METRICS_PORT else None
+    reposts = RepostDetector() if settings.REPOST_DETECTION else None
+
     try:
-        async with VintedScraper() as scraper:
-            logger.info("Monitoring started...")
-            
-            while True:
-                try:
-                    configs = await storage.get_search_configs()
-                    if not configs:
-                        await asyncio.sleep(settings.CHECK_INTERVAL)
-                        continue
-                    
-                    for config in configs:
-                        items = await scraper.fetch(config)
-                        new_items = [
-                            item for item in items 
-                            if await storage.is_new(f"https://www.vinted.fr{item['path']}")
-                        ]
-                        
-                        if new_items:
-                            await storage.batch_save(new_items)
-                            webhooks = await storage.get_discord_webhooks()
-                            notifier = DiscordNotifier(webhooks, scraper.proxy_manager if settings.USE_PROXIES else None)
-                            
-                            # Envoie les notifications en parallèle
-                            tasks = [notifier.send_to_all(item) for item in new_items]
-                            await asyncio.gather(*tasks)
-                    
-                    await asyncio.sleep(settings.CHECK_INTERVAL)
-                
-                except Exception as e:
-                    logger.error(f"Erreur: {str(e)}")
-                    await asyncio.sleep(30)
+        if reposts:
+            await reposts.start()
+        async with ItemSpool() as spool, VintedScraper() as scraper, \
+                DiscordNotifier(
+                    proxy_manager=scraper.proxy_manager if settings.USE_PROXIES else None,
+                    on_delivered=spool.mark_notified
+                ) as notifier, \
+                ItemWriter(storage, spool, prices=prices):
+            shard = ShardCoordinator(storage) if settings.SHARDING else None
+            feed = ChangeFeed() if settings.CHANGE_FEED_URL else None
+            await run_bot(storage, scraper, notifier, spool, reposts=reposts, shard=shard, feed=feed, snapshot=snapshot, prices=prices)
     
     finally:
+        if reposts:
+            await reposts.close()
         await storage.close()
+        if metrics_runner:
+            await metrics_runner.cleanup()
 
 if __name__ == "__main__":
     try:
@@ -65,4 +233,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Arrêt propre du bot")
     except Exception as e:
-        logger.error(f"Erreur critique: {str(e)}")
\ No newline at end of file
+        logger.error(f"Erreur critique: {str(e)}")
@@ -0,0 +1,83 @@
+import unittest
+from bench.sqlite_storage import SQLiteStorage
+from core.storage import ConfigCache
+
+
+def _search(search_id: str, text: str = "nike") -> dict:
+    return {"id": search_id, "maxPrice": None, "minPrice": None, "tags": "", "searchText": text, "priority": 1, "userId": "u1"}
+
+
+class ConfigCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.storage = SQLiteStorage()
+        await self.storage.connect()
+        self.storage.seed([{"id": "u1", "email": "u1@example.com"}], [], [_search("s1")])
+        self.cache = ConfigCache(self.storage)
+        await self.cache.refresh()
+
+    async def asyncTearDown(self):
+        await self.storage.close()
+
+    def _set(self, search_id: str, **columns):
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        self.storage.db.execute(f"UPDATE SearchItem SET {assignments} WHERE id = ?", (*columns.values(), search_id))
+
+    def _updated_at(self, search_id: str) -> str:
+        return self.storage.db.execute("SELECT updatedAt FROM SearchItem WHERE id = ?", (search_id,)).fetchone()[0]
+
+    async def test_unchanged_table_gives_an_empty_diff(self):
+        self.assertEqual(list(self.cache.configs), ["s1"])
+        diff = await self.cache.refresh()
+        self.assertFalse(diff)
+        self.assertEqual(str(diff), "+0 -0 ~0")
+
+    async def test_added_changed_and_removed_searches(self):
+        self.storage.seed([], [], [_search("s2", "adidas")])
+        self._set("s2", updatedAt="2999-01-01 00:00:00")
+        diff = await self.cache.refresh()
+        self.assertEqual((diff.added, diff.removed, diff.changed), (["s2"], [], []))
+
+        self._set("s1", searchText="nike air", updatedAt="2999-01-01 00:00:01")
+        diff = await self.cache.refresh()
+        self.assertEqual((diff.added, diff.removed, diff.changed), ([], [], ["s1"]))
+        self.assertEqual(self.cache.configs["s1"]["search_text"], "nike air")
+
+        self.storage.db.execute("DELETE FROM SearchItem WHERE id = 's2'")
+        diff = await self.cache.refresh()
+        self.assertEqual((diff.added, diff.removed, diff.changed), ([], ["s2"], []))
+        self.assertEqual(list(self.cache.configs), ["s1"])
+
+    async def test_edit_within_the_same_second_is_seen_once(self):
+        self.storage.seed([], [], [_search("s2", "adidas")])
+        self._set("s2", updatedAt="2000-01-01 00:00:00")
+        await self.cache.refresh()
+        # s2 modifiée dans la seconde de la dernière modification de s1 : même nombre de
+        # lignes, même MAX(updatedAt), seule la somme des CRC32 change
+        self._set("s2", searchText="adidas samba", updatedAt=self._updated_at("s1"))
+        diff = await self.cache.refresh()
+        # s1, relue (updatedAt >= MAX précédent) mais inchangée, n'est pas signalée
+        self.assertEqual((diff.added, diff.removed, diff.changed), ([], [], ["s2"]))
+        self.assertEqual(self.cache.configs["s2"]["search_text"], "adidas samba")
+        self.assertFalse(await self.cache.refresh())
+
+    async def test_edit_dated_before_the_previous_read_is_seen(self):
+        self.storage.seed([], [], [_search("s2", "adidas")])
+        await self.cache.refresh()
+        # Transaction lente : date antérieure au MAX(updatedAt) déjà lu
+        self._set("s2", searchText="adidas samba", updatedAt="2000-01-01 00:00:00")
+        diff = await self.cache.refresh()
+        self.assertEqual((diff.added, diff.removed, diff.changed), ([], [], ["s2"]))
+
+    async def test_webhook_change_is_reported(self):
+        self.assertFalse((await self.cache.refresh()).webhooks)
+        self.storage.db.execute("INSERT INTO DiscordWebhook (id, url, userId) VALUES ('w1', 'https://discord/1', 'u1')")
+        self.assertTrue((await self.cache.refresh()).webhooks)
+        self.assertFalse((await self.cache.refresh()).webhooks)
+        self.storage.db.execute("UPDATE DiscordWebhook SET url = 'https://discord/2' WHERE id = 'w1'")
+        diff = await self.cache.refresh()
+        self.assertTrue(diff.webhooks)
+        self.assertFalse(diff)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from typing import Dict, List
+from bench.sqlite_storage import SQLiteStorage
+from core.item_writer import ItemWriter
+from core.listing import ListingRecord
+from core.scheduler import group_searches
+from core.spool import ItemSpool
+from main import make_search_handler
+
+
+def _search(search_id: str, text: str, user_id: str) -> Dict:
+    return {
+        "search_item_id": search_id, "search_text": text, "min_price": None, "max_price": None,
+        "tags": [], "domain": "fr", "priority": 1, "min_interval": None, "max_interval": None,
+        "min_discount": None, "user_id": user_id
+    }
+
+
+class StaticScraper:
+    """Renvoie les mêmes annonces à chaque requête, quel que soit le groupe"""
+
+    def __init__(self, items: List[ListingRecord]):
+        self.items = items
+
+    async def fetch(self, group: Dict) -> List[ListingRecord]:
+        return [ListingRecord(item.id, item.title, item.price, item.currency, item.url) for item in self.items]
+
+    def commit(self, search_item_id: str):
+        pass
+
+
+class OverlappingSearchesTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.storage = SQLiteStorage()
+        await self.storage.connect()
+        self.spool = ItemSpool(":memory:")
+        await self.spool.open()
+        listing = ListingRecord(42, "Nike Air Max 90", 50.0, "EUR", "https://www.vinted.fr/items/42")
+        self.handler = make_search_handler(self.storage, StaticScraper([listing]), self.spool)
+        self.groups = group_searches([_search("s1", "nike air", "u1"), _search("s2", "nike", "u2")])
+
+    async def asyncTearDown(self):
+        await self.spool.close()
+        await self.storage.close()
+
+    async def test_listing_reaches_every_matching_search(self):
+        for group in self.groups:
+            await self.handler(group)
+        notified = await self.spool.claim_notifications()
+        self.assertEqual(sorted((item.search_item_id, item.id) for item in notified), [("s1", 42), ("s2", 42)])
+
+    async def test_listing_is_new_once_per_search(self):
+        found = [await self.handler(group) for group in self.groups + self.groups]
+        self.assertEqual(found, [1, 1, 0, 0])
+        self.assertEqual(len(await self.spool.claim_notifications()), 2)
+
+    async def test_listing_is_stored_for_every_matching_search(self):
+        for group in self.groups:
+            await self.handler(group)
+        await ItemWriter(self.storage, self.spool).flush()
+        rows = self.storage.db.execute("SELECT searchItemId, vintedId FROM Item ORDER BY searchItemId").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [("s1", 42), ("s2", 42)])
+
+
+if __name__ == "__main__":
+    unittest.main()
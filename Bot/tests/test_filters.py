@@ -0,0 +1,68 @@
+import unittest
+from typing import List, Optional
+from core.filters import compile_filter, filter_batch, normalize_text
+from core.listing import ListingRecord
+
+
+def _item(title: str, price: float = 30.0, brand: Optional[str] = None, size: Optional[str] = None, status: Optional[str] = None) -> ListingRecord:
+    return ListingRecord(1, title, price, "EUR", "https://www.vinted.fr/items/1", brand=brand, size=size, status=status)
+
+
+def _matches(tags: List[str], item: ListingRecord, min_price: Optional[float] = None, max_price: Optional[float] = None) -> bool:
+    search_filter = compile_filter({"tags": tags, "min_price": min_price, "max_price": max_price})
+    return bool(filter_batch([("s1", search_filter)], [item]))
+
+
+class FilterTest(unittest.TestCase):
+    def test_empty_tags_accept_everything(self):
+        self.assertTrue(_matches([], _item("Pull")))
+        self.assertTrue(_matches(["", "  "], _item("Pull")))
+        self.assertTrue(compile_filter({"tags": None}).include is None)
+
+    def test_keywords_include_any_of_them(self):
+        self.assertTrue(_matches(["air max", "jordan"], _item("Nike Jordan 1")))
+        self.assertFalse(_matches(["air max", "jordan"], _item("Nike Dunk Low")))
+        # Mot-clé cherché dans la marque aussi
+        self.assertTrue(_matches(["nike"], _item("Baskets", brand="Nike")))
+
+    def test_excluded_keyword_rejects(self):
+        self.assertFalse(_matches(["nike", "-enfant"], _item("Nike Air Max enfant")))
+        self.assertTrue(_matches(["nike", "-enfant"], _item("Nike Air Max")))
+
+    def test_brand_prefix(self):
+        self.assertTrue(_matches(["brand:Nike"], _item("Baskets", brand="nike")))
+        self.assertFalse(_matches(["brand:Nike"], _item("Baskets Nike", brand="Adidas")))
+        self.assertFalse(_matches(["brand:Nike"], _item("Baskets Nike")))
+
+    def test_size_prefix(self):
+        self.assertTrue(_matches(["size:42", "size:43"], _item("Baskets", size="42")))
+        self.assertTrue(_matches(["size:m"], _item("Pull", size="M / 38")))
+        self.assertFalse(_matches(["size:42"], _item("Baskets", size="EU 44")))
+
+    def test_condition_prefix(self):
+        self.assertTrue(_matches(["condition:neuf"], _item("Pull", status="Neuf avec étiquette")))
+        self.assertFalse(_matches(["condition:neuf"], _item("Pull", status="Bon état")))
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(normalize_text("Été ÉCRU"), "ete ecru")
+        self.assertTrue(_matches(["ÉTÉ"], _item("robe d'ete")))
+        self.assertTrue(_matches(["condition:tres bon etat"], _item("Pull", status="Très bon état")))
+        self.assertFalse(_matches(["-Déchiré"], _item("Jean DECHIRE")))
+
+    def test_price_range(self):
+        self.assertTrue(_matches([], _item("Pull", price=20.0), min_price=10, max_price=20))
+        self.assertFalse(_matches([], _item("Pull", price=25.0), min_price=10, max_price=20))
+        self.assertFalse(_matches([], _item("Pull", price=5.0), min_price=10))
+
+    def test_batch_routes_a_copy_per_matching_search(self):
+        filters = [
+            ("nike", compile_filter({"tags": ["nike"]})),
+            ("adidas", compile_filter({"tags": ["adidas"]})),
+            ("all", compile_filter({"tags": []})),
+        ]
+        routed = filter_batch(filters, [_item("Nike Air Max")])
+        self.assertEqual([item.search_item_id for item in routed], ["nike", "all"])
+
+
+if __name__ == "__main__":
+    unittest.main()
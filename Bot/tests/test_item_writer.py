@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+from typing import List
+from bench.sqlite_storage import SQLiteStorage
+from core.item_writer import ItemWriter
+from core.listing import ListingRecord
+from core.spool import ItemSpool
+
+
+class RejectingStorage(SQLiteStorage):
+    """Refuse tout lot contenant une annonce au titre « bad », ou tout accès si `down`"""
+
+    down = False
+
+    async def batch_save(self, items: List[ListingRecord]):
+        if self.down or any(item.title == "bad" for item in items):
+            raise RuntimeError("refusé")
+        await super().batch_save(items)
+
+    async def get_search_ids(self):
+        if self.down:
+            raise RuntimeError("base injoignable")
+        return await super().get_search_ids()
+
+
+def _item(item_id: int, search_item_id: str = "s1", title: str = "ok") -> ListingRecord:
+    return ListingRecord(item_id, title, 10.0, "EUR", f"https://www.vinted.fr/items/{item_id}", search_item_id=search_item_id)
+
+
+class ItemWriterTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.storage = RejectingStorage()
+        await self.storage.connect()
+        self.storage.seed([{"id": "u1", "email": "u1@test"}], [], [
+            {"id": "s1", "maxPrice": None, "minPrice": None, "tags": "", "searchText": "nike", "priority": 1, "userId": "u1"}
+        ])
+        self.spool = ItemSpool(":memory:")
+        await self.spool.open()
+        self.writer = ItemWriter(self.storage, self.spool, batch_size=10, retry_max=0, max_attempts=2)
+
+    async def asyncTearDown(self):
+        await self.spool.close()
+        await self.storage.close()
+
+    async def test_rejected_and_orphan_items_do_not_block_the_spool(self):
+        await self.spool.append([_item(1), _item(2, title="bad"), _item(3, search_item_id="deleted"), _item(4)], notified=True)
+        await self.writer.flush()
+        self.assertEqual(self.storage.count_items(), 2)
+        self.assertEqual(self.spool.to_store, 0)
+        self.assertEqual(await self.spool.purge(), 4)
+
+    async def test_unreachable_database_keeps_items(self):
+        self.storage.down = True
+        await self.spool.append([_item(1)], notified=True)
+        self.writer.retry_max = 0.01
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.writer.flush(), 0.2)
+        self.assertEqual(self.spool.to_store, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
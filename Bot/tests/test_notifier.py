@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+from typing import Dict, List
+from unittest.mock import patch
+from aiohttp import web
+from core.config import settings
+from core.listing import ListingRecord
+from core.notifier import DiscordNotifier, WebhookRateLimit
+
+
+class StubDiscord:
+    """
+    Webhooks locaux : « slow » répond toujours 429, « gone » 404, « burst » 429 aux
+    `burst` premières requêtes, les autres 204
+    """
+
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.burst = 0
+
+    async def webhook(self, request: web.Request) -> web.Response:
+        hook_id = request.match_info["hook_id"]
+        self.requests[hook_id] = self.requests.get(hook_id, 0) + 1
+        if hook_id == "burst" and self.requests[hook_id] <= self.burst:
+            return web.Response(status=429, headers={"Retry-After": "0", "X-RateLimit-Reset-After": "soon"})
+        if hook_id == "slow":
+            return web.Response(status=429, headers={"Retry-After": "30"})
+        if hook_id == "gone":
+            return web.json_response({"message": "Unknown Webhook"}, status=404)
+        return web.Response(status=204)
+
+
+def _item(item_id: int, search_item_id: str) -> ListingRecord:
+    return ListingRecord(item_id, "Nike", 10.0, "EUR", f"https://www.vinted.fr/items/{item_id}", search_item_id=search_item_id)
+
+
+class NotifierTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.discord = StubDiscord()
+        app = web.Application()
+        app.router.add_post("/webhooks/{hook_id}", self.discord.webhook)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "localhost", 0)
+        await site.start()
+        base = f"http://localhost:{self.runner.addresses[0][1]}/webhooks"
+        self.routes = {name: [{"url": f"{base}/{name}", "name": name}] for name in ("slow", "fast", "gone", "burst")}
+        self.delivered: List[int] = []
+
+        async def on_delivered(item_ids: List[int]):
+            self.delivered.extend(item_ids)
+
+        self.notifier = DiscordNotifier(workers=1, on_delivered=on_delivered)
+        await self.notifier.start()
+
+    async def asyncTearDown(self):
+        await self.notifier.close(timeout=0)
+        await self.runner.cleanup()
+
+    async def test_rate_limited_webhook_does_not_delay_others(self):
+        await self.notifier.dispatch([_item(1, "slow")], self.routes)
+        await self.notifier.flush_all()
+        await asyncio.sleep(0.2)
+        await self.notifier.dispatch([_item(2, "fast")], self.routes)
+        await self.notifier.flush_all()
+        await asyncio.sleep(0.5)
+        self.assertEqual(self.delivered, [2])
+
+    async def test_deleted_webhook_is_disabled_without_retry(self):
+        await self.notifier.dispatch([_item(1, "gone")], self.routes)
+        await self.notifier.flush_all()
+        await asyncio.sleep(0.5)
+        await self.notifier.dispatch([_item(2, "gone")], self.routes)
+        await self.notifier.flush_all()
+        await asyncio.sleep(0.2)
+        self.assertEqual(self.discord.requests.get("gone"), 1)
+        self.assertEqual(self.delivered, [1, 2])
+
+    async def test_rate_limits_do_not_use_up_attempts(self):
+        self.discord.burst = 3
+        with patch.object(settings, "WEBHOOK_MAX_ATTEMPTS", 2):
+            await self.notifier.dispatch([_item(1, "burst")], self.routes)
+            await self.notifier.flush_all()
+            await asyncio.sleep(0.5)
+        self.assertEqual(self.discord.requests.get("burst"), 4)
+        self.assertEqual(self.delivered, [1])
+
+    async def test_unrouted_item_waits_for_a_webhook(self):
+        await self.notifier.dispatch([_item(1, "new")], self.routes)
+        self.assertEqual(self.notifier.unrouted, 1)
+        # Mêmes routes : rien n'est retenté ni marqué
+        await self.notifier.dispatch([], self.routes)
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.delivered, [])
+
+        routes = dict(self.routes, new=self.routes["fast"])
+        await self.notifier.dispatch([], routes)
+        await self.notifier.flush_all()
+        await asyncio.sleep(0.3)
+        self.assertEqual(self.notifier.unrouted, 0)
+        self.assertEqual(self.delivered, [1])
+
+    async def test_unrouted_item_is_dropped_after_max_age(self):
+        await self.notifier.dispatch([_item(1, "new")], self.routes)
+        with patch.object(settings, "UNROUTED_MAX_AGE", -1):
+            await self.notifier.dispatch([], self.routes)
+        self.assertEqual(self.notifier.unrouted, 0)
+        self.assertEqual(self.delivered, [1])
+
+
+class WebhookRateLimitTest(unittest.TestCase):
+    def test_malformed_headers_are_ignored(self):
+        rate_limit = WebhookRateLimit()
+        self.assertEqual(rate_limit.update(204, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "n/a"}), 0.0)
+        self.assertEqual(rate_limit.update(204, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "inf"}), 0.0)
+        self.assertEqual(rate_limit.update(429, {"Retry-After": "plus tard"}), 1.0)
+
+    def test_reset_after_and_retry_after(self):
+        rate_limit = WebhookRateLimit()
+        self.assertEqual(rate_limit.update(204, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "2.5"}), 2.5)
+        self.assertEqual(rate_limit.update(204, {"X-RateLimit-Remaining": "3", "X-RateLimit-Reset-After": "2.5"}), 0.0)
+        self.assertEqual(rate_limit.update(429, {"Retry-After": "7"}), 7.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from typing import Optional
+from core.listing import ListingRecord
+from core.pricing import PriceStats, PriceWindow, is_deal
+
+
+def _item(price: float, brand: Optional[str] = None, size: Optional[str] = None, search_item_id: str = "s1") -> ListingRecord:
+    return ListingRecord(1, "Pull", price, "EUR", "https://www.vinted.fr/items/1", brand=brand, size=size, search_item_id=search_item_id)
+
+
+class PriceWindowTest(unittest.TestCase):
+    def test_median_and_mad(self):
+        window = PriceWindow(8)
+        for price in (10, 20, 30, 40, 100):
+            window.add(price)
+        self.assertEqual(window.summary(), (30.0, 10.0))
+        window.add(50)
+        # Nombre pair de prix : moyenne des deux valeurs centrales
+        self.assertEqual(window.summary(), (35.0, 15.0))
+
+    def test_oldest_prices_are_evicted(self):
+        window = PriceWindow(3)
+        for price in (1, 2, 3, 4, 5):
+            window.add(price)
+        self.assertEqual(len(window), 3)
+        self.assertEqual(window.values(), [3.0, 4.0, 5.0])
+        self.assertEqual(window.summary()[0], 4.0)
+
+
+class PriceStatsTest(unittest.TestCase):
+    def test_score_waits_for_min_samples(self):
+        prices = PriceStats(window=16, min_samples=3)
+        prices.observe([_item(100), _item(100)])
+        item = _item(50)
+        prices.score([item])
+        self.assertIsNone(item.discount)
+        prices.observe([_item(100)])
+        prices.score([item])
+        self.assertEqual((item.typical_price, item.discount), (100.0, 50.0))
+
+    def test_most_specific_key_with_history_wins(self):
+        prices = PriceStats(window=16, min_samples=2)
+        prices.observe([_item(20), _item(20), _item(200, brand="Gucci"), _item(200, brand="Gucci")])
+        gucci, other = _item(100, brand="GUCCI"), _item(30, brand="Zara")
+        prices.score([gucci, other])
+        self.assertEqual(gucci.typical_price, 200.0)
+        # Marque sans historique : prix habituel de la recherche, toutes marques confondues
+        self.assertEqual(other.typical_price, 110.0)
+        self.assertEqual(other.discount, 72.7)
+
+    def test_least_recently_fed_keys_are_forgotten(self):
+        prices = PriceStats(window=4, min_samples=1, max_keys=2)
+        prices.observe([_item(10, search_item_id="s1")])
+        prices.observe([_item(10, search_item_id="s2")])
+        prices.observe([_item(10, search_item_id="s1")])
+        prices.observe([_item(10, search_item_id="s3")])
+        self.assertEqual(list(prices.windows), [("s1",), ("s3",)])
+
+    def test_invalid_prices_are_ignored(self):
+        prices = PriceStats()
+        prices.observe([_item(0), _item(-5)])
+        self.assertEqual(len(prices), 0)
+
+
+class IsDealTest(unittest.TestCase):
+    def test_min_discount_gates_notifications(self):
+        item = _item(70)
+        item.discount = 30.0
+        self.assertTrue(is_deal(item, 30))
+        self.assertFalse(is_deal(item, 40))
+
+    def test_without_threshold_or_reference_everything_passes(self):
+        item = _item(70)
+        self.assertTrue(is_deal(item, 40))
+        item.discount = -10.0
+        self.assertTrue(is_deal(item, None))
+        self.assertTrue(is_deal(item, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import time
+import unittest
+from email.utils import formatdate
+from core.rate_limiter import AdaptiveLimiter, parse_retry_after
+
+
+def _limiter(rate: float = 8.0, concurrency: int = 8) -> AdaptiveLimiter:
+    return AdaptiveLimiter(rate, concurrency, min_rate=0.5, max_rate=10.0, max_concurrency=10, rate_step=1.0, backoff_base=0.0, backoff_max=0.0)
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+    def test_throttle_halves_rate_and_concurrency(self):
+        limiter = _limiter()
+        limiter.on_throttle()
+        self.assertEqual((limiter.rate, limiter.concurrency), (4.0, 4.0))
+        limiter.on_throttle()
+        self.assertEqual((limiter.rate, limiter.concurrency), (2.0, 2.0))
+        self.assertEqual(limiter.bucket.capacity, 2.0)
+
+    def test_floors_hold_under_repeated_throttles(self):
+        limiter = _limiter()
+        for _ in range(10):
+            limiter.on_throttle()
+        self.assertEqual(limiter.rate, 0.5)
+        self.assertEqual(limiter.concurrency, 1.0)
+        self.assertEqual(limiter.bucket.capacity, 1.0)
+
+    def test_throttles_during_a_pause_count_once(self):
+        limiter = AdaptiveLimiter(8.0, 8, backoff_base=0.0, backoff_max=0.0)
+        limiter.on_throttle(retry_after=60)
+        limiter.on_throttle(retry_after=60)
+        self.assertEqual((limiter.rate, limiter.concurrency), (4.0, 4.0))
+        self.assertGreater(limiter.blocked_until, time.monotonic() + 50)
+
+    def test_success_recovers_additively(self):
+        limiter = _limiter(rate=2.0, concurrency=2)
+        limiter.on_success()
+        self.assertAlmostEqual(limiter.rate, 2.5)
+        self.assertAlmostEqual(limiter.concurrency, 2.5)
+        for _ in range(1000):
+            limiter.on_success()
+        self.assertEqual((limiter.rate, limiter.concurrency), (10.0, 10))
+
+    def test_success_resets_the_backoff(self):
+        limiter = AdaptiveLimiter(8.0, 8, backoff_base=1.0, backoff_max=60.0)
+        limiter.on_throttle()
+        limiter.blocked_until = 0.0
+        limiter.on_throttle()
+        self.assertEqual(limiter.throttles, 2)
+        limiter.on_success()
+        self.assertEqual(limiter.throttles, 0)
+
+    def test_retry_after_extends_the_pause(self):
+        limiter = _limiter()
+        self.assertEqual(limiter.on_throttle(retry_after=30), 30)
+
+
+class ParseRetryAfterTest(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after("120"), 120.0)
+        self.assertEqual(parse_retry_after("1.5"), 1.5)
+        self.assertEqual(parse_retry_after("-3"), 0.0)
+
+    def test_http_date(self):
+        delay = parse_retry_after(formatdate(time.time() + 90, usegmt=True))
+        self.assertAlmostEqual(delay, 90, delta=2)
+        self.assertEqual(parse_retry_after(formatdate(time.time() - 90, usegmt=True)), 0.0)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after(""))
+        self.assertIsNone(parse_retry_after("bientôt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
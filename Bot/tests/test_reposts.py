@@ -0,0 +1,60 @@
+import io
+import os
+import tempfile
+import unittest
+from aiohttp import web
+from core.listing import ListingRecord
+from core.reposts import RepostDetector
+
+try:
+    from PIL import Image
+except ImportError:  # Dépendance optionnelle du détecteur
+    Image = None
+
+
+def _png() -> bytes:
+    image = Image.new("L", (90, 80))
+    image.putdata([(x * 3) % 256 for x in range(90 * 80)])
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@unittest.skipIf(Image is None, "Pillow n'est pas installé")
+class RepostDetectorTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        image = _png()
+
+        async def photo(request: web.Request) -> web.Response:
+            return web.Response(body=image, content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/photo.png", photo)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, "localhost", 0).start()
+        self.photo_url = f"http://localhost:{self.runner.addresses[0][1]}/photo.png"
+        self.directory = tempfile.TemporaryDirectory()
+        self.detector = RepostDetector(path=os.path.join(self.directory.name, "hashes.bin"))
+        await self.detector.start()
+
+    async def asyncTearDown(self):
+        await self.detector.close()
+        await self.runner.cleanup()
+        self.directory.cleanup()
+
+    def _item(self, item_id: int, seller: str = None) -> ListingRecord:
+        return ListingRecord(item_id, "Nike", 10.0, "EUR", f"https://www.vinted.fr/items/{item_id}",
+                             thumbnail_url=self.photo_url, seller_login=seller)
+
+    async def test_same_seller_same_photo_is_a_repost(self):
+        self.assertEqual(len(await self.detector.filter([self._item(1, "alice")])), 1)
+        self.assertEqual(await self.detector.filter([self._item(2, "alice")]), [])
+
+    async def test_sellers_without_login_are_not_matched(self):
+        self.assertEqual(len(await self.detector.filter([self._item(1)])), 1)
+        self.assertEqual(len(await self.detector.filter([self._item(2)])), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
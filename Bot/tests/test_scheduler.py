@@ -0,0 +1,117 @@
+import asyncio
+import unittest
+from typing import Dict, List, Optional
+from core.scheduler import DomainScheduler, SearchPace, SearchScheduler
+
+
+def _search(search_id: str, priority: int = 1, domain: str = "fr") -> Dict:
+    return {"search_item_id": search_id, "search_text": search_id, "priority": priority, "domain": domain}
+
+
+class RecordingHandler:
+    """Note l'ordre des recherches servies ; chaque passage rend la main à la boucle"""
+
+    def __init__(self):
+        self.calls: List[str] = []
+
+    async def __call__(self, config: Dict) -> Optional[int]:
+        self.calls.append(config["search_item_id"])
+        await asyncio.sleep(0)
+        return None
+
+
+async def _run_for(scheduler, seconds: float):
+    task = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+class SearchSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def _scheduler(self, handler: RecordingHandler, rate: float = 100, workers: int = 1) -> SearchScheduler:
+        # Intervalle long et sans jitter : chaque recherche passe une seule fois pendant le test
+        return SearchScheduler(handler, workers=workers, rate=rate, interval=3600, jitter=0)
+
+    async def test_due_searches_run_by_priority(self):
+        handler = RecordingHandler()
+        scheduler = self._scheduler(handler)
+        scheduler.update([_search("low", 0), _search("normal", 1), _search("high", 2)])
+        await _run_for(scheduler, 0.2)
+        self.assertEqual(handler.calls, ["high", "normal", "low"])
+
+    async def test_removed_search_is_not_run(self):
+        handler = RecordingHandler()
+        scheduler = self._scheduler(handler)
+        scheduler.update([_search("kept"), _search("removed")])
+        self.assertEqual(scheduler.update([_search("kept")]), ["removed"])
+        self.assertNotIn("removed", scheduler.paces)
+        await _run_for(scheduler, 0.2)
+        self.assertEqual(handler.calls, ["kept"])
+
+    async def test_changed_priority_clamps_the_interval(self):
+        handler = RecordingHandler()
+        scheduler = self._scheduler(handler)
+        scheduler.update([_search("s1", 0)])
+        self.assertEqual(scheduler.paces["s1"].interval, 3600)
+        self.assertEqual(scheduler.update([_search("s1", 2)]), [])
+        pace = scheduler.paces["s1"]
+        self.assertEqual((pace.min_interval, pace.max_interval, pace.interval), (10, 120, 120))
+
+    async def test_budget_is_per_domain(self):
+        handler = RecordingHandler()
+        # 2 recherches par seconde et par domaine, 2 en réserve
+        scheduler = DomainScheduler(lambda domain: SearchScheduler(handler, workers=4, rate=2, interval=3600, jitter=0, domain=domain))
+        scheduler.update([_search(f"{domain}-{index}", domain=domain) for domain in ("fr", "de") for index in range(8)])
+        await _run_for(scheduler, 1.0)
+        for domain in ("fr", "de"):
+            started = sum(1 for search_id in handler.calls if search_id.startswith(domain))
+            self.assertGreaterEqual(started, 3)
+            self.assertLessEqual(started, 5)
+
+
+class SearchPaceTest(unittest.TestCase):
+    def _pace(self) -> SearchPace:
+        pace = SearchPace(60, 900, 200)
+        pace.record(None, 0.0)
+        return pace
+
+    def test_interval_stays_within_bounds(self):
+        pace = self._pace()
+        now = 0.0
+        for found in (500, 500, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0):
+            now += pace.interval
+            interval = pace.record(found, now)
+            self.assertGreaterEqual(interval, 60)
+            self.assertLessEqual(interval, 900)
+        self.assertEqual(SearchPace(60, 900, 5).interval, 60)
+        self.assertEqual(SearchPace(60, 900, 5000).interval, 900)
+
+    def test_new_listings_speed_the_search_up(self):
+        pace = self._pace()
+        interval = pace.record(5, 200.0)
+        self.assertLess(interval, 200)
+        self.assertLess(pace.record(5, 200.0 + interval), interval)
+
+    def test_quiet_search_backs_off(self):
+        pace = self._pace()
+        pace.record(5, 200.0)
+        busy = pace.interval
+        now = 200.0
+        intervals = []
+        for _ in range(5):
+            now += pace.interval
+            intervals.append(pace.record(0, now))
+        self.assertGreater(intervals[0], busy)
+        self.assertEqual(intervals, sorted(intervals))
+        # Aucune annonce depuis le début : l'intervalle maximal
+        self.assertEqual(self._pace().record(0, 200.0), 900)
+
+    def test_unknown_count_keeps_the_interval(self):
+        pace = self._pace()
+        pace.record(5, 200.0)
+        interval = pace.interval
+        self.assertEqual(pace.record(None, 400.0), interval)
+
+
+if __name__ == "__main__":
+    unittest.main()
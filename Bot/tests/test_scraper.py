@@ -0,0 +1,92 @@
+import re
+import unittest
+from pathlib import Path
+from typing import Dict, List, Optional
+from core.listing import ListingRecord
+from core.metrics import FETCH_SECONDS
+from core.config import settings
+from core.scraper import VintedScraper
+
+
+class ScriptedScraper(VintedScraper):
+    """Sert le catalogue donné (ordre newest_first de Vinted) page par page"""
+
+    def __init__(self):
+        super().__init__()
+        self.catalog: List[int] = []
+        self.pages = 0
+        self.failing_pages = set()
+
+    async def _fetch_page(self, client, params: Dict) -> Optional[List[ListingRecord]]:
+        self.pages += 1
+        if params["page"] in self.failing_pages:
+            return None
+        start = (params["page"] - 1) * params["per_page"]
+        ids = self.catalog[start:start + params["per_page"]]
+        return [ListingRecord(item_id, "Nike", 10.0, "EUR", f"https://www.vinted.fr/items/{item_id}") for item_id in ids]
+
+
+SEARCH = {"search_item_id": "s1", "search_text": "nike", "domain": "fr"}
+
+
+class WatermarkTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.scraper = ScriptedScraper()
+        self.scraper.catalog = list(range(100, 90, -1))
+        await self.scraper.fetch(SEARCH)
+        self.scraper.commit("s1")
+
+    async def test_bumped_listing_does_not_hide_newer_ones(self):
+        self.scraper.catalog = [95, 103, 102, 101] + list(range(100, 90, -1))
+        items = await self.scraper.fetch(SEARCH)
+        self.assertEqual([item.id for item in items], [103, 102, 101])
+        self.scraper.commit("s1")
+        self.assertEqual(self.scraper.watermarks["s1"].last_id, 103)
+
+    async def test_paging_stops_once_the_page_ends_with_seen_listings(self):
+        self.scraper.catalog = [101] + list(range(100, 0, -1))
+        self.scraper.pages = 0
+        await self.scraper.fetch(SEARCH)
+        self.assertEqual(self.scraper.pages, 1)
+
+    async def test_watermark_waits_for_commit(self):
+        self.scraper.catalog = [102, 101] + list(range(100, 90, -1))
+        await self.scraper.fetch(SEARCH)
+        # Traitement échoué : le passage suivant retourne les mêmes annonces
+        items = await self.scraper.fetch(SEARCH)
+        self.assertEqual([item.id for item in items], [102, 101])
+        self.assertEqual(self.scraper.watermarks["s1"].last_id, 100)
+
+    async def test_unread_page_keeps_the_watermark(self):
+        watermark = self.scraper.watermarks["s1"]
+        watermark.per_page = settings.MAX_PER_PAGE
+        self.scraper.catalog = list(range(100 + 2 * settings.MAX_PER_PAGE, 100, -1)) + list(range(100, 90, -1))
+        self.scraper.failing_pages = {2}
+        items = await self.scraper.fetch(SEARCH)
+        self.assertEqual(len(items), settings.MAX_PER_PAGE)
+        self.scraper.commit("s1")
+        self.assertEqual(watermark.last_id, 100)
+
+        self.scraper.failing_pages = set()
+        items = await self.scraper.fetch(SEARCH)
+        self.assertEqual(len(items), 2 * settings.MAX_PER_PAGE)
+
+    async def test_forget_drops_the_search_series(self):
+        self.assertIn(("s1",), FETCH_SECONDS.series)
+        self.scraper.forget("s1")
+        self.assertNotIn("s1", self.scraper.watermarks)
+        self.assertNotIn(("s1",), FETCH_SECONDS.series)
+
+
+class DomainsTest(unittest.TestCase):
+    def test_domains_match_the_api_list(self):
+        source = Path(__file__).resolve().parents[2] / "Api" / "src" / "search-items" / "vinted-domains.ts"
+        if not source.exists():
+            self.skipTest("Api absente")
+        api_domains = dict(re.findall(r'^\s*"?([\w.]+)"?: "([A-Z]{3})",$', source.read_text(), re.MULTILINE))
+        bot_domains = {domain: profile["currency"] for domain, profile in settings.VINTED_DOMAINS.items()}
+        self.assertEqual(api_domains, bot_domains)
+
+
+if __name__ == "__main__":
+    unittest.main()
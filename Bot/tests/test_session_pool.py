@@ -0,0 +1,28 @@
+import unittest
+from core.session_pool import SessionPool
+
+
+class SessionRetirementTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = SessionPool("https://www.vinted.fr", ["test"])
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_discarded_session_stays_open_until_released(self):
+        session = self.pool.get("http://proxy:8080")
+        self.pool.acquire(session)
+        await self.pool.discard("http://proxy:8080")
+        self.assertFalse(session.session.closed)
+        self.assertIsNot(self.pool.get("http://proxy:8080"), session)
+        await self.pool.release(session)
+        self.assertTrue(session.session.closed)
+
+    async def test_idle_session_is_closed_on_discard(self):
+        session = self.pool.get("http://proxy:8080")
+        await self.pool.discard("http://proxy:8080")
+        self.assertTrue(session.session.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
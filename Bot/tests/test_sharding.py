@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from bench.sqlite_storage import SQLiteStorage
+from core.sharding import ShardCoordinator, lease_key, rendezvous_owner
+
+KEYS = [lease_key(f"group:recherche {index}") for index in range(300)]
+
+
+class RendezvousTest(unittest.TestCase):
+    def test_joining_worker_only_takes_keys(self):
+        before = {key: rendezvous_owner(key, ["a", "b", "c"]) for key in KEYS}
+        after = {key: rendezvous_owner(key, ["a", "b", "c", "d"]) for key in KEYS}
+        moved = [key for key in KEYS if before[key] != after[key]]
+        self.assertTrue(moved)
+        self.assertTrue(all(after[key] == "d" for key in moved))
+
+    def test_leaving_worker_only_gives_its_keys(self):
+        before = {key: rendezvous_owner(key, ["a", "b", "c"]) for key in KEYS}
+        after = {key: rendezvous_owner(key, ["a", "b"]) for key in KEYS}
+        moved = [key for key in KEYS if before[key] != after[key]]
+        self.assertEqual(moved, [key for key in KEYS if before[key] == "c"])
+
+    def test_order_of_workers_does_not_matter(self):
+        for key in KEYS[:20]:
+            self.assertEqual(rendezvous_owner(key, ["a", "b", "c"]), rendezvous_owner(key, ["c", "a", "b"]))
+        self.assertIsNone(rendezvous_owner(KEYS[0], []))
+
+
+class LeaseTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.storage = SQLiteStorage()
+        await self.storage.connect()
+
+    async def asyncTearDown(self):
+        await self.storage.close()
+
+    async def test_lease_is_only_taken_over_after_expiry(self):
+        await self.storage.claim_leases("a", ["k1"], 0.3)
+        await self.storage.claim_leases("b", ["k1"], 0.3)
+        self.assertEqual(await self.storage.get_held_leases("a"), {"k1"})
+        self.assertEqual(await self.storage.get_held_leases("b"), set())
+
+        # Le détenteur prolonge son bail
+        await asyncio.sleep(0.2)
+        await self.storage.claim_leases("a", ["k1"], 0.3)
+        await asyncio.sleep(0.2)
+        await self.storage.claim_leases("b", ["k1"], 0.3)
+        self.assertEqual(await self.storage.get_held_leases("a"), {"k1"})
+
+        # Expiré : repris, avec une nouvelle échéance
+        await asyncio.sleep(0.4)
+        await self.storage.claim_leases("b", ["k1"], 0.3)
+        self.assertEqual(await self.storage.get_held_leases("b"), {"k1"})
+        self.assertEqual(await self.storage.get_held_leases("a"), set())
+
+    async def test_silent_worker_share_is_taken_over(self):
+        searches = [f"group:recherche {index}" for index in range(20)]
+        first = ShardCoordinator(self.storage, worker_id="a", heartbeat_interval=0.1)
+        second = ShardCoordinator(self.storage, worker_id="b", heartbeat_interval=0.1)
+        for shard in (first, second):
+            shard.assign(searches)
+        await first.heartbeat()
+        await second.heartbeat()
+        await first.heartbeat()
+        await second.heartbeat()
+        self.assertEqual(len(first.held) + len(second.held), len(searches))
+        self.assertTrue(first.held and second.held)
+        self.assertFalse(first.held & second.held)
+
+        # « a » ne donne plus signe de vie : heartbeat et baux expirent
+        await asyncio.sleep(0.4)
+        await second.heartbeat()
+        self.assertEqual(second.workers, ["b"])
+        self.assertEqual(len(second.held), len(searches))
+        self.assertTrue(all(second.owns(search_id) for search_id in searches))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from core.pricing import PriceStats
+from core.scheduler import DomainScheduler, SearchScheduler
+from core.scraper import VintedScraper
+from core.snapshot import StateSnapshot
+from core.storage import VintedStorage
+
+
+def _scheduler() -> DomainScheduler:
+    return DomainScheduler(lambda domain: SearchScheduler(None, domain=domain))
+
+
+class SnapshotTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "state.bin")
+        self.storage = VintedStorage()
+        self.prices = PriceStats(window=4, max_keys=10)
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+
+    async def _round_trip(self):
+        await StateSnapshot(self.path).save(self.storage, VintedScraper(), _scheduler(), self.prices)
+        snapshot = StateSnapshot(self.path)
+        self.assertTrue(snapshot.load())
+        storage, prices = VintedStorage(), PriceStats(window=4, max_keys=10)
+        snapshot.restore(storage, VintedScraper(), _scheduler(), prices)
+        return storage, prices
+
+    async def test_seen_cache_survives_a_restart(self):
+        self.storage.seen.add(("s1", 42))
+        self.storage.seen.add(("s2", 42))
+        storage, _ = await self._round_trip()
+        self.assertIn(("s1", 42), storage.seen)
+        self.assertIn(("s2", 42), storage.seen)
+        self.assertNotIn(("s3", 42), storage.seen)
+
+    async def test_price_windows_keep_their_order(self):
+        for price in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0):
+            self.prices._add(("s1",), price)
+        self.prices._add(("s2",), 7.0)
+        _, prices = await self._round_trip()
+        self.assertEqual(prices.windows[("s1",)].values(), [3.0, 4.0, 5.0, 6.0])
+        self.assertEqual(prices.windows[("s2",)].values(), [7.0])
+        self.assertEqual(list(prices.windows), [("s1",), ("s2",)])
+
+    def test_copy_keeps_the_most_recently_fed_keys(self):
+        for index in range(5):
+            self.prices._add((f"s{index}",), 10.0)
+        self.prices._add(("s1",), 10.0)
+        self.assertEqual([key for key, _, _ in self.prices.copy(2)], [("s4",), ("s1",)])
+
+
+if __name__ == "__main__":
+    unittest.main()
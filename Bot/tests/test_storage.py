@@ -0,0 +1,41 @@
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+from core.metrics import DB_POOL_WAIT_SECONDS, DB_QUERY_SECONDS
+from core.storage import VintedStorage
+
+
+class BusyPool:
+    """Pool factice : une connexion ne se libère qu'après `wait` secondes"""
+
+    def __init__(self, wait: float):
+        self.wait = wait
+
+    @asynccontextmanager
+    async def acquire(self):
+        await asyncio.sleep(self.wait)
+        yield self
+
+    @asynccontextmanager
+    async def cursor(self, cursor_class):
+        yield None
+
+
+def _total(histogram, operation: str) -> float:
+    series = histogram.series.get((operation,))
+    return series[-1] if series else 0.0
+
+
+class CursorTimingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_pool_wait_is_not_counted_as_query_time(self):
+        storage = VintedStorage()
+        storage.pool = BusyPool(0.2)
+        async with storage.get_cursor("timing_test"):
+            await asyncio.sleep(0.05)
+        self.assertGreaterEqual(_total(DB_POOL_WAIT_SECONDS, "timing_test"), 0.2)
+        self.assertGreaterEqual(_total(DB_QUERY_SECONDS, "timing_test"), 0.05)
+        self.assertLess(_total(DB_QUERY_SECONDS, "timing_test"), 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
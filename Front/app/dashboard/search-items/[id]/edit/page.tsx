@@ -11,6 +11,8 @@ import { useToast } from "@/components/ui/use-toast"
 import { Badge } from "@/components/ui/badge"
 import { X, Loader2 } from "lucide-react"
 import { searchItemsApi } from "@/lib/api"
+import { currencySymbol } from "@/lib/utils"
+import { useVintedDomains } from "@/hooks/use-vinted-domains"
 
 interface EditSearchItemPageParams {
   id: string;
@@ -21,6 +23,9 @@ export default function EditSearchItemPage({ params }: { params: EditSearchItemP
   const { toast } = useToast()
   const [isLoading, setIsLoading] = useState(true)
   const [isSubmitting, setIsSubmitting] = useState(false)
+  const [domain, setDomain] = useState("fr")
+  const { currencyOf } = useVintedDomains()
+  const currency = currencySymbol(currencyOf(domain))
   const [formData, setFormData] = useState<{
     minPrice: string;
     maxPrice: string;
@@ -46,6 +51,7 @@ export default function EditSearchItemPage({ params }: { params: EditSearchItemP
           tagInput: "",
           tags: data.tags || [],
         })
+        setDomain(data.domain || "fr")
       } catch (error) {
         toast({
           variant: "destructive",
@@ -169,7 +175,7 @@ export default function EditSearchItemPage({ params }: { params: EditSearchItemP
 
             <div className="grid gap-4 md:grid-cols-2">
               <div className="grid gap-2">
-                <Label htmlFor="minPrice">Minimum Price (€)</Label>
+                <Label htmlFor="minPrice">Minimum Price ({currency})</Label>
                 <Input
                   id="minPrice"
                   name="minPrice"
@@ -182,7 +188,7 @@ export default function EditSearchItemPage({ params }: { params: EditSearchItemP
                 />
               </div>
               <div className="grid gap-2">
-                <Label htmlFor="maxPrice">Maximum Price (€)</Label>
+                <Label htmlFor="maxPrice">Maximum Price ({currency})</Label>
                 <Input
                   id="maxPrice"
                   name="maxPrice"
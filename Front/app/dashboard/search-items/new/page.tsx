@@ -11,26 +11,37 @@ import { useToast } from "@/components/ui/use-toast"
 import { Badge } from "@/components/ui/badge"
 import { X } from "lucide-react"
 import { searchItemsApi } from "@/lib/api"
+import { currencySymbol } from "@/lib/utils"
+import { useVintedDomains } from "@/hooks/use-vinted-domains"
 
 export default function NewSearchItemPage() {
   const router = useRouter()
   const { toast } = useToast()
   const [isSubmitting, setIsSubmitting] = useState(false)
+  const { domains, currencyOf } = useVintedDomains()
   const [formData, setFormData] = useState<{
     minPrice: string
     maxPrice: string
     searchText: string
     tagInput: string
     tags: string[]
+    domain: string
+    priority: string
+    minDiscount: string
   }>({
     minPrice: "",
     maxPrice: "",
     searchText: "",
     tagInput: "",
     tags: [],
+    domain: "fr",
+    priority: "1",
+    minDiscount: "",
   })
 
-  const handleChange = (e: React.ChangeEvent<HTMLInputElement>) => {
+  const currency = currencySymbol(currencyOf(formData.domain))
+
+  const handleChange = (e: React.ChangeEvent<HTMLInputElement | HTMLSelectElement>) => {
     const { name, value } = e.target
     setFormData({ ...formData, [name]: value })
   }
@@ -58,6 +69,9 @@ export default function NewSearchItemPage() {
     minPrice: number | null
     maxPrice: number | null
     tags: string[]
+    domain: string
+    priority: number
+    minDiscount: number | null
   }
 
   const handleSubmit = async (e: React.FormEvent<HTMLFormElement>): Promise<void> => {
@@ -82,6 +96,9 @@ export default function NewSearchItemPage() {
         minPrice: formData.minPrice ? Number.parseInt(formData.minPrice) : null,
         maxPrice: formData.maxPrice ? Number.parseInt(formData.maxPrice) : null,
         tags: formData.tags,
+        domain: formData.domain,
+        priority: Number(formData.priority),
+        minDiscount: formData.minDiscount ? Number.parseInt(formData.minDiscount) : null,
       }
 
       await searchItemsApi.create(searchItemData)
@@ -135,9 +152,43 @@ export default function NewSearchItemPage() {
               <p className="text-sm text-muted-foreground">The main search term to look for on Vinted</p>
             </div>
 
+            <div className="grid gap-2">
+              <Label htmlFor="domain">Vinted Site</Label>
+              <select
+                id="domain"
+                name="domain"
+                value={formData.domain}
+                onChange={handleChange}
+                className="flex h-10 w-full rounded-md border border-input bg-background px-3 py-2 text-sm"
+              >
+                {domains.map(({ domain, currency }) => (
+                  <option key={domain} value={domain}>
+                    vinted.{domain} ({currency})
+                  </option>
+                ))}
+              </select>
+              <p className="text-sm text-muted-foreground">Prices are searched in the site's currency</p>
+            </div>
+
+            <div className="grid gap-2">
+              <Label htmlFor="priority">Priority</Label>
+              <select
+                id="priority"
+                name="priority"
+                value={formData.priority}
+                onChange={handleChange}
+                className="flex h-10 w-full rounded-md border border-input bg-background px-3 py-2 text-sm"
+              >
+                <option value="0">Low (checked every 5 to 60 minutes)</option>
+                <option value="1">Normal (checked every 1 to 15 minutes)</option>
+                <option value="2">High (checked every 10 seconds to 2 minutes)</option>
+              </select>
+              <p className="text-sm text-muted-foreground">Busy searches are checked more often within these bounds</p>
+            </div>
+
             <div className="grid gap-4 md:grid-cols-2">
               <div className="grid gap-2">
-                <Label htmlFor="minPrice">Minimum Price (€)</Label>
+                <Label htmlFor="minPrice">Minimum Price ({currency})</Label>
                 <Input
                   id="minPrice"
                   name="minPrice"
@@ -150,7 +201,7 @@ export default function NewSearchItemPage() {
                 />
               </div>
               <div className="grid gap-2">
-                <Label htmlFor="maxPrice">Maximum Price (€)</Label>
+                <Label htmlFor="maxPrice">Maximum Price ({currency})</Label>
                 <Input
                   id="maxPrice"
                   name="maxPrice"
@@ -164,6 +215,24 @@ export default function NewSearchItemPage() {
               </div>
             </div>
 
+            <div className="grid gap-2">
+              <Label htmlFor="minDiscount">Minimum Discount (%)</Label>
+              <Input
+                id="minDiscount"
+                name="minDiscount"
+                type="number"
+                min="0"
+                max="100"
+                placeholder="Notify every listing"
+                value={formData.minDiscount}
+                onChange={handleChange}
+                className="rounded-md"
+              />
+              <p className="text-sm text-muted-foreground">
+                Only notify listings priced at least this far below what this search usually finds
+              </p>
+            </div>
+
             <div className="grid gap-2">
               <Label htmlFor="tagInput">Tags</Label>
               <div className="flex gap-2">
@@ -196,7 +265,7 @@ export default function NewSearchItemPage() {
                   </Badge>
                 ))}
               </div>
-              <p className="text-sm text-muted-foreground">Keywords to refine your search (optional)</p>
+              <p className="text-sm text-muted-foreground">Keywords to refine your search (optional). Use -word to exclude, or brand:, size: and condition: to restrict</p>
             </div>
           </CardContent>
           <CardFooter className="flex justify-between">
@@ -5,7 +5,7 @@ import Link from "next/link"
 import { Button } from "@/components/ui/button"
 import { Card, CardContent, CardDescription, CardFooter, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
-import { Plus, Edit, Trash2, AlertCircle, Tag, Euro, SearchIcon } from "lucide-react"
+import { Plus, Edit, Trash2, AlertCircle, Tag, Banknote, SearchIcon } from "lucide-react"
 import {
   AlertDialog,
   AlertDialogAction,
@@ -18,11 +18,14 @@ import {
   AlertDialogTrigger,
 } from "@/components/ui/alert-dialog"
 import { searchItemsApi } from "@/lib/api"
+import { currencySymbol } from "@/lib/utils"
+import { useVintedDomains } from "@/hooks/use-vinted-domains"
 import { useToast } from "@/components/ui/use-toast"
 
 export default function SearchItemsPage() {
   const [searchItems, setSearchItems] = useState([])
   const [isLoading, setIsLoading] = useState(true)
+  const { currencyOf } = useVintedDomains()
   const { toast } = useToast()
 
   useEffect(() => {
@@ -158,9 +161,9 @@ export default function SearchItemsPage() {
               <CardContent>
                 <div className="grid gap-4 md:grid-cols-2">
                   <div className="flex items-center gap-2">
-                    <Euro className="h-4 w-4 text-primary" />
+                    <Banknote className="h-4 w-4 text-primary" />
                     <span className="text-sm">
-                      Price range: €{item.minPrice || 0} - €{item.maxPrice || "Any"}
+                      Price range: {currencySymbol(currencyOf(item.domain))}{item.minPrice || 0} - {item.maxPrice ? `${currencySymbol(currencyOf(item.domain))}${item.maxPrice}` : "Any"}
                     </span>
                   </div>
                   <div className="flex items-center gap-2">
@@ -0,0 +1,26 @@
+"use client"
+
+import * as React from "react"
+import { searchItemsApi } from "@/lib/api"
+import type { VintedDomain } from "@/lib/types"
+
+// En attendant la réponse de l'Api, seul le domaine par défaut est proposé
+const DEFAULT_DOMAINS: VintedDomain[] = [{ domain: "fr", currency: "EUR" }]
+
+export function useVintedDomains() {
+  const [domains, setDomains] = React.useState<VintedDomain[]>(DEFAULT_DOMAINS)
+
+  React.useEffect(() => {
+    searchItemsApi
+      .getDomains()
+      .then(setDomains)
+      .catch((error) => console.error("Error loading Vinted domains:", error))
+  }, [])
+
+  const currencyOf = React.useCallback(
+    (domain?: string) => domains.find((item) => item.domain === (domain || "fr"))?.currency ?? "EUR",
+    [domains]
+  )
+
+  return { domains, currencyOf }
+}
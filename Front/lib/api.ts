@@ -67,6 +67,11 @@ export const searchItemsApi = {
     return fetchWithAuth("/search-items");
   },
 
+  // Domaines Vinted pris en charge et leur devise, tels que l'Api les valide
+  getDomains: async () => {
+    return fetchWithAuth("/search-items/domains");
+  },
+
   getById: async (id: string) => {
     return fetchWithAuth(`/search-items/${id}`);
   },
@@ -87,13 +92,16 @@ export const searchItemsApi = {
 
 // Items API
 export const itemsApi = {
-  getAll: async (page = 1, limit = 12, orderBy: string, order: 'asc' | 'desc') => {
-    return fetchWithAuth(`/items?page=${page}&limit=${limit}&orderBy=${orderBy}&order=${order}`);
+  // `cursor` : id du dernier item reçu, pour lire la suite sans OFFSET (tri par date uniquement)
+  getAll: async (page = 1, limit = 12, orderBy: string, order: 'asc' | 'desc', cursor?: string) => {
+    const after = cursor ? `&cursor=${cursor}` : "";
+    return fetchWithAuth(`/items?page=${page}&limit=${limit}&orderBy=${orderBy}&order=${order}${after}`);
   },
 
-  getBySearchItem: async (searchItemId: string, page = 1, limit = 12, orderBy: string, order: 'asc' | 'desc') => {
+  getBySearchItem: async (searchItemId: string, page = 1, limit = 12, orderBy: string, order: 'asc' | 'desc', cursor?: string) => {
+    const after = cursor ? `&cursor=${cursor}` : "";
     return fetchWithAuth(
-      `/items/search/${searchItemId}?page=${page}&limit=${limit}&orderBy=${orderBy}&order=${order}`
+      `/items/search/${searchItemId}?page=${page}&limit=${limit}&orderBy=${orderBy}&order=${order}${after}`
     );
   },
 
@@ -30,18 +30,33 @@ export interface SearchItem {
   minPrice?: number | null
   maxPrice?: number | null
   tags?: string[]
+  domain?: string
+  priority?: number
+  minInterval?: number | null
+  maxInterval?: number | null
+  minDiscount?: number | null
   createdAt: string
   updatedAt: string
   userId: string
   resultsCount?: number
 }
 
+export interface VintedDomain {
+  domain: string
+  currency: string
+}
+
 export interface CreateSearchItemDto {
   name: string
   searchText: string
   minPrice?: number | null
   maxPrice?: number | null
   tags?: string[]
+  domain?: string
+  priority?: number
+  minInterval?: number | null
+  maxInterval?: number | null
+  minDiscount?: number | null
 }
 
 export interface UpdateSearchItemDto {
@@ -50,11 +65,17 @@ export interface UpdateSearchItemDto {
   minPrice?: number | null
   maxPrice?: number | null
   tags?: string[]
+  domain?: string
+  priority?: number
+  minInterval?: number | null
+  maxInterval?: number | null
+  minDiscount?: number | null
 }
 
 // Item types
 export interface Item {
   id: string
+  vintedId?: string | null
   name: string
   price: number
   size?: string
@@ -4,3 +4,11 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+// Symbole d'une devise ISO 4217 (EUR -> €, PLN -> zł, ...)
+export function currencySymbol(currency: string = "EUR") {
+  const part = new Intl.NumberFormat(undefined, { style: "currency", currency, currencyDisplay: "narrowSymbol" })
+    .formatToParts(0)
+    .find((item) => item.type === "currency")
+  return part?.value ?? currency
+}